@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Measure /chat throughput against the agent's HTTP API
+"""
+
+import sys
+import os
+import argparse
+import asyncio
+import json
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.rahu_agent import RahuAgent
+from src.http_api import AgentHTTPServer
+
+MESSAGES = ["What's the status?", "show metrics", "any proposals?", "help"]
+
+async def chat_client(host, port, count, latencies):
+    """Send ``count`` chat messages over one keep-alive connection"""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for i in range(count):
+            body = json.dumps({"message": MESSAGES[i % len(MESSAGES)]}).encode()
+            request = (
+                f"POST /chat HTTP/1.1\r\nHost: {host}\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n"
+            ).encode() + body
+
+            started = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = 0
+            for line in head.split(b"\r\n"):
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":", 1)[1])
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - started)
+    finally:
+        writer.close()
+
+async def run_benchmark(host, port, clients, messages):
+    """Return (messages per second, sorted latencies)"""
+    latencies = []
+    per_client = max(1, messages // clients)
+    started = time.perf_counter()
+    await asyncio.gather(*(chat_client(host, port, per_client, latencies) for _ in range(clients)))
+    elapsed = time.perf_counter() - started
+    return len(latencies) / elapsed, sorted(latencies)
+
+async def main(args):
+    server = None
+    host, port = args.host, args.port
+    if port is None:
+        # No target given: benchmark an in-process agent on an ephemeral port
+        server = AgentHTTPServer(RahuAgent(), "127.0.0.1", 0)
+        await server.start()
+        host, port = "127.0.0.1", server.port
+
+    try:
+        rate, latencies = await run_benchmark(host, port, args.clients, args.messages)
+    finally:
+        if server is not None:
+            await server.close()
+
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+    print(f"💬 {len(latencies)} messages over {args.clients} connections")
+    print(f"   Throughput: {rate:.0f} msg/s (target {args.target:.0f})")
+    print(f"   Latency: p50={p50:.2f} ms, p99={p99:.2f} ms")
+
+    if rate < args.target:
+        print("❌ Chat throughput below target")
+        return 1
+    print("✅ Chat throughput target met")
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=None, help="Running agent port (default: start one in-process)")
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--target", type=float, default=500.0, help="Minimum messages per second")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Run the agent benchmark suite and fail on regressions against the stored baseline
+"""
+
+import sys
+import os
+import argparse
+import asyncio
+import json
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+# Benchmark an isolated in-process agent: no journal on disk, no live sources
+os.environ.setdefault("AGENT_JOURNAL_DIR", "")
+os.environ.setdefault("METRICS_SOURCES", "simulated")
+
+from src.benchmark import DEFAULT_BASELINE, BenchmarkSuite, compare, load_baseline, save_baseline
+
+async def main(args):
+    suite = BenchmarkSuite(scale=args.scale, http_concurrency=args.concurrency, repeats=args.repeats)
+    only = [name.strip() for name in args.only.split(",")] if args.only else None
+    results = await suite.run(only)
+
+    print(f"{'benchmark':<24}{'ops':>8}{'ops/s':>12}{'p50 ms':>10}{'p99 ms':>10}")
+    for name, result in results.items():
+        row = result.to_dict()
+        print(f"{name:<24}{row['operations']:>8}{row['throughput']:>12.0f}{row['p50_ms']:>10.3f}{row['p99_ms']:>10.3f}")
+    for name, reason in suite.skipped.items():
+        print(f"{name:<24} skipped ({reason})")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({name: result.to_dict() for name, result in results.items()}, f, indent=2)
+
+    if args.update_baseline:
+        save_baseline(results, args.baseline)
+        print(f"📌 Baseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"⚠️  No baseline at {args.baseline}; run with --update-baseline to record one")
+        return 0
+
+    regressions = compare({name: result.to_dict() for name, result in results.items()},
+                          load_baseline(args.baseline), args.max_throughput_drop, args.max_p99_growth)
+    if regressions:
+        print(f"❌ {len(regressions)} regression(s):")
+        for regression in regressions:
+            print(f"   {regression}")
+        return 1
+    print(f"✅ No regressions (throughput within -{args.max_throughput_drop:.0%}, p99 within +{args.max_p99_growth:.0%} of the baseline)")
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--only", help="Comma-separated benchmark names (default: all)")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplier for every operation count")
+    parser.add_argument("--repeats", type=int, default=3, help="Runs per benchmark; the least-disturbed one is kept")
+    parser.add_argument("--concurrency", type=int, default=20, help="Concurrent HTTP connections")
+    parser.add_argument("--max-throughput-drop", type=float, default=0.3,
+                        help="Allowed throughput drop as a fraction of the baseline")
+    parser.add_argument("--max-p99-growth", type=float, default=0.5,
+                        help="Allowed p99 latency growth as a fraction of the baseline")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--update-baseline", action="store_true", help="Record these results as the new baseline")
+    parser.add_argument("--json", help="Also write the results to this file")
+    sys.exit(asyncio.run(main(parser.parse_args())))
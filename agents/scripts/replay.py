@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Replay recorded network metrics through the agent pipeline
+"""
+
+import sys
+import os
+import argparse
+import asyncio
+import json
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.replay import ReplayEngine, load_recording
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("recording", help="Agent journal directory/file, .csv or .jsonl recording")
+    parser.add_argument("--seed", type=int, default=0, help="RNG seed for proposal generation")
+    parser.add_argument("--reasoning", action="store_true", help="Also score triggered samples with the MeTTa engine")
+    parser.add_argument("--output", help="Write the full JSON report to this file")
+    args = parser.parse_args()
+
+    columns = load_recording(args.recording)
+    engine = None
+    if args.reasoning:
+        from src.metta_reasoning import get_reasoning_engine
+        engine = get_reasoning_engine()
+
+    report = asyncio.run(ReplayEngine(columns, seed=args.seed, reasoning_engine=engine).run())
+
+    print("=" * 60)
+    print("📼 Replay Report")
+    print("=" * 60)
+    print(f"Samples: {report['samples']}  Triggers: {report['triggers']}  Proposals: {report['proposals_fired']}")
+    print(f"Simulated {report['simulated_seconds']:.0f}s in {report['wall_seconds']:.3f}s ({report['speedup']:.0f}x real time)")
+    for stage, timing in report["timings"].items():
+        print(f"  {stage:<18} calls={timing['calls']:<7} mean={timing['mean_us']:.1f}µs p99={timing['p99_us']:.1f}µs")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Report written to {args.output}")
+
+if __name__ == "__main__":
+    main()
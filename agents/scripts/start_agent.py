@@ -25,6 +25,11 @@ def main():
     print("  GET  /status           - Agent status and metrics")
     print("  POST /chat             - Chat with agent")
     print("  GET  /proposals/latest - Get latest proposal")
+    print("  GET  /proposals/{id}   - Get a proposal by id")
+    print("  GET  /proposals        - List proposals (?since=&limit=&cursor=)")
+    print("  GET  /metrics          - OpenMetrics telemetry")
+    print("  GET  /stream           - Server-sent events for metrics and proposals")
+    print("  GET  /networks         - Monitored networks (scoped routes under /networks/{id}/)")
     print("")
     
     try:
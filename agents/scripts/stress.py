@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Stress the agent against a simulated L2 network while clients load its HTTP API
+"""
+
+import sys
+import os
+import argparse
+import asyncio
+import json
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+# Stress an isolated in-process agent: no journal on disk
+os.environ.setdefault("AGENT_JOURNAL_DIR", "")
+
+from src.load_generator import SCENARIOS, StressHarness
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), default="mixed")
+    parser.add_argument("--rate", type=float, default=1000.0, help="Blocks per second, and the agent's target sample rate")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds to run")
+    parser.add_argument("--http-clients", type=int, default=8, help="Keep-alive connections cycling through read endpoints")
+    parser.add_argument("--chat-clients", type=int, default=4, help="Keep-alive connections sending chat questions")
+    parser.add_argument("--client-rate", type=float, default=20.0, help="Requests per second per client (0: back to back)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the simulated chain and the agent")
+    parser.add_argument("--max-drop-rate", type=float, default=None, help="Fail when a network drops more samples than this fraction")
+    parser.add_argument("--output", help="Write the full JSON report to this file")
+    args = parser.parse_args()
+
+    harness = StressHarness(args.scenario, rate=args.rate, duration=args.duration, http_clients=args.http_clients,
+                            chat_clients=args.chat_clients, client_rate=args.client_rate, seed=args.seed)
+    report = asyncio.run(harness.run())
+
+    print("=" * 60)
+    print(f"🔥 Stress Report: {report['scenario']} at {report['rate']:.0f} blocks/s for {report['wall_seconds']:.1f}s")
+    print("=" * 60)
+    for network_id, network in report["networks"].items():
+        print(f"[{network_id}] Stored {network['samples_stored']} samples ({network['samples_per_second']:.0f}/s), "
+              f"dropped {network['dropped_samples']} of {network['blocks_produced']} blocks ({network['drop_rate']:.1%})")
+        print(f"   Tick errors: {network['tick_errors']}  Missed ticks: {network['missed_ticks']}  Proposals: {network['proposals']}")
+        for stage in ("sample_lag", "proposal_lag"):
+            lag = network[stage]
+            print(f"   {stage:<13} n={lag['count']:<7} p50={lag['p50_ms']:.2f}ms p95={lag['p95_ms']:.2f}ms "
+                  f"p99={lag['p99_ms']:.2f}ms max={lag['max_ms']:.2f}ms")
+    print(f"API: {report['api_requests_per_second']:.0f} req/s, {report['api_errors']} errors")
+    for name, latency in report["api"].items():
+        print(f"   {name:<22} n={latency['count']:<6} p50={latency['p50_ms']:.2f}ms p95={latency['p95_ms']:.2f}ms "
+              f"p99={latency['p99_ms']:.2f}ms")
+    memory = report["memory"]
+    print(f"Memory: RSS {memory['rss_start_mb']:.1f} → {memory['rss_end_mb']:.1f} MB "
+          f"(peak {memory['rss_peak_mb']:.1f}, growth {memory['growth_mb']:+.1f})")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Report written to {args.output}")
+
+    if args.max_drop_rate is not None:
+        worst = max(network["drop_rate"] for network in report["networks"].values())
+        if worst > args.max_drop_rate:
+            print(f"❌ Drop rate {worst:.1%} above {args.max_drop_rate:.1%}")
+            return 1
+        print(f"✅ Drop rate within {args.max_drop_rate:.1%}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,407 @@
+"""
+Benchmark suite for the Rahu Agent hot paths
+Measures throughput and latency percentiles and gates them against stored baselines
+"""
+
+import asyncio
+import gc
+import json
+import os
+import platform
+import random
+import socket
+import sys
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from . import rahu_agent
+from .http_api import AgentHTTPServer
+from .metrics_store import METRIC_FIELDS, NetworkMetrics
+from .parameter_search import CostModel, search
+from .replay import ReplayEngine
+
+AGENTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(AGENTS_DIR, "benchmarks", "baseline.json")
+
+# A p99 increase smaller than this is timer noise, whatever the ratio
+P99_NOISE_FLOOR_MS = 0.05
+
+# Absolute p99 ceilings, gated whatever the baseline says: /health within a second of launch
+P99_LIMITS_MS = {"startup": 1000.0}
+
+HTTP_ENDPOINTS = {
+    "http_health": ("GET", "/health", None),
+    "http_status": ("GET", "/status", None),
+    "http_proposals": ("GET", "/proposals?limit=50", None),
+    "http_proposals_latest": ("GET", "/proposals/latest", None),
+    "http_metrics": ("GET", "/metrics", None),
+    "http_chat": ("POST", "/chat", {"message": "What's the status?"}),
+}
+
+CHAT_MESSAGES = ["What's the status?", "show metrics", "any proposals?", "help"]
+
+
+class BenchmarkResult:
+    """Throughput and latency distribution of one benchmark run"""
+
+    def __init__(self, name: str, latencies: Sequence[float], elapsed: float, concurrency: int = 1):
+        self.name = name
+        self.latencies = np.sort(np.asarray(latencies, dtype=np.float64))
+        self.elapsed = elapsed
+        self.concurrency = concurrency
+
+    @property
+    def operations(self) -> int:
+        return len(self.latencies)
+
+    @property
+    def throughput(self) -> float:
+        return self.operations / self.elapsed if self.elapsed > 0 else 0.0
+
+    def percentile_ms(self, q: float) -> float:
+        return float(np.percentile(self.latencies, q)) * 1000 if self.operations else 0.0
+
+    def to_dict(self) -> Dict[str, float]:
+        return {
+            "operations": self.operations,
+            "concurrency": self.concurrency,
+            "throughput": round(self.throughput, 1),
+            "p50_ms": round(self.percentile_ms(50), 4),
+            "p99_ms": round(self.percentile_ms(99), 4),
+        }
+
+
+async def measure(name: str, operation: Callable[[int], Awaitable], count: int,
+                  concurrency: int = 1) -> BenchmarkResult:
+    """Await ``operation(i)`` ``count`` times, split across ``concurrency`` workers"""
+    latencies: List[float] = []
+    per_worker = max(1, count // concurrency)
+
+    async def worker(offset: int):
+        for i in range(offset, offset + per_worker):
+            started = time.perf_counter()
+            await operation(i)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(w * per_worker) for w in range(concurrency)))
+    return BenchmarkResult(name, latencies, time.perf_counter() - started, concurrency)
+
+
+class HttpClient:
+    """Keep-alive HTTP/1.1 connection that reads Content-Length framed responses"""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    async def request(self, method: str, path: str, body: Optional[Dict] = None) -> int:
+        payload = json.dumps(body).encode() if body is not None else b""
+        head = f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\nContent-Length: {len(payload)}\r\n"
+        if body is not None:
+            head += "Content-Type: application/json\r\n"
+        self.writer.write(head.encode() + b"\r\n" + payload)
+        await self.writer.drain()
+
+        response_head = await self.reader.readuntil(b"\r\n\r\n")
+        length = 0
+        for line in response_head.split(b"\r\n"):
+            if line.lower().startswith(b"content-length:"):
+                length = int(line.split(b":", 1)[1])
+        await self.reader.readexactly(length)
+        return int(response_head.split(b" ", 2)[1])
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+def sample_metrics(count: int, seed: int = 7) -> List[NetworkMetrics]:
+    """Synthetic samples spanning calm and congested conditions"""
+    rng = random.Random(seed)
+    return [
+        NetworkMetrics(
+            timestamp=1_700_000_000 + i * 30,
+            gas_price=rng.uniform(30, 180),
+            tps=rng.randint(100, 900),
+            block_time=rng.uniform(1.8, 2.5),
+            congestion_level=rng.uniform(0.4, 0.95),
+            active_users=rng.randint(5000, 75000),
+        )
+        for i in range(count)
+    ]
+
+
+async def build_agent(history: int = 2000, proposals: int = 200) -> "rahu_agent.RahuAgent":
+    """An agent with a filled metrics history and proposal store, writing nothing to disk"""
+    agent = rahu_agent.RahuAgent()
+    for network in agent.networks.values():
+        network.journal = None
+    agent.rng = random.Random(7)
+    samples = sample_metrics(history)
+    for metrics in samples:
+        agent.metrics_history.append(metrics)
+    agent.anomaly_detector.warm(samples)
+
+    for i, metrics in enumerate(samples[:proposals]):
+        # Every other tick, so consecutive proposals are never deduplicated
+        agent.tick = i * 2
+        proposal = await agent.generate_proposal(metrics)
+        if proposal:
+            agent.record_proposal(proposal)
+    return agent
+
+
+class BenchmarkSuite:
+    """
+    The agent's hot-path benchmarks
+
+    ``scale`` multiplies every operation count, so a quick smoke run and a
+    full baseline run exercise the same code. Each benchmark runs
+    ``repeats`` times after a warm-up run, with the garbage collector
+    paused, and keeps the run with the lowest p99: interference
+    from the rest of the machine only ever makes a run slower, so the
+    least-disturbed run is the stable one to gate on. Logging is silenced
+    while measuring; reasoning benchmarks are skipped when hyperon is missing.
+    """
+
+    def __init__(self, agent: Optional["rahu_agent.RahuAgent"] = None, scale: float = 1.0,
+                 http_concurrency: int = 20, repeats: int = 3):
+        self.agent = agent
+        self.scale = scale
+        self.repeats = repeats
+        self.http_concurrency = http_concurrency
+        self.samples = sample_metrics(1000, seed=11)
+        self.benchmarks: Dict[str, Callable[[], Awaitable[BenchmarkResult]]] = {
+            "should_optimize": self.bench_should_optimize,
+            "generate_proposal": self.bench_generate_proposal,
+            "parameter_search": self.bench_parameter_search,
+            "metta_reason": self.bench_metta_reason,
+            "metta_validate": self.bench_metta_validate,
+            "metta_validate_batch": self.bench_metta_validate_batch,
+            "chat": self.bench_chat,
+            "replay": self.bench_replay,
+            "startup": self.bench_startup,
+        }
+        for name in HTTP_ENDPOINTS:
+            self.benchmarks[name] = self._http_benchmark(name)
+        self.skipped: Dict[str, str] = {}
+        self._engine = None
+
+    def _count(self, base: int) -> int:
+        return max(1, int(base * self.scale))
+
+    async def bench_should_optimize(self) -> BenchmarkResult:
+        agent, samples = self.agent, self.samples
+        return await measure("should_optimize", lambda i: agent.should_optimize(samples[i % len(samples)]),
+                             self._count(20000))
+
+    async def bench_generate_proposal(self) -> BenchmarkResult:
+        agent, samples = self.agent, self.samples
+        return await measure("generate_proposal", lambda i: agent.generate_proposal(samples[i % len(samples)]),
+                             self._count(2000))
+
+    async def bench_parameter_search(self) -> BenchmarkResult:
+        # Fit and score a dense 24-point grid, the heaviest search the agent is configured for
+        history, params = self.agent.metrics_history.window(), self.agent.current_params
+
+        async def fit_and_search(i):
+            search(CostModel.fit(history, params), params, points=24)
+        return await measure("parameter_search", fit_and_search, self._count(1000))
+
+    def engine(self):
+        if self._engine is None:
+            from loguru import logger
+            from . import metta_reasoning
+            # Per-call info logs would dominate the measurement
+            logger.disable(metta_reasoning.__name__)
+            self._engine = metta_reasoning.MeTTaReasoningEngine()
+        return self._engine
+
+    async def bench_metta_reason(self) -> BenchmarkResult:
+        engine, params = self.engine(), self.agent.current_params
+        snapshots = [metrics.to_dict() for metrics in self.samples]
+
+        async def reason(i):
+            engine.reason_about_optimization(snapshots[i % len(snapshots)], params, i % 150)
+        return await measure("metta_reason", reason, self._count(5000))
+
+    async def bench_metta_validate(self) -> BenchmarkResult:
+        engine, params = self.engine(), self.agent.current_params
+        proposals = [{"current_params": params, "proposed_params": engine.reason_about_optimization(
+            metrics.to_dict(), params, 50)[0]} for metrics in self.samples[:100]]
+
+        async def validate(i):
+            engine.validate_proposal(proposals[i % len(proposals)])
+        return await measure("metta_validate", validate, self._count(5000))
+
+    async def bench_metta_validate_batch(self) -> BenchmarkResult:
+        engine, params = self.engine(), self.agent.current_params
+        # Candidate-search sized batches: 1000 proposals spanning safe and unsafe changes
+        rng = random.Random(3)
+        proposals = [{"current_params": params, "proposed_params": {
+            name: value * rng.uniform(0.4, 2.2) for name, value in params.items()
+        }} for _ in range(1000)]
+
+        async def validate(i):
+            engine.validate_proposals(proposals)
+        return await measure("metta_validate_batch", validate, self._count(500))
+
+    async def bench_chat(self) -> BenchmarkResult:
+        agent = self.agent
+        return await measure("chat", lambda i: agent.process_chat_message(CHAT_MESSAGES[i % len(CHAT_MESSAGES)]),
+                             self._count(20000))
+
+    async def bench_replay(self) -> BenchmarkResult:
+        # Each operation replays the 1000-sample recording (about 8 simulated hours) end to end
+        columns = {name: np.array([getattr(metrics, name) for metrics in self.samples]) for name in METRIC_FIELDS}
+
+        async def replay(i):
+            await ReplayEngine(columns, seed=i).run()
+        return await measure("replay", replay, self._count(20))
+
+    async def bench_startup(self) -> BenchmarkResult:
+        # Launch to first 200 from /health, one fresh agent process per operation
+        env = {**os.environ, "AGENT_HTTP_HOST": "127.0.0.1", "AGENT_JOURNAL_DIR": "",
+               "MONITORING_INTERVAL": "60", "PYTHONUNBUFFERED": "1"}
+        script = os.path.join("scripts", "start_agent.py")
+
+        async def launch(i):
+            with socket.socket() as sock:
+                sock.bind(("127.0.0.1", 0))
+                port = sock.getsockname()[1]
+            process = await asyncio.create_subprocess_exec(
+                sys.executable, script, cwd=AGENTS_DIR, env={**env, "AGENT_HTTP_PORT": str(port)},
+                stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL)
+            client = HttpClient("127.0.0.1", port)
+            try:
+                while True:
+                    if process.returncode is not None:
+                        raise RuntimeError(f"Agent exited with {process.returncode} before /health answered")
+                    try:
+                        await client.connect()
+                        if await client.request("GET", "/health") == 200:
+                            return
+                    except (OSError, asyncio.IncompleteReadError):
+                        await asyncio.sleep(0.005)
+                    finally:
+                        client.close()
+            finally:
+                process.terminate()
+                await process.wait()
+        return await measure("startup", launch, self._count(5))
+
+    def _http_benchmark(self, name: str) -> Callable[[], Awaitable[BenchmarkResult]]:
+        method, path, body = HTTP_ENDPOINTS[name]
+
+        async def run() -> BenchmarkResult:
+            server = AgentHTTPServer(self.agent, "127.0.0.1", 0)
+            await server.start()
+            clients = [HttpClient("127.0.0.1", server.port) for _ in range(self.http_concurrency)]
+            try:
+                await asyncio.gather(*(client.connect() for client in clients))
+                per_client = max(1, self._count(4000) // len(clients))
+
+                async def request(i):
+                    status = await clients[i // per_client].request(method, path, body)
+                    if status != 200:
+                        raise RuntimeError(f"{method} {path} returned {status}")
+                return await measure(name, request, per_client * len(clients), len(clients))
+            finally:
+                for client in clients:
+                    client.close()
+                await server.close()
+        return run
+
+    async def _run_once(self, name: str) -> BenchmarkResult:
+        # As timeit does, keep collector pauses out of the measured tail
+        gc.collect()
+        gc.disable()
+        try:
+            return await self.benchmarks[name]()
+        finally:
+            gc.enable()
+
+    async def run(self, only: Optional[Sequence[str]] = None) -> Dict[str, BenchmarkResult]:
+        names = list(only) if only else list(self.benchmarks)
+        unknown = set(names) - set(self.benchmarks)
+        if unknown:
+            raise ValueError(f"Unknown benchmarks: {', '.join(sorted(unknown))}")
+
+        results: Dict[str, BenchmarkResult] = {}
+        was_enabled = rahu_agent.logger.enabled
+        rahu_agent.logger.enabled = False
+        try:
+            if self.agent is None:
+                self.agent = await build_agent()
+            for name in names:
+                try:
+                    runs = [await self._run_once(name) for _ in range(self.repeats + 1)]
+                    # The first run only warms caches, connections and code paths
+                    results[name] = min(runs[1:], key=lambda run: run.percentile_ms(99))
+                except ImportError as e:
+                    self.skipped[name] = str(e)
+        finally:
+            rahu_agent.logger.enabled = was_enabled
+            if self._engine is not None:
+                from loguru import logger
+                logger.enable(type(self._engine).__module__)
+        return results
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+            throughput_threshold: float = 0.3, p99_threshold: float = 0.5) -> List[str]:
+    """
+    Regressions of ``results`` against ``baseline``
+
+    A benchmark regresses when its throughput falls more than
+    ``throughput_threshold`` below the baseline, or its p99 rises more than
+    ``p99_threshold`` above it (and by more than P99_NOISE_FLOOR_MS).
+    Benchmarks without a baseline are not gated. Benchmarks in P99_LIMITS_MS
+    also fail when their p99 exceeds that absolute ceiling.
+    """
+    regressions = []
+    for name, result in results.items():
+        ceiling = P99_LIMITS_MS.get(name)
+        if ceiling is not None and result["p99_ms"] > ceiling:
+            regressions.append(f"{name}: p99 {result['p99_ms']:.3f} ms is above the ceiling {ceiling:.0f} ms")
+        base = baseline.get(name)
+        if not base:
+            continue
+        if result["throughput"] < base["throughput"] * (1 - throughput_threshold):
+            regressions.append(
+                f"{name}: throughput {result['throughput']:.0f}/s is "
+                f"{1 - result['throughput'] / base['throughput']:.0%} below baseline {base['throughput']:.0f}/s"
+            )
+        p99_limit = max(base["p99_ms"] * (1 + p99_threshold), base["p99_ms"] + P99_NOISE_FLOOR_MS)
+        if result["p99_ms"] > p99_limit:
+            regressions.append(
+                f"{name}: p99 {result['p99_ms']:.3f} ms is above the limit {p99_limit:.3f} ms "
+                f"(baseline {base['p99_ms']:.3f} ms)"
+            )
+    return regressions
+
+
+def load_baseline(path: str = DEFAULT_BASELINE) -> Dict[str, Dict[str, float]]:
+    with open(path) as f:
+        return json.load(f)["results"]
+
+
+def save_baseline(results: Dict[str, BenchmarkResult], path: str = DEFAULT_BASELINE):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    document = {
+        "machine": {"python": platform.python_version(), "platform": platform.platform(),
+                    "cpus": os.cpu_count()},
+        "recorded": int(time.time()),
+        "results": {name: result.to_dict() for name, result in results.items()},
+    }
+    with open(path, "w") as f:
+        json.dump(document, f, indent=2)
+        f.write("\n")
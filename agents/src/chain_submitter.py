@@ -0,0 +1,522 @@
+"""
+On-chain proposal submission for the Rahu Agent
+Sends accepted proposals to AIGovernance.submitProposal with local nonce, gas and receipt management
+"""
+
+import asyncio
+import hashlib
+import heapq
+import itertools
+import json
+import math
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Sequence, Tuple
+
+from . import telemetry
+
+if TYPE_CHECKING:
+    import aiohttp
+
+# Function selector for AIGovernance.submitProposal(uint256,uint256,uint256,bytes32,string)
+SUBMIT_PROPOSAL_SELECTOR = "25673d42"
+
+# submitProposal stores a 12-slot Proposal struct, bumps proposalCount, emits an event and
+# reads RahuL2.getParams (~330k gas); each 32-byte word of reasoning costs another slot
+SUBMIT_BASE_GAS = 400_000
+GAS_PER_REASONING_WORD = 22_100
+MAX_REASONING_BYTES = 256
+
+# Nodes only accept a same-nonce replacement that outbids the original by at least 10%
+REPLACEMENT_GAS_BUMP = 1.125
+
+
+class RpcError(Exception):
+    """A JSON-RPC error response, or a failure reaching the node"""
+
+    def __init__(self, message: str, code: Optional[int] = None):
+        super().__init__(message)
+        self.code = code
+
+
+class JsonRpcClient:
+    """
+    Ethereum JSON-RPC over one pooled HTTP session
+
+    ``batch`` sends several calls as a single JSON-RPC batch request, so a
+    window's transactions or a round of receipt polls cost one round trip.
+    """
+
+    def __init__(self, url: str, timeout: float = 10.0):
+        self.url = url
+        self.timeout = timeout
+        self._ids = itertools.count(1)
+        self._session: Optional["aiohttp.ClientSession"] = None
+
+    async def start(self):
+        if self._session is None:
+            import aiohttp
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.timeout))
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def call(self, method: str, params: Optional[List] = None):
+        [result] = await self.batch([(method, params or [])])
+        if isinstance(result, RpcError):
+            raise result
+        return result
+
+    async def batch(self, calls: Sequence[Tuple[str, List]]) -> List:
+        """Results in call order, with failed calls returned as RpcError instances"""
+        if not calls:
+            return []
+        import aiohttp
+        await self.start()
+        ids = [next(self._ids) for _ in calls]
+        payload = [{"jsonrpc": "2.0", "id": request_id, "method": method, "params": list(params)}
+                   for request_id, (method, params) in zip(ids, calls)]
+        try:
+            async with self._session.post(self.url, json=payload if len(payload) > 1 else payload[0]) as response:
+                if response.status != 200:
+                    raise RpcError(f"{calls[0][0]} returned HTTP {response.status}")
+                body = await response.json(content_type=None)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            raise RpcError(f"{calls[0][0]} request failed: {e or type(e).__name__}") from e
+
+        if isinstance(body, dict) and "error" in body and body.get("id") not in ids:
+            # A node that rejects the whole batch answers with one error
+            raise RpcError(f"Batch rejected: {body['error']}")
+        by_id = {item.get("id"): item for item in (body if isinstance(body, list) else [body]) if isinstance(item, dict)}
+        results = []
+        for request_id, (method, _) in zip(ids, calls):
+            item = by_id.get(request_id)
+            if item is None:
+                results.append(RpcError(f"{method}: no response"))
+            elif "error" in item:
+                error = item["error"] if isinstance(item["error"], dict) else {"message": str(item["error"])}
+                results.append(RpcError(f"{method} failed: {error.get('message')}", error.get("code")))
+            else:
+                results.append(item.get("result"))
+        return results
+
+
+def _word(value: int) -> bytes:
+    if not 0 <= value < 2 ** 256:
+        raise ValueError(f"{value} does not fit in a uint256")
+    return value.to_bytes(32, "big")
+
+
+def encode_submit_proposal(gas_limit: int, block_time: int, max_tps: int, proof_hash: bytes, reasoning: str) -> str:
+    """ABI-encoded calldata for AIGovernance.submitProposal"""
+    if len(proof_hash) != 32:
+        raise ValueError("zkProofHash must be 32 bytes")
+    text = reasoning.encode("utf-8")
+    # Head: three uints, the bytes32 and the string's offset (five words); tail: length and padded bytes
+    encoded = (_word(gas_limit) + _word(block_time) + _word(max_tps) + proof_hash + _word(5 * 32)
+               + _word(len(text)) + text + b"\0" * (-len(text) % 32))
+    return "0x" + SUBMIT_PROPOSAL_SELECTOR + encoded.hex()
+
+
+def onchain_params(params: Dict) -> Tuple[int, int, int]:
+    """(gas limit, block time, max TPS) as RahuL2 stores them: integers, with whole-second block times"""
+    return int(params["gas_limit"]), max(1, int(round(float(params["block_time"])))), int(params["max_tps"])
+
+
+def proposal_arguments(proposal: Dict) -> Tuple[int, int, int, bytes, str]:
+    """submitProposal arguments for a proposal record"""
+    params = proposal["proposed_params"]
+    gas_limit, block_time, max_tps = onchain_params(params)
+    proof = proposal.get("zk_proof_hash")
+    if proof:
+        proof_hash = bytes.fromhex(proof[2:] if proof.startswith("0x") else proof)
+    else:
+        # No prover yet: commit to the proposal so the hash is non-zero and identifies it
+        commitment = json.dumps({"proposal_id": proposal["proposal_id"], "proposed_params": params}, sort_keys=True)
+        proof_hash = hashlib.sha256(commitment.encode()).digest()
+    reasoning = (proposal.get("reasoning") or "").encode("utf-8")[:MAX_REASONING_BYTES].decode("utf-8", "ignore")
+    return gas_limit, block_time, max_tps, proof_hash, reasoning
+
+
+def estimate_gas(reasoning: str) -> int:
+    """Local gas limit for submitProposal, saving an eth_estimateGas round trip"""
+    return SUBMIT_BASE_GAS + GAS_PER_REASONING_WORD * ((len(reasoning.encode("utf-8")) + 31) // 32)
+
+
+def local_signer(private_key: str) -> Tuple[str, Callable[[Dict], str]]:
+    """Sender address and a raw-transaction signer for a private key (requires eth-account)"""
+    try:
+        from eth_account import Account
+    except ImportError as e:
+        raise ImportError("Signing with PRIVATE_KEY requires eth-account (pip install eth-account)") from e
+    account = Account.from_key(private_key)
+
+    def sign(transaction: Dict) -> str:
+        signed = account.sign_transaction(transaction)
+        raw = getattr(signed, "raw_transaction", None) or signed.rawTransaction
+        return "0x" + bytes(raw).hex()
+    return account.address, sign
+
+
+class Submission:
+    """One proposal on its way to AIGovernance"""
+
+    def __init__(self, proposal_id: str, network: str, contract: str, calldata: str, gas: int):
+        self.proposal_id = proposal_id
+        self.network = network
+        self.contract = contract
+        self.calldata = calldata
+        self.gas = gas
+        # pending -> sent -> confirmed | reverted, or superseded / failed before reaching a block,
+        # or unchanged when it would not change RahuL2's parameters
+        self.status = "pending"
+        self.nonce: Optional[int] = None
+        self.gas_price: Optional[int] = None
+        self.tx_hashes: List[str] = []
+        self.tx_hash: Optional[str] = None
+        self.block_number: Optional[int] = None
+        self.chain_proposal_id: Optional[int] = None
+        self.error: Optional[str] = None
+        self.note: Optional[str] = None
+        self.created_at = time.time()
+        self.last_sent = 0.0
+
+    def to_dict(self) -> Dict:
+        return {
+            "proposal_id": self.proposal_id,
+            "network": self.network,
+            "status": self.status,
+            "nonce": self.nonce,
+            "gas_price": self.gas_price,
+            "tx_hash": self.tx_hash,
+            "replacements": max(0, len(self.tx_hashes) - 1),
+            "block_number": self.block_number,
+            "chain_proposal_id": self.chain_proposal_id,
+            "error": self.error,
+            "note": self.note,
+        }
+
+
+class ProposalSubmitter:
+    """
+    Pipelines accepted proposals to AIGovernance.submitProposal
+
+    Proposals are coalesced for ``window`` seconds: a newer proposal for a
+    network supersedes the one still waiting, so only the latest reaches the
+    chain. Each window's transactions go out as one JSON-RPC batch, with
+    nonces assigned locally and a cached, padded gas price, so sending costs
+    no per-transaction lookups. Up to ``max_in_flight`` transactions stay
+    unconfirmed at once; a background tracker polls their receipts in one
+    batch per ``poll_interval`` and re-sends any stuck for ``replace_after``
+    seconds with the same nonce and a higher gas price.
+
+    Transactions are signed by ``signer`` (returning raw transaction hex)
+    when given, and otherwise sent with ``eth_sendTransaction`` from an
+    account the node manages (an unlocked Hardhat or Anvil account).
+    """
+
+    def __init__(self, rpc: JsonRpcClient, sender: str, signer: Optional[Callable[[Dict], str]] = None,
+                 window: float = 5.0, max_in_flight: int = 4, gas_price_multiplier: float = 1.1,
+                 gas_price_ttl: float = 15.0, gas_limit: Optional[int] = None,
+                 replace_after: float = 60.0, poll_interval: float = 1.0, history: int = 1000):
+        if not sender:
+            raise ValueError("A sender account is required to submit proposals")
+        self.rpc = rpc
+        self.sender = sender
+        self.signer = signer
+        self.window = window
+        self.max_in_flight = max(1, max_in_flight)
+        self.gas_price_multiplier = gas_price_multiplier
+        self.gas_price_ttl = gas_price_ttl
+        self.gas_limit = gas_limit
+        self.replace_after = replace_after
+        self.poll_interval = poll_interval
+        self.history = history
+
+        self.submissions: "OrderedDict[str, Submission]" = OrderedDict()
+        self.counts = {status: 0 for status in
+                       ("submitted", "unchanged", "superseded", "sent", "replaced", "confirmed", "reverted", "failed")}
+        self.batches = 0
+        self.last_error: Optional[str] = None
+        self._pending: "OrderedDict[str, Submission]" = OrderedDict()
+        self._active: Dict[int, Submission] = {}
+        self._next_nonce: Optional[int] = None
+        self._free_nonces: List[int] = []
+        self._chain_id: Optional[int] = None
+        self._gas_price: Optional[int] = None
+        self._gas_price_at = -math.inf
+        self._wakeup = asyncio.Event()
+        self._slot_freed = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._active)
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def submit(self, proposal: Dict, network: str, contract: str) -> Submission:
+        """
+        Queue a proposal record, superseding any still waiting for the same network
+
+        A proposal whose parameters equal its ``current_params`` once encoded
+        for RahuL2 (a 2.0 → 1.8 s block time alone rounds back to 2 s) is
+        not sent: it comes back ``unchanged`` and leaves any waiting
+        proposal in place. A block-time change lost to rounding alongside
+        other changes is noted on the submission.
+        """
+        gas_limit, block_time, max_tps, proof_hash, reasoning = proposal_arguments(proposal)
+        submission = Submission(
+            proposal["proposal_id"], network, contract,
+            encode_submit_proposal(gas_limit, block_time, max_tps, proof_hash, reasoning),
+            self.gas_limit or estimate_gas(reasoning)
+        )
+        self.submissions[submission.proposal_id] = submission
+        while len(self.submissions) > self.history:
+            self.submissions.popitem(last=False)
+
+        current = proposal.get("current_params")
+        if current:
+            proposed_block_time = float(proposal["proposed_params"]["block_time"])
+            current_params = onchain_params(current)
+            if proposed_block_time != float(current["block_time"]) and block_time == current_params[1]:
+                submission.note = (f"block_time {proposed_block_time:g}s rounds to the current "
+                                   f"{block_time}s on-chain")
+            if (gas_limit, block_time, max_tps) == current_params:
+                submission.error = "No change to RahuL2's parameters once rounded for the contract"
+                self._finish(submission, "unchanged")
+                return submission
+
+        previous = self._pending.pop(network, None)
+        if previous:
+            self._finish(previous, "superseded")
+        self._pending[network] = submission
+        self._count("submitted")
+        self._wakeup.set()
+        return submission
+
+    async def start(self):
+        if not self._tasks:
+            await self.rpc.start()
+            self._tasks = [asyncio.create_task(self._send_loop()), asyncio.create_task(self._track_receipts())]
+
+    async def close(self):
+        """Send whatever is still waiting, then stop the background tasks and close the connection"""
+        # Stop the send loop so it cannot flush concurrently, but keep the receipt
+        # tracker running through the final flush, which needs the slots it frees
+        sender, tracker = self._tasks or (None, None)
+        if sender is not None:
+            sender.cancel()
+            await asyncio.gather(sender, return_exceptions=True)
+        if self._pending:
+            try:
+                await self.flush()
+            except RpcError as e:
+                self.last_error = str(e)
+        if tracker is not None:
+            tracker.cancel()
+            await asyncio.gather(tracker, return_exceptions=True)
+        self._tasks = []
+        await self.rpc.close()
+
+    async def sync(self):
+        """Reload the account nonce, gas price and chain id from the node in one round trip"""
+        nonce, gas_price, chain_id = await self.rpc.batch([
+            ("eth_getTransactionCount", [self.sender, "pending"]),
+            ("eth_gasPrice", []),
+            ("eth_chainId", []),
+        ])
+        for result in (nonce, gas_price, chain_id):
+            if isinstance(result, RpcError):
+                raise result
+        chain_nonce = int(nonce, 16)
+        # Freed nonces the chain has since consumed are gone; never reuse one still in flight
+        self._free_nonces = [n for n in self._free_nonces if n >= chain_nonce and n not in self._active]
+        heapq.heapify(self._free_nonces)
+        self._next_nonce = max([chain_nonce, self._next_nonce or 0] + [n + 1 for n in self._active])
+        self._set_gas_price(int(gas_price, 16))
+        self._chain_id = int(chain_id, 16)
+
+    async def flush(self) -> List[Submission]:
+        """Send waiting proposals, up to the free in-flight slots, as one batch"""
+        capacity = self.max_in_flight - len(self._active)
+        if capacity <= 0 or not self._pending:
+            return []
+        if self._next_nonce is None:
+            await self.sync()
+        gas_price = await self._current_gas_price()
+        batch = [self._pending.popitem(last=False)[1] for _ in range(min(capacity, len(self._pending)))]
+        for submission in batch:
+            submission.nonce = self._take_nonce()
+            submission.gas_price = gas_price
+
+        try:
+            results = await self.rpc.batch([self._send_call(submission) for submission in batch])
+        except RpcError:
+            for submission in reversed(batch):
+                heapq.heappush(self._free_nonces, submission.nonce)
+                self._requeue(submission)
+            self._next_nonce = None
+            raise
+        self.batches += 1
+
+        sent, resync = [], False
+        now = asyncio.get_running_loop().time()
+        for submission, result in zip(batch, results):
+            if isinstance(result, RpcError):
+                resync = True
+                self.last_error = str(result)
+                if "nonce too low" in str(result).lower():
+                    # Someone else used the nonce: try again with a fresh one
+                    self._requeue(submission)
+                else:
+                    heapq.heappush(self._free_nonces, submission.nonce)
+                    submission.error = str(result)
+                    self._finish(submission, "failed")
+                continue
+            submission.status = "sent"
+            submission.tx_hash = result
+            submission.tx_hashes.append(result)
+            submission.last_sent = now
+            self._active[submission.nonce] = submission
+            self._count("sent")
+            sent.append(submission)
+        if resync:
+            await self.sync()
+        return sent
+
+    async def poll_receipts(self):
+        """Settle in-flight transactions that have receipts and replace those stuck too long"""
+        candidates = [(submission, tx_hash) for submission in self._active.values() for tx_hash in submission.tx_hashes]
+        results = await self.rpc.batch([("eth_getTransactionReceipt", [tx_hash]) for _, tx_hash in candidates])
+        for (submission, tx_hash), receipt in zip(candidates, results):
+            if not receipt or isinstance(receipt, RpcError) or self._active.get(submission.nonce) is not submission:
+                continue
+            del self._active[submission.nonce]
+            submission.tx_hash = tx_hash
+            submission.block_number = int(receipt["blockNumber"], 16)
+            if int(receipt.get("status", "0x1"), 16) == 1:
+                submission.chain_proposal_id = self._proposal_id(receipt, submission.contract)
+                self._finish(submission, "confirmed")
+            else:
+                self._finish(submission, "reverted")
+            self._slot_freed.set()
+
+        now = asyncio.get_running_loop().time()
+        stuck = [submission for submission in self._active.values() if now - submission.last_sent >= self.replace_after]
+        if stuck:
+            await self._replace(stuck)
+
+    def stats(self) -> Dict:
+        return {
+            **self.counts,
+            "pending": len(self._pending),
+            "in_flight": len(self._active),
+            "batches": self.batches,
+            "next_nonce": self._next_nonce,
+            "gas_price": self._gas_price,
+            "last_error": self.last_error,
+        }
+
+    async def _send_loop(self):
+        while True:
+            await self._wakeup.wait()
+            # Let the window fill; proposals arriving meanwhile supersede older ones
+            await asyncio.sleep(self.window)
+            self._wakeup.clear()
+            while self._pending and len(self._active) >= self.max_in_flight:
+                self._slot_freed.clear()
+                await self._slot_freed.wait()
+            try:
+                await self.flush()
+            except RpcError as e:
+                self.last_error = str(e)
+            if self._pending:
+                self._wakeup.set()
+
+    async def _track_receipts(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            if self._active:
+                try:
+                    await self.poll_receipts()
+                except RpcError as e:
+                    self.last_error = str(e)
+
+    async def _replace(self, stuck: List[Submission]):
+        gas_price = await self._current_gas_price()
+        for submission in stuck:
+            submission.gas_price = max(gas_price, math.ceil(submission.gas_price * REPLACEMENT_GAS_BUMP))
+        results = await self.rpc.batch([self._send_call(submission) for submission in stuck])
+        now = asyncio.get_running_loop().time()
+        for submission, result in zip(stuck, results):
+            submission.last_sent = now
+            if isinstance(result, RpcError):
+                # Usually the original was mined meanwhile; the next poll settles it
+                self.last_error = str(result)
+                continue
+            submission.tx_hash = result
+            submission.tx_hashes.append(result)
+            self._count("replaced")
+
+    async def _current_gas_price(self) -> int:
+        if asyncio.get_running_loop().time() - self._gas_price_at >= self.gas_price_ttl:
+            self._set_gas_price(int(await self.rpc.call("eth_gasPrice"), 16))
+        return self._gas_price
+
+    def _set_gas_price(self, base: int):
+        self._gas_price = max(1, math.ceil(base * self.gas_price_multiplier))
+        self._gas_price_at = asyncio.get_running_loop().time()
+
+    def _take_nonce(self) -> int:
+        if self._free_nonces:
+            return heapq.heappop(self._free_nonces)
+        nonce = self._next_nonce
+        self._next_nonce += 1
+        return nonce
+
+    def _send_call(self, submission: Submission) -> Tuple[str, List]:
+        transaction = {
+            "to": submission.contract,
+            "data": submission.calldata,
+            "nonce": submission.nonce,
+            "gas": submission.gas,
+            "gasPrice": submission.gas_price,
+            "value": 0,
+        }
+        if self.signer:
+            return "eth_sendRawTransaction", [self.signer({**transaction, "chainId": self._chain_id})]
+        return "eth_sendTransaction", [{
+            "from": self.sender,
+            **{key: hex(value) if isinstance(value, int) else value for key, value in transaction.items()}
+        }]
+
+    def _requeue(self, submission: Submission):
+        submission.nonce = None
+        if submission.network in self._pending:
+            self._finish(submission, "superseded")
+            return
+        submission.status = "pending"
+        self._pending[submission.network] = submission
+        self._pending.move_to_end(submission.network, last=False)
+
+    def _finish(self, submission: Submission, status: str):
+        submission.status = status
+        self._count(status)
+
+    def _count(self, outcome: str):
+        self.counts[outcome] += 1
+        telemetry.CHAIN_SUBMISSIONS.labels(outcome).inc()
+
+    @staticmethod
+    def _proposal_id(receipt: Dict, contract: str) -> Optional[int]:
+        # ProposalSubmitted(uint256 indexed proposalId, address indexed proposer, bytes32 zkProofHash)
+        for log in receipt.get("logs") or []:
+            topics = log.get("topics") or []
+            if str(log.get("address", "")).lower() == contract.lower() and len(topics) >= 3:
+                return int(topics[1], 16)
+        return None
@@ -0,0 +1,292 @@
+"""
+Chat intent engine for the Rahu Agent
+One precompiled pattern turns a question into an intent answered from indexed metrics and proposals
+"""
+
+import math
+import re
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Dict, Iterable, Optional, Set, Tuple
+
+import numpy as np
+
+from . import telemetry
+from .metrics_rollups import summarize_rows
+
+if TYPE_CHECKING:
+    from .network_monitor import MonitoredNetwork
+
+PERIOD_SECONDS = {"second": 1, "sec": 1, "minute": 60, "min": 60, "hour": 3600, "hr": 3600, "day": 86400, "week": 604800}
+
+# Phrase -> (kind, value); network ids are added per agent
+VOCABULARY: Dict[str, Tuple[str, str]] = {
+    "status": ("keyword", "status"),
+    "health": ("keyword", "status"),
+    "healthy": ("keyword", "status"),
+    "proposal": ("keyword", "proposals"),
+    "proposals": ("keyword", "proposals"),
+    "metrics": ("keyword", "metrics"),
+    "network": ("keyword", "networks"),
+    "networks": ("keyword", "networks"),
+    "help": ("keyword", "help"),
+    "gas price": ("metric", "gas_price"),
+    "gas": ("metric", "gas_price"),
+    "tps": ("metric", "tps"),
+    "throughput": ("metric", "tps"),
+    "transactions per second": ("metric", "tps"),
+    "block time": ("metric", "block_time"),
+    "congestion": ("metric", "congestion_level"),
+    "utilisation": ("metric", "congestion_level"),
+    "utilization": ("metric", "congestion_level"),
+    "active users": ("metric", "active_users"),
+    "users": ("metric", "active_users"),
+    "min": ("statistic", "min"),
+    "minimum": ("statistic", "min"),
+    "lowest": ("statistic", "min"),
+    "max": ("statistic", "max"),
+    "maximum": ("statistic", "max"),
+    "highest": ("statistic", "max"),
+    "peak": ("statistic", "max"),
+    "mean": ("statistic", "mean"),
+    "average": ("statistic", "mean"),
+    "avg": ("statistic", "mean"),
+    "median": ("statistic", "p50"),
+}
+
+# Display name and value format per metric
+METRIC_FORMATS = {
+    "gas_price": ("gas price", "{:.1f} Gwei"),
+    "tps": ("TPS", "{:.0f}"),
+    "block_time": ("block time", "{:.2f}s"),
+    "congestion_level": ("congestion", "{:.1%}"),
+    "active_users": ("active users", "{:,.0f}"),
+}
+
+HELP = ("Ask about: status, proposals, or metrics. Examples: 'p95 gas over the last hour', "
+        "'max tps in the past 10 minutes', 'proposals since 10:00', 'metrics over the last day'")
+
+# Answers about "the last hour" or "since 10:00" drift as time passes even when no data arrives
+RELATIVE_TTL = 60.0
+
+
+def compile_pattern(networks: Iterable[str] = ()) -> "re.Pattern":
+    """The single pattern that tokenises every chat message"""
+    phrases = list(VOCABULARY) + list(networks)
+    words = "|".join(r"\s+".join(map(re.escape, phrase.split())) for phrase in sorted(phrases, key=len, reverse=True))
+    return re.compile(
+        r"\b(?:"
+        r"(?P<period>(?:last|past)\s+(?P<amount>\d+(?:\.\d+)?\s*)?(?P<unit>second|sec|minute|min|hour|hr|day|week)s?)"
+        r"|(?P<since>since\s+(?P<hour>\d{1,2}):(?P<minute>\d{2})\s*(?P<meridiem>am|pm)?)"
+        r"|(?:p(?P<p>\d{1,2})|(?P<nth>\d{1,2})(?:st|nd|rd|th)?\s+percentile)"
+        rf"|(?P<word>{words})"
+        r")\b"
+    )
+
+
+def _span(label: str, preposition: str = "over") -> str:
+    """Phrase a time range: 'since 10:00' as is, 'last hour' as 'over the last hour'"""
+    return label if label.startswith("since") else f"{preposition} the {label}"
+
+
+class ChatQuery:
+    """What a message asks for"""
+    __slots__ = ("keywords", "network", "metric", "statistic", "period", "since")
+
+    def __init__(self):
+        self.keywords: Set[str] = set()
+        self.network: Optional[str] = None
+        self.metric: Optional[str] = None
+        self.statistic: Optional[str] = None
+        # (seconds, "last 2 hours") and (hour, minute, "since 10:00")
+        self.period: Optional[Tuple[float, str]] = None
+        self.since: Optional[Tuple[int, int, str]] = None
+
+    @property
+    def relative(self) -> bool:
+        # A statistic asked without a range is answered over the last hour
+        return self.period is not None or self.since is not None or self.statistic is not None
+
+
+class ChatEngine:
+    """
+    Answers chat messages for an agent
+
+    Messages are tokenised by one compiled pattern into keywords, a network,
+    a metric, a statistic and a time range, then answered from the metrics
+    tiers and the proposal time index. Responses are cached per normalised
+    message and dropped as soon as the agent's state version changes, so a
+    question repeated between ticks is a dictionary lookup.
+    """
+
+    def __init__(self, agent, cache_size: int = 1024):
+        self.agent = agent
+        self.pattern = compile_pattern(agent.networks)
+        self.vocabulary = {**VOCABULARY, **{network_id: ("network", network_id) for network_id in agent.networks}}
+        self.cache_size = cache_size
+        self._cache: Dict[str, Tuple[str, float]] = {}
+        self._version = None
+
+    def respond(self, message: str) -> str:
+        text = " ".join(message.lower().split())
+        now = self.agent.clock()
+        version = self.agent.state_version()
+        if version != self._version:
+            self._cache.clear()
+            self._version = version
+        else:
+            cached = self._cache.get(text)
+            if cached is not None and now < cached[1]:
+                telemetry.CHAT_RESPONSES.labels("hit").inc()
+                return cached[0]
+
+        query = self.parse(text)
+        response = self.answer(query, now)
+        if len(self._cache) >= self.cache_size:
+            self._cache.clear()
+        self._cache[text] = (response, now + RELATIVE_TTL if query.relative else math.inf)
+        telemetry.CHAT_RESPONSES.labels("miss").inc()
+        return response
+
+    def parse(self, text: str) -> ChatQuery:
+        query = ChatQuery()
+        for match in self.pattern.finditer(text):
+            if match.group("period"):
+                amount = float(match.group("amount") or 1)
+                query.period = (amount * PERIOD_SECONDS[match.group("unit")], match.group("period"))
+            elif match.group("since"):
+                hour, minute = int(match.group("hour")), int(match.group("minute"))
+                meridiem = match.group("meridiem")
+                if meridiem:
+                    hour = hour % 12 + (12 if meridiem == "pm" else 0)
+                if hour < 24 and minute < 60:
+                    query.since = (hour, minute, match.group("since"))
+            elif match.group("p") or match.group("nth"):
+                query.statistic = f"p{int(match.group('p') or match.group('nth'))}"
+            else:
+                kind, value = self.vocabulary[" ".join(match.group("word").split())]
+                if kind == "keyword":
+                    query.keywords.add(value)
+                elif kind == "network":
+                    query.network = query.network or value
+                elif kind == "metric":
+                    query.metric = query.metric or value
+                else:
+                    query.statistic = query.statistic or value
+        return query
+
+    def answer(self, query: ChatQuery, now: float) -> str:
+        agent = self.agent
+        network = agent.networks[query.network] if query.network else agent.default_network
+        keywords = query.keywords
+
+        if "help" in keywords:
+            return HELP
+        if "networks" in keywords and len(agent.networks) > 1 and query.network is None:
+            return f"Monitoring {len(agent.networks)} networks: {', '.join(agent.networks)}"
+        if "status" in keywords:
+            return f"Active. Monitored {network.metrics_history.total_count} metrics, {len(network.proposals)} proposals."
+        if "proposals" in keywords:
+            return self._proposals(network, query, now)
+        if query.metric or query.statistic:
+            return self._metric(network, query, now)
+        if "metrics" in keywords:
+            start, label = self._range(query, now)
+            if start is not None:
+                return self._describe_period(network, start, label)
+            latest = network.metrics_history.latest()
+            if latest:
+                return f"Gas={latest.gas_price:.1f} Gwei, TPS={latest.tps}, Congestion={latest.congestion_level:.1%}"
+            return "No metrics yet."
+        return HELP
+
+    @staticmethod
+    def _range(query: ChatQuery, now: float) -> Tuple[Optional[float], Optional[str]]:
+        if query.period:
+            seconds, label = query.period
+            return now - seconds, label
+        if query.since:
+            hour, minute, label = query.since
+            # The most recent occurrence of that wall-clock time
+            current = datetime.fromtimestamp(now)
+            start = current.replace(hour=hour, minute=minute, second=0, microsecond=0)
+            if start > current:
+                start -= timedelta(days=1)
+            return start.timestamp(), label
+        return None, None
+
+    def _proposals(self, network: "MonitoredNetwork", query: ChatQuery, now: float) -> str:
+        proposals = network.proposals
+        start, label = self._range(query, now)
+        if start is None:
+            if proposals:
+                latest = proposals.latest()
+                return f"Latest: {latest.reasoning} (Confidence: {latest.confidence_score:.2%})"
+            return "No proposals yet."
+
+        count = proposals.count_since(start)
+        if not count:
+            return f"No proposals {_span(label, 'in')}."
+        latest = proposals.latest()
+        return (f"{count} proposal{'s' if count != 1 else ''} {_span(label, 'in')}. "
+                f"Latest: {latest.reasoning} (Confidence: {latest.confidence_score:.2%})")
+
+    def _metric(self, network: "MonitoredNetwork", query: ChatQuery, now: float) -> str:
+        metric = query.metric or "gas_price"
+        name, value_format = METRIC_FORMATS[metric]
+        start, label = self._range(query, now)
+        if start is None:
+            if query.statistic is None:
+                latest = network.metrics_history.latest()
+                if latest is None:
+                    return "No metrics yet."
+                return f"Current {name}: {value_format.format(getattr(latest, metric))}"
+            start, label = now - 3600, "last hour"
+
+        tier, columns = network.metrics_history.query(start, points=True)
+        if tier == "raw":
+            values = columns[metric]
+            samples = len(values)
+        else:
+            samples = int(columns["count"].sum())
+        if not samples:
+            return f"No metrics {_span(label, 'in')}."
+        source = "raw samples" if tier == "raw" else f"{tier} rollups"
+        suffix = f"({samples} samples, {source})"
+
+        statistics = [query.statistic] if query.statistic else ["mean", "p95", "min", "max"]
+        results = []
+        for statistic in statistics:
+            if tier == "raw":
+                value = self._raw_statistic(values, statistic)
+            elif statistic in ("min", "max", "mean", "p95"):
+                value = summarize_rows(columns, (metric,))[metric][statistic]
+            else:
+                return (f"Only p95 is kept beyond the raw window, and {_span(label)} is answered "
+                        f"from {tier} rollups. Try 'p95 {name} {_span(label)}'.")
+            results.append(f"{statistic} {value_format.format(value)}")
+
+        if query.statistic:
+            return f"{query.statistic.capitalize()} {name} {_span(label)}: {results[0].split(' ', 1)[1]} {suffix}"
+        return f"{name.capitalize()} {_span(label)}: {', '.join(results)} {suffix}"
+
+    @staticmethod
+    def _raw_statistic(values: np.ndarray, statistic: str) -> float:
+        if statistic == "min":
+            return float(values.min())
+        if statistic == "max":
+            return float(values.max())
+        if statistic == "mean":
+            return float(values.mean())
+        return float(np.percentile(values, int(statistic[1:])))
+
+    def _describe_period(self, network: "MonitoredNetwork", start: float, label: str) -> str:
+        """Summarise a period from the finest history tier that still covers it"""
+        summary = network.metrics_history.summary(start)
+        if not summary["samples"]:
+            return f"No metrics {_span(label, 'in')}."
+        gas, tps, congestion = (summary["fields"][name] for name in ("gas_price", "tps", "congestion_level"))
+        source = "raw samples" if summary["tier"] == "raw" else f"{summary['tier']} rollups"
+        return (f"{label.capitalize()} ({summary['samples']} samples, {source}): "
+                f"Gas mean {gas['mean']:.1f} / p95 {gas['p95']:.1f} / max {gas['max']:.1f} Gwei, "
+                f"TPS mean {tps['mean']:.0f} (min {tps['min']:.0f}), "
+                f"Congestion mean {congestion['mean']:.1%} / p95 {congestion['p95']:.1%}")
@@ -0,0 +1,109 @@
+"""
+Server-sent event fan-out for the Rahu Agent
+Pushes new metrics and proposals to subscribers through bounded per-client buffers
+"""
+
+import asyncio
+import json
+from collections import deque
+from typing import Dict, FrozenSet, Iterable, Optional, Set
+
+from . import telemetry
+
+TOPICS = frozenset({"metrics", "proposals"})
+
+# Comment line sent on idle streams so proxies keep the connection open
+HEARTBEAT = b": keepalive\n\n"
+
+
+def encode_event(event_id: int, topic: str, data, network: Optional[str] = None) -> bytes:
+    """Format one SSE frame (data is a single JSON line, tagged with its network)"""
+    if network is not None:
+        data = {"network": network, **data}
+    return f"id: {event_id}\nevent: {topic}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n".encode()
+
+
+class Subscription:
+    """
+    One client's bounded event buffer
+
+    ``push`` never blocks: when the buffer is full the oldest frame is
+    dropped and counted, so a slow client only loses its own backlog.
+    """
+
+    def __init__(self, topics: FrozenSet[str], buffer_size: int = 256, network: Optional[str] = None):
+        self.topics = topics
+        # None receives events from every network
+        self.network = network
+        self._frames: deque = deque(maxlen=buffer_size)
+        self._ready = asyncio.Event()
+        self.dropped = 0
+        self._reported_dropped = 0
+
+    def push(self, frame: bytes):
+        if len(self._frames) == self._frames.maxlen:
+            self.dropped += 1
+            telemetry.STREAM_EVENTS_DROPPED.inc()
+        self._frames.append(frame)
+        self._ready.set()
+
+    async def next_frame(self, timeout: Optional[float] = None) -> Optional[bytes]:
+        """Next frame to send, or None if nothing arrived within ``timeout``"""
+        if not self._frames:
+            self._ready.clear()
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        if self.dropped != self._reported_dropped:
+            # Tell the client it missed events before handing over the next one
+            missed = self.dropped - self._reported_dropped
+            self._reported_dropped = self.dropped
+            return f"event: dropped\ndata: {json.dumps({'dropped': missed})}\n\n".encode()
+        return self._frames.popleft()
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+
+class EventBroker:
+    """
+    Fans published events out to every subscriber of their topic
+
+    Each event is serialized once and the same frame is appended to every
+    matching subscriber's buffer, so publishing from the monitor loop costs
+    one JSON encode plus one deque append per subscriber.
+    """
+
+    def __init__(self, buffer_size: int = 256):
+        self.buffer_size = buffer_size
+        self.subscribers: Set[Subscription] = set()
+        self._next_id = 1
+        self.published: Dict[str, int] = {topic: 0 for topic in TOPICS}
+
+    def subscribe(self, topics: Iterable[str] = TOPICS, buffer_size: Optional[int] = None,
+                  network: Optional[str] = None) -> Subscription:
+        topics = frozenset(topics)
+        unknown = topics - TOPICS
+        if unknown:
+            raise ValueError(f"Unknown topics: {', '.join(sorted(unknown))}")
+        subscription = Subscription(topics, buffer_size or self.buffer_size, network)
+        self.subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        self.subscribers.discard(subscription)
+
+    def publish(self, topic: str, data: Dict, network: Optional[str] = None):
+        self.published[topic] += 1
+        if not self.subscribers:
+            return
+        frame = encode_event(self._next_id, topic, data, network)
+        self._next_id += 1
+        for subscription in self.subscribers:
+            if topic in subscription.topics and (subscription.network is None or subscription.network == network):
+                subscription.push(frame)
+
+    @property
+    def dropped(self) -> int:
+        return sum(subscription.dropped for subscription in self.subscribers)
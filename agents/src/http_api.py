@@ -0,0 +1,481 @@
+"""
+Asyncio HTTP API for the Rahu Agent
+Serves the agent's REST endpoints on the same event loop as the monitor
+"""
+
+import asyncio
+import json
+import re
+import time
+from http import HTTPStatus
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Pattern, Set, Tuple
+import urllib.parse
+
+from . import telemetry
+from .event_stream import HEARTBEAT, TOPICS
+
+MAX_HEADER_BYTES = 64 * 1024
+MAX_BODY_BYTES = 1024 * 1024
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+STREAM_HEARTBEAT_INTERVAL = 15.0
+RANGE_CHUNK_ROWS = 1000
+
+CORS_HEADERS = {
+    "Access-Control-Allow-Origin": "*",
+    "Access-Control-Allow-Methods": "GET, POST, OPTIONS",
+    "Access-Control-Allow-Headers": "Content-Type",
+}
+
+
+class HTTPError(Exception):
+    """Error that maps directly onto an HTTP error response"""
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class Request:
+    """Parsed HTTP request"""
+    def __init__(self, method: str, target: str, version: str, headers: Dict[str, str], body: bytes = b""):
+        self.method = method
+        self.version = version
+        self.headers = headers
+        self.body = body
+        parsed = urllib.parse.urlsplit(target)
+        self.path = parsed.path
+        self.query = dict(urllib.parse.parse_qsl(parsed.query))
+        # Filled from "{name}" segments of the matched route
+        self.path_params: Dict[str, str] = {}
+
+    @property
+    def keep_alive(self) -> bool:
+        connection = self.headers.get("connection", "").lower()
+        if self.version == "HTTP/1.0":
+            return connection == "keep-alive"
+        return connection != "close"
+
+    def json(self):
+        try:
+            return json.loads(self.body.decode("utf-8"))
+        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            raise HTTPError(400, f"Invalid JSON body: {e}")
+
+
+class Response:
+    """HTTP response with a fully buffered body"""
+    def __init__(self, status: int = 200, body: bytes = b"", content_type: str = "application/json",
+                 headers: Optional[Dict[str, str]] = None):
+        self.status = status
+        self.body = body
+        self.headers = {"Content-Type": content_type, **CORS_HEADERS}
+        if headers:
+            self.headers.update(headers)
+
+    def encode(self, keep_alive: bool) -> bytes:
+        lines = [f"HTTP/1.1 {self.status} {HTTPStatus(self.status).phrase}"]
+        for name, value in self.headers.items():
+            lines.append(f"{name}: {value}")
+        lines.append(f"Content-Length: {len(self.body)}")
+        lines.append("Connection: keep-alive" if keep_alive else "Connection: close")
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + self.body
+
+
+class StreamingResponse(Response):
+    """
+    Response whose body is produced incrementally and sent with chunked encoding
+
+    HTTP/1.0 clients can't parse chunked bodies, so they get the raw body
+    delimited by closing the connection.
+    """
+    def __init__(self, chunks: AsyncIterator[bytes], status: int = 200, content_type: str = "application/json",
+                 headers: Optional[Dict[str, str]] = None, until_disconnect: bool = False):
+        super().__init__(status, b"", content_type, headers)
+        self.chunks = chunks
+        # Open-ended streams (SSE) run until the client disconnects and never reuse the connection
+        self.until_disconnect = until_disconnect
+
+    def encode_head(self, keep_alive: bool, chunked: bool = True) -> bytes:
+        lines = [f"HTTP/1.1 {self.status} {HTTPStatus(self.status).phrase}" if chunked
+                 else f"HTTP/1.0 {self.status} {HTTPStatus(self.status).phrase}"]
+        for name, value in self.headers.items():
+            lines.append(f"{name}: {value}")
+        if chunked:
+            lines.append("Transfer-Encoding: chunked")
+        lines.append("Connection: keep-alive" if keep_alive and chunked else "Connection: close")
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+    @staticmethod
+    def encode_chunk(data: bytes) -> bytes:
+        return f"{len(data):x}\r\n".encode() + data + b"\r\n"
+
+
+def json_response(data, status: int = 200) -> Response:
+    return Response(status, json.dumps(data).encode())
+
+
+Handler = Callable[[Request], Awaitable[Response]]
+
+
+class AgentHTTPServer:
+    """
+    HTTP/1.1 server built on asyncio streams
+
+    Each connection is served by its own task on the agent's event loop, so
+    requests run concurrently, connections are kept alive between requests,
+    and handlers read agent state without any cross-thread access.
+    """
+
+    def __init__(self, agent, host: str = "localhost", port: int = 8001, keep_alive_timeout: float = 15.0):
+        self.agent = agent
+        self.host = host
+        self.port = port
+        self.keep_alive_timeout = keep_alive_timeout
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._connections: Set[asyncio.Task] = set()
+
+        self.routes: Dict[Tuple[str, str], Handler] = {}
+        self.pattern_routes: List[Tuple[str, Pattern, str, Handler]] = []
+        self.add_route("GET", "/health", self.handle_health)
+        self.add_route("GET", "/status", self.handle_status)
+        self.add_route("GET", "/proposals", self.handle_list_proposals)
+        self.add_route("GET", "/proposals/latest", self.handle_latest_proposal)
+        self.add_route("GET", "/proposals/{proposal_id}", self.handle_get_proposal)
+        self.add_route("POST", "/chat", self.handle_chat)
+        self.add_route("GET", "/metrics", self.handle_metrics)
+        self.add_route("GET", "/metrics/history", self.handle_metrics_history)
+        self.add_route("GET", "/metrics/range", self.handle_metrics_range)
+        self.add_route("GET", "/stream", self.handle_stream)
+
+        # Network-scoped variants; the unscoped routes above serve the default network
+        self.add_route("GET", "/networks", self.handle_networks)
+        self.add_route("GET", "/networks/{network}/status", self.handle_status)
+        self.add_route("GET", "/networks/{network}/proposals", self.handle_list_proposals)
+        self.add_route("GET", "/networks/{network}/proposals/latest", self.handle_latest_proposal)
+        self.add_route("GET", "/networks/{network}/proposals/{proposal_id}", self.handle_get_proposal)
+        self.add_route("GET", "/networks/{network}/metrics/history", self.handle_metrics_history)
+        self.add_route("GET", "/networks/{network}/metrics/range", self.handle_metrics_range)
+        self.add_route("GET", "/networks/{network}/stream", self.handle_stream)
+
+    def add_route(self, method: str, path: str, handler: Handler):
+        """Register a handler; ``{name}`` segments match one path segment each"""
+        if "{" not in path:
+            self.routes[(method, path)] = handler
+            return
+        pattern = re.compile("^" + re.sub(r"\{(\w+)\}", r"(?P<\1>[^/]+)", path) + "$")
+        self.pattern_routes.append((method, pattern, path, handler))
+
+    def match(self, request: Request) -> Tuple[Optional[Handler], str]:
+        """Find the handler for a request; exact routes win over patterns"""
+        handler = self.routes.get((request.method, request.path))
+        if handler is not None:
+            return handler, request.path
+        for method, pattern, template, handler in self.pattern_routes:
+            if method == request.method:
+                found = pattern.match(request.path)
+                if found:
+                    request.path_params = {
+                        name: urllib.parse.unquote(value) for name, value in found.groupdict().items()
+                    }
+                    return handler, template
+        return None, request.path
+
+    async def start(self):
+        self._server = await asyncio.start_server(
+            self._handle_connection, self.host, self.port, limit=MAX_HEADER_BYTES
+        )
+        # Resolve the real port when bound to port 0
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        for task in list(self._connections):
+            task.cancel()
+        if self._connections:
+            await asyncio.gather(*self._connections, return_exceptions=True)
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        task = asyncio.current_task()
+        self._connections.add(task)
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(self._read_request(reader), self.keep_alive_timeout)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except HTTPError as e:
+                    writer.write(json_response({"error": e.message}, e.status).encode(keep_alive=False))
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+
+                response = await self.dispatch(request)
+                keep_alive = request.keep_alive
+                if isinstance(response, StreamingResponse):
+                    # Without chunked encoding the end of the body is the end of the connection
+                    chunked = request.version != "HTTP/1.0"
+                    keep_alive = keep_alive and chunked and not response.until_disconnect
+                    await self._write_stream(reader, writer, response, keep_alive, chunked)
+                else:
+                    writer.write(response.encode(keep_alive))
+                    await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.CancelledError):
+            # Connection tasks are owned by the server and cancelled on close()
+            pass
+        finally:
+            self._connections.discard(task)
+            writer.close()
+
+    async def _write_stream(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                            response: StreamingResponse, keep_alive: bool, chunked: bool = True):
+        """Send a streaming body chunk by chunk; drain() applies per-client backpressure"""
+        async def pump():
+            async for data in response.chunks:
+                if data:
+                    writer.write(response.encode_chunk(data) if chunked else data)
+                    await writer.drain()
+            if chunked:
+                writer.write(b"0\r\n\r\n")
+                await writer.drain()
+
+        writer.write(response.encode_head(keep_alive, chunked))
+        if not response.until_disconnect:
+            try:
+                await pump()
+            finally:
+                await response.chunks.aclose()
+            return
+
+        # Open-ended streams stop as soon as the client hangs up, even while idle
+        pump_task = asyncio.ensure_future(pump())
+        hangup_task = asyncio.ensure_future(reader.read(1))
+        try:
+            await asyncio.wait({pump_task, hangup_task}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in (pump_task, hangup_task):
+                task.cancel()
+            await asyncio.gather(pump_task, hangup_task, return_exceptions=True)
+            await response.chunks.aclose()
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[Request]:
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError as e:
+            if not e.partial:
+                return None
+            raise
+        except asyncio.LimitOverrunError:
+            raise HTTPError(431, "Request headers too large")
+
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, version = lines[0].split(" ", 2)
+        except ValueError:
+            raise HTTPError(400, "Malformed request line")
+
+        headers = {}
+        for line in lines[1:]:
+            if line:
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get("content-length", "0") or 0)
+        except ValueError:
+            raise HTTPError(400, "Invalid Content-Length")
+        if length < 0 or length > MAX_BODY_BYTES:
+            raise HTTPError(413, "Request body too large")
+        body = await reader.readexactly(length) if length else b""
+        return Request(method, target, version, headers, body)
+
+    async def dispatch(self, request: Request) -> Response:
+        if request.method == "OPTIONS":
+            return Response(204)
+        handler, route = self.match(request)
+        if handler is None:
+            telemetry.HTTP_REQUESTS.labels(request.method, "unmatched", "404").inc()
+            return json_response({"error": "Not found"}, 404)
+        started = time.perf_counter()
+        try:
+            response = await handler(request)
+        except HTTPError as e:
+            response = json_response({"error": e.message}, e.status)
+        except Exception as e:
+            response = json_response({"error": str(e)}, 500)
+        telemetry.HTTP_SECONDS.labels(request.method, route).observe(time.perf_counter() - started)
+        telemetry.HTTP_REQUESTS.labels(request.method, route, response.status).inc()
+        return response
+
+    def _network(self, request: Request):
+        """Network named in the path, or the default network for unscoped routes"""
+        network_id = request.path_params.get("network")
+        if network_id is None:
+            return self.agent.default_network
+        network = self.agent.networks.get(network_id)
+        if network is None:
+            raise HTTPError(404, f"Unknown network: {network_id}")
+        return network
+
+    # Route handlers
+
+    async def handle_health(self, request: Request) -> Response:
+        return json_response({
+            "status": "healthy",
+            "agent_address": self.agent.agent_address,
+            "timestamp": int(time.time())
+        })
+
+    async def handle_status(self, request: Request) -> Response:
+        network = self._network(request)
+        status = {
+            "status": "active" if self.agent.is_running else "inactive",
+            "network": network.network_id,
+            "networks": list(self.agent.networks),
+            "metrics_count": network.metrics_history.total_count,
+            "metrics_retained": len(network.metrics_history),
+            "proposals_count": len(network.proposals),
+            "last_check": int(time.time()),
+            "agent_address": self.agent.agent_address,
+            "monitoring_interval": network.scheduler.effective_interval,
+            "scheduler": network.scheduler.to_dict()
+        }
+        if network.collector:
+            status["sources"] = network.collector.source_stats()
+        if self.agent.submitter:
+            status["submissions"] = self.agent.submitter.stats()
+        return json_response(status)
+
+    async def handle_networks(self, request: Request) -> Response:
+        return json_response({
+            "networks": [network.summary() for network in self.agent.networks.values()]
+        })
+
+    async def handle_latest_proposal(self, request: Request) -> Response:
+        proposals = self._network(request).proposals
+        if proposals:
+            latest = proposals.latest()
+            return json_response({
+                "proposal_id": latest.proposal_id,
+                "reasoning": latest.reasoning,
+                "confidence_score": latest.confidence_score,
+                "timestamp": latest.timestamp
+            })
+        return json_response({"error": "No proposals yet"})
+
+    async def handle_get_proposal(self, request: Request) -> Response:
+        proposal = self._network(request).proposals.get(request.path_params["proposal_id"])
+        if proposal is None:
+            raise HTTPError(404, "Proposal not found")
+        return json_response(proposal.to_dict())
+
+    async def handle_list_proposals(self, request: Request) -> Response:
+        proposals = self._network(request).proposals
+        try:
+            since = float(request.query["since"]) if "since" in request.query else None
+            limit = int(request.query.get("limit", DEFAULT_PAGE_SIZE))
+            if not 0 < limit <= MAX_PAGE_SIZE:
+                raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+            page, next_cursor = proposals.list(
+                since=since, limit=limit, cursor=request.query.get("cursor")
+            )
+        except ValueError as e:
+            raise HTTPError(400, str(e))
+        return json_response({
+            "proposals": [proposal.to_dict() for proposal in page],
+            "next_cursor": next_cursor,
+            "total": len(proposals)
+        })
+
+    async def handle_metrics(self, request: Request) -> Response:
+        return Response(200, telemetry.REGISTRY.render().encode(), telemetry.CONTENT_TYPE)
+
+    async def handle_metrics_history(self, request: Request) -> Response:
+        """Metrics history (?since=&until=, default: the last hour) from the finest tier covering it"""
+        network = self._network(request)
+        try:
+            since = float(request.query["since"]) if "since" in request.query else self.agent.clock() - 3600
+            until = float(request.query["until"]) if "until" in request.query else None
+        except ValueError as e:
+            raise HTTPError(400, str(e))
+        tier, columns = network.metrics_history.query(since, until)
+        return json_response({
+            "network": network.network_id,
+            "tier": tier,
+            "columns": {name: values.tolist() for name, values in columns.items()}
+        })
+
+    async def handle_metrics_range(self, request: Request) -> Response:
+        """Metrics between ?from= and ?to= in ?step= second buckets (?agg=mean,p95&fields=gas_price), streamed"""
+        network = self._network(request)
+        query = request.query
+        try:
+            end = float(query["to"]) if "to" in query else self.agent.clock()
+            start = float(query["from"]) if "from" in query else end - 3600
+            step = float(query["step"]) if "step" in query else None
+            statistics = [name for name in query.get("agg", "mean").split(",") if name]
+            fields = [name for name in query["fields"].split(",") if name] if "fields" in query else None
+            if not start < end:
+                raise ValueError("from must be before to")
+            tier, columns = network.metrics_history.aggregate(
+                start, end, step, statistics, **({"fields": fields} if fields else {})
+            )
+        except ValueError as e:
+            raise HTTPError(400, str(e))
+        head = {"network": network.network_id, "tier": tier, "from": start, "to": end, "step": step}
+        return StreamingResponse(self._stream_rows(head, columns))
+
+    async def _stream_rows(self, head: Dict, columns: Dict) -> AsyncIterator[bytes]:
+        """One JSON document, {...head, "columns": [...], "rows": [[...], ...]}, sent RANGE_CHUNK_ROWS rows at a time"""
+        names = list(columns)
+        yield (json.dumps({**head, "columns": names})[:-1] + ', "rows": [').encode()
+        for offset in range(0, len(columns["timestamp"]), RANGE_CHUNK_ROWS):
+            rows = zip(*(columns[name][offset:offset + RANGE_CHUNK_ROWS].tolist() for name in names))
+            yield ((", " if offset else "") + json.dumps(list(rows))[1:-1]).encode()
+            # Let the monitor run between chunks of a large response
+            await asyncio.sleep(0)
+        yield b"]}"
+
+    async def handle_stream(self, request: Request) -> Response:
+        """Server-sent events for new metrics and proposals (?topics=metrics,proposals)"""
+        topics = [topic for topic in request.query.get("topics", ",".join(TOPICS)).split(",") if topic]
+        # Unscoped /stream carries every network; events are tagged with their network id
+        network_id = self._network(request).network_id if "network" in request.path_params else None
+        try:
+            subscription = self.agent.events.subscribe(topics, network=network_id)
+        except ValueError as e:
+            raise HTTPError(400, str(e))
+        return StreamingResponse(
+            self._stream_events(subscription),
+            content_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+            until_disconnect=True
+        )
+
+    async def _stream_events(self, subscription) -> AsyncIterator[bytes]:
+        telemetry.STREAM_SUBSCRIBERS.set(len(self.agent.events.subscribers))
+        try:
+            # Opening comment flushes headers through proxies straight away
+            yield b": connected\n\n"
+            while True:
+                frame = await subscription.next_frame(timeout=STREAM_HEARTBEAT_INTERVAL)
+                yield frame if frame is not None else HEARTBEAT
+        finally:
+            self.agent.events.unsubscribe(subscription)
+            telemetry.STREAM_SUBSCRIBERS.set(len(self.agent.events.subscribers))
+
+    async def handle_chat(self, request: Request) -> Response:
+        data = request.json()
+        message = data.get("message", "") if isinstance(data, dict) else ""
+        response_text = await self.agent.process_chat_message(message)
+        return json_response({
+            "response": response_text,
+            "agent_address": self.agent.agent_address,
+            "timestamp": int(time.time())
+        })
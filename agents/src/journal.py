@@ -0,0 +1,325 @@
+"""
+Append-only on-disk journal for Rahu Agent state
+Persists metrics samples and proposals so a restarted agent resumes its history
+"""
+
+import asyncio
+import json
+import mmap
+import os
+import struct
+import threading
+import zipfile
+import zlib
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+from .metrics_rollups import MetricsRollups
+from .metrics_store import METRIC_FIELDS, METRIC_DTYPES, INTEGER_FIELDS
+
+METRICS_MAGIC = b"RAHUMJ01"
+PROPOSALS_MAGIC = b"RAHUPJ01"
+HEADER_SIZE = 8
+
+# Metrics are fixed-size little-endian records, so replay is a single frombuffer
+METRIC_RECORD = np.dtype([(name, "<i8" if METRIC_DTYPES[name] is np.int64 else "<f8") for name in METRIC_FIELDS])
+METRIC_STRUCT = struct.Struct("<" + "".join("q" if METRIC_DTYPES[name] is np.int64 else "d" for name in METRIC_FIELDS))
+
+# Proposals are variable-length JSON framed by (length, crc32)
+PROPOSAL_FRAME = struct.Struct("<II")
+
+
+class JournalError(Exception):
+    """Raised when a journal file is not in the expected format"""
+    pass
+
+
+class AgentJournal:
+    """
+    Binary append-only journal for metrics and proposals
+
+    Records are buffered in memory by the monitor loop and written in batches,
+    each followed by a single fsync, on a worker thread. One batch is written
+    at a time, including the final one from ``close``. Replay memory-maps
+    the files. Metrics are compacted down to the retention size once the file
+    grows past twice that.
+
+    With ``rollups``, a snapshot of them is written before every metrics
+    compaction and on close, so the long history outlives the samples the
+    journal drops; replay restores the snapshot and folds in only the
+    samples journaled after it.
+    """
+
+    def __init__(self, directory: str, flush_interval: float = 1.0,
+                 metrics_retention: int = 10000, proposals_retention: int = 10000,
+                 rollups: Optional[MetricsRollups] = None):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.metrics_retention = metrics_retention
+        self.proposals_retention = proposals_retention
+        self.rollups = rollups
+        self.metrics_path = os.path.join(directory, "metrics.journal")
+        self.proposals_path = os.path.join(directory, "proposals.journal")
+        self.rollups_path = os.path.join(directory, "rollups.snapshot")
+
+        self._pending_metrics = bytearray()
+        self._pending_proposals = bytearray()
+        self._metrics_file = None
+        self._proposals_file = None
+        self._metrics_records = 0
+        self._proposal_records = 0
+        # Writes, compaction and close never overlap; a cancelled flush leaves its write running
+        self._write_lock = threading.RLock()
+        self._writing: Optional[asyncio.Future] = None
+
+    # Opening and replay
+
+    def open(self):
+        """Open (creating if needed) both journal files for appending"""
+        os.makedirs(self.directory, exist_ok=True)
+        self._metrics_records = self._prepare(self.metrics_path, METRICS_MAGIC, self._scan_metrics)
+        self._proposal_records = self._prepare(self.proposals_path, PROPOSALS_MAGIC, self._scan_proposals)
+        self._metrics_file = open(self.metrics_path, "ab")
+        self._proposals_file = open(self.proposals_path, "ab")
+        self._compact_if_needed()
+
+    def _prepare(self, path: str, magic: bytes, scan) -> int:
+        """Write a header to new files and cut off any torn trailing record"""
+        if not os.path.exists(path) or os.path.getsize(path) < HEADER_SIZE:
+            with open(path, "wb") as f:
+                f.write(magic)
+                f.flush()
+                os.fsync(f.fileno())
+            return 0
+
+        records, valid_size = scan(path)
+        if valid_size < os.path.getsize(path):
+            with open(path, "r+b") as f:
+                f.truncate(valid_size)
+        return records
+
+    def _check_magic(self, buffer, magic: bytes, path: str):
+        if buffer[:HEADER_SIZE] != magic:
+            raise JournalError(f"Not a Rahu journal file: {path}")
+
+    def _scan_metrics(self, path: str) -> Tuple[int, int]:
+        with open(path, "rb") as f:
+            self._check_magic(f.read(HEADER_SIZE), METRICS_MAGIC, path)
+        records = (os.path.getsize(path) - HEADER_SIZE) // METRIC_RECORD.itemsize
+        return records, HEADER_SIZE + records * METRIC_RECORD.itemsize
+
+    def _scan_proposals(self, path: str) -> Tuple[int, int]:
+        records = 0
+        valid_size = HEADER_SIZE
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            self._check_magic(mm, PROPOSALS_MAGIC, path)
+            for valid_size, _ in self._iter_proposal_frames(mm):
+                records += 1
+        return records, valid_size
+
+    @staticmethod
+    def _iter_proposal_frames(mm):
+        """Yield (end offset, payload) for every intact proposal frame"""
+        offset = HEADER_SIZE
+        size = len(mm)
+        while offset + PROPOSAL_FRAME.size <= size:
+            length, crc = PROPOSAL_FRAME.unpack_from(mm, offset)
+            start = offset + PROPOSAL_FRAME.size
+            end = start + length
+            if end > size:
+                break
+            payload = mm[start:end]
+            if zlib.crc32(payload) != crc:
+                break
+            offset = end
+            yield offset, payload
+
+    def replay_metrics(self, last: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Columns for the newest ``last`` journaled samples (all when None)"""
+        if not os.path.exists(self.metrics_path):
+            return {name: np.empty(0, dtype=METRIC_DTYPES[name]) for name in METRIC_FIELDS}
+
+        records, _ = self._scan_metrics(self.metrics_path)
+        count = records if last is None else min(last, records)
+        if count == 0:
+            return {name: np.empty(0, dtype=METRIC_DTYPES[name]) for name in METRIC_FIELDS}
+
+        with open(self.metrics_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            offset = HEADER_SIZE + (records - count) * METRIC_RECORD.itemsize
+            view = np.frombuffer(mm, dtype=METRIC_RECORD, count=count, offset=offset)
+            # Copy out before the map is closed; the view must not outlive it
+            columns = {name: view[name].astype(METRIC_DTYPES[name]) for name in METRIC_FIELDS}
+            del view
+        return columns
+
+    def restore_rollups(self) -> Optional[float]:
+        """
+        Load the rollup snapshot into ``rollups``
+
+        Returns the newest timestamp the snapshot covers, or None when there
+        is no usable snapshot (missing, unreadable or of another layout).
+        """
+        if self.rollups is None or not os.path.exists(self.rollups_path):
+            return None
+        try:
+            with np.load(self.rollups_path, allow_pickle=False) as data:
+                snapshot = {name: data[name] for name in data.files}
+            if not self.rollups.restore(snapshot):
+                return None
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+            return None
+        return self.rollups.last_timestamp
+
+    def replay_proposals(self, last: Optional[int] = None) -> List[Dict]:
+        """Decoded proposal records, oldest first"""
+        if not os.path.exists(self.proposals_path) or os.path.getsize(self.proposals_path) <= HEADER_SIZE:
+            return []
+        with open(self.proposals_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            self._check_magic(mm, PROPOSALS_MAGIC, self.proposals_path)
+            payloads = [payload for _, payload in self._iter_proposal_frames(mm)]
+        if last is not None:
+            payloads = payloads[-last:] if last else []
+        return [json.loads(payload) for payload in payloads]
+
+    # Recording (called from the monitor loop; never touches the disk)
+
+    def record_metrics(self, metrics):
+        self._pending_metrics += METRIC_STRUCT.pack(*(
+            int(getattr(metrics, name)) if name in INTEGER_FIELDS else float(getattr(metrics, name))
+            for name in METRIC_FIELDS
+        ))
+
+    def record_proposal(self, proposal: Dict):
+        payload = json.dumps(proposal, separators=(",", ":")).encode()
+        self._pending_proposals += PROPOSAL_FRAME.pack(len(payload), zlib.crc32(payload)) + payload
+
+    @property
+    def pending_bytes(self) -> int:
+        return len(self._pending_metrics) + len(self._pending_proposals)
+
+    # Flushing
+
+    async def flush(self):
+        """Write the pending batch and fsync on a worker thread"""
+        # Batches go out in order, and the record count below must include the previous one
+        await self._wait_for_write()
+        if not self.pending_bytes or self._metrics_file is None:
+            return
+        metrics, self._pending_metrics = self._pending_metrics, bytearray()
+        proposals, self._pending_proposals = self._pending_proposals, bytearray()
+        # Taken on the loop, so it covers exactly the samples journaled up to this batch
+        records = self._metrics_records + len(metrics) // METRIC_RECORD.itemsize
+        snapshot = None
+        if self.rollups is not None and records > 2 * self.metrics_retention:
+            snapshot = self.rollups.snapshot()
+        loop = asyncio.get_running_loop()
+        self._writing = loop.run_in_executor(None, self._write_batch, bytes(metrics), bytes(proposals), snapshot)
+        await asyncio.shield(self._writing)
+
+    async def _wait_for_write(self):
+        """Wait out a write left running by a cancelled flush"""
+        if self._writing is not None and not self._writing.done():
+            await asyncio.shield(self._writing)
+
+    def _write_batch(self, metrics: bytes, proposals: bytes, snapshot: Optional[Dict[str, np.ndarray]] = None):
+        with self._write_lock:
+            if self._metrics_file is None:
+                raise JournalError("Journal closed before the batch was written")
+            if metrics:
+                self._metrics_file.write(metrics)
+                self._metrics_file.flush()
+                os.fsync(self._metrics_file.fileno())
+                self._metrics_records += len(metrics) // METRIC_RECORD.itemsize
+            if proposals:
+                self._proposals_file.write(proposals)
+                self._proposals_file.flush()
+                os.fsync(self._proposals_file.fileno())
+                self._proposal_records += self._count_frames(proposals)
+            if snapshot is not None:
+                self._write_snapshot(snapshot)
+            self._compact_if_needed(snapshot is not None)
+
+    def _write_snapshot(self, snapshot: Dict[str, np.ndarray]):
+        """Atomically replace the rollup snapshot"""
+        tmp_path = self.rollups_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **snapshot)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.rollups_path)
+
+    @staticmethod
+    def _count_frames(data: bytes) -> int:
+        count = offset = 0
+        while offset < len(data):
+            length, _ = PROPOSAL_FRAME.unpack_from(data, offset)
+            offset += PROPOSAL_FRAME.size + length
+            count += 1
+        return count
+
+    async def run_flusher(self):
+        """Periodically flush pending records until cancelled"""
+        try:
+            while True:
+                await asyncio.sleep(self.flush_interval)
+                await self.flush()
+        except asyncio.CancelledError:
+            await self.flush()
+            raise
+
+    def close(self):
+        """Synchronously flush anything pending and close the files
+
+        Call it after the flusher has finished; a batch still being written
+        is waited for, since the write lock is held until it completes.
+        """
+        with self._write_lock:
+            if self._metrics_file is None:
+                return
+            snapshot = self.rollups.snapshot() if self.rollups is not None else None
+            self._write_batch(bytes(self._pending_metrics), bytes(self._pending_proposals), snapshot)
+            self._pending_metrics = bytearray()
+            self._pending_proposals = bytearray()
+            self._metrics_file.close()
+            self._proposals_file.close()
+            self._metrics_file = self._proposals_file = None
+
+    # Compaction
+
+    def _compact_if_needed(self, snapshotted: bool = False):
+        # With rollups, samples are only dropped right after a snapshot that covers them
+        if self._metrics_records > 2 * self.metrics_retention and (self.rollups is None or snapshotted):
+            self.compact_metrics()
+        if self._proposal_records > 2 * self.proposals_retention:
+            self.compact_proposals()
+
+    def compact_metrics(self):
+        """Rewrite the metrics journal keeping only the newest retained samples"""
+        columns = self.replay_metrics(self.metrics_retention)
+        records = np.empty(len(columns["timestamp"]), dtype=METRIC_RECORD)
+        for name in METRIC_FIELDS:
+            records[name] = columns[name]
+        self._metrics_file = self._rewrite(self.metrics_path, self._metrics_file, METRICS_MAGIC, records.tobytes())
+        self._metrics_records = len(records)
+
+    def compact_proposals(self):
+        """Rewrite the proposal journal keeping only the newest retained proposals"""
+        kept = bytearray()
+        proposals = self.replay_proposals(self.proposals_retention)
+        for proposal in proposals:
+            payload = json.dumps(proposal, separators=(",", ":")).encode()
+            kept += PROPOSAL_FRAME.pack(len(payload), zlib.crc32(payload)) + payload
+        self._proposals_file = self._rewrite(self.proposals_path, self._proposals_file, PROPOSALS_MAGIC, bytes(kept))
+        self._proposal_records = len(proposals)
+
+    def _rewrite(self, path: str, handle, magic: bytes, body: bytes):
+        """Atomically replace a journal file and return a fresh append handle"""
+        tmp_path = path + ".compact"
+        with open(tmp_path, "wb") as f:
+            f.write(magic + body)
+            f.flush()
+            os.fsync(f.fileno())
+        if handle is not None:
+            handle.close()
+        os.replace(tmp_path, path)
+        return open(path, "ab")
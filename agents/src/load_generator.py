@@ -0,0 +1,464 @@
+"""
+Synthetic L2 load generator and stress harness for the Rahu Agent
+Drives the real monitor loop from a scripted stand-in JSON-RPC node while clients load the HTTP API
+"""
+
+import asyncio
+import json
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+import numpy as np
+
+from . import rahu_agent, telemetry
+from .benchmark import CHAT_MESSAGES, HTTP_ENDPOINTS, HttpClient
+from .event_stream import TOPICS, Subscription
+from .http_api import AgentHTTPServer
+from .metrics_sources import WEI_PER_GWEI, L2RpcSource, MetricsCollector
+from .network_monitor import DEFAULT_PARAMS
+from .scheduler import AdaptiveScheduler
+
+# Gas price of an idle chain, in gwei; it grows exponentially with utilisation
+BASE_GAS_PRICE = 20.0
+GAS_PRICE_SLOPE = 2.0
+
+# Relative noise on demand and gas price from block to block
+DEMAND_NOISE = 0.05
+GAS_NOISE = 0.05
+
+GENESIS_TIMESTAMP = 1_700_000_000
+
+# Questions the chat clients cycle through, parameterized ones defeat the response cache
+CHAT_QUESTIONS = CHAT_MESSAGES + [
+    "p95 gas over the last minute",
+    "max tps in the past 10 minutes",
+    "proposals in the last 5 minutes",
+]
+
+# Endpoints the HTTP clients cycle through (chat has its own clients)
+API_ENDPOINTS = {name: request for name, request in HTTP_ENDPOINTS.items() if name != "http_chat"}
+
+
+class Phase:
+    """
+    One stretch of a scenario
+
+    ``share`` is the phase's fraction of the run. ``demand`` and
+    ``capacity`` are fractions of the chain's baseline throughput
+    (``max_tps``); ``gas`` and ``block_time`` multiply the baseline gas
+    price and block time.
+    """
+
+    def __init__(self, name: str, share: float, demand: float, capacity: float = 1.0,
+                 gas: float = 1.0, block_time: float = 1.0):
+        self.name = name
+        self.share = share
+        self.demand = demand
+        self.capacity = capacity
+        self.gas = gas
+        self.block_time = block_time
+
+
+SCENARIOS: Dict[str, Sequence[Phase]] = {
+    "steady": (Phase("steady", 1.0, demand=0.5),),
+    "congestion": (
+        Phase("calm", 0.3, demand=0.5),
+        Phase("congested", 0.4, demand=1.3),
+        Phase("recovery", 0.3, demand=0.6),
+    ),
+    "gas_spike": (
+        Phase("calm", 0.4, demand=0.6),
+        Phase("gas_spike", 0.2, demand=0.9, gas=8.0),
+        Phase("calm", 0.4, demand=0.6),
+    ),
+    "throughput_collapse": (
+        Phase("normal", 0.35, demand=0.7),
+        Phase("collapse", 0.3, demand=0.7, capacity=0.25, block_time=1.5),
+        Phase("recovery", 0.35, demand=0.7),
+    ),
+}
+# Every scripted event back to back
+SCENARIOS["mixed"] = tuple(
+    Phase(phase.name, phase.share / 3, phase.demand, phase.capacity, phase.gas, phase.block_time)
+    for name in ("congestion", "gas_spike", "throughput_collapse") for phase in SCENARIOS[name]
+)
+
+
+class SimulatedChain:
+    """
+    Every block of a scenario, generated up front as columns
+
+    Block ``i`` lies at position ``i / blocks`` through the scenario.
+    Utilisation is demand over capacity (capped at 1, with noise), gas used
+    and transaction count follow from it, and gas price grows exponentially
+    with it. The same scenario, size and seed always produce the same chain.
+    """
+
+    def __init__(self, phases: Sequence[Phase], blocks: int, seed: int = 0, params: Optional[Dict] = None):
+        params = params or DEFAULT_PARAMS
+        rng = np.random.default_rng(seed)
+        self.phases = list(phases)
+        self.gas_limit = int(params["gas_limit"])
+
+        shares = np.cumsum([phase.share for phase in self.phases])
+        position = np.arange(blocks) / blocks * shares[-1]
+        self.phase = np.minimum(np.searchsorted(shares, position, side="right"), len(self.phases) - 1)
+
+        def column(attribute: str) -> np.ndarray:
+            return np.array([getattr(phase, attribute) for phase in self.phases])[self.phase]
+
+        capacity = column("capacity") * float(params["max_tps"])
+        demand = column("demand") * float(params["max_tps"]) * rng.normal(1.0, DEMAND_NOISE, blocks)
+        self.utilisation = np.clip(demand / capacity, 0.0, 1.0)
+        block_time = column("block_time") * float(params["block_time"])
+
+        self.timestamp = GENESIS_TIMESTAMP + np.floor(np.cumsum(block_time)).astype(np.int64)
+        self.gas_used = (self.utilisation * self.gas_limit).astype(np.int64)
+        self.tx_count = np.round(self.utilisation * capacity * block_time).astype(np.int64)
+        gas_price = BASE_GAS_PRICE * column("gas") * np.exp(GAS_PRICE_SLOPE * self.utilisation)
+        self.gas_price_wei = (gas_price * rng.lognormal(0.0, GAS_NOISE, blocks) * WEI_PER_GWEI).astype(np.int64)
+
+    def __len__(self) -> int:
+        return len(self.timestamp)
+
+    def block(self, index: int, number: int) -> str:
+        """``eth_getBlockByNumber`` result as JSON (short placeholder transaction hashes)"""
+        transactions = ('"0x0",' * int(self.tx_count[index]))[:-1]
+        return (
+            f'{{"number":"{hex(number)}","timestamp":"{hex(int(self.timestamp[index]))}",'
+            f'"gasUsed":"{hex(int(self.gas_used[index]))}","gasLimit":"{hex(self.gas_limit)}",'
+            f'"transactions":[{transactions}]}}'
+        )
+
+
+class SimulatedL2Node:
+    """
+    Stand-in L2 JSON-RPC node that plays a SimulatedChain back in real time
+
+    After ``begin`` the node produces ``block_rate`` blocks per second and
+    every request sees the latest one, so a client polling slower than the
+    chain skips blocks, as it would on a live network. The node runs its own
+    event loop on a background thread, so its requests never queue behind
+    the agent's tasks, and records which blocks were served. Block
+    production follows ``clock`` (seconds, perf_counter by default), which
+    tests can replace to freeze or step time.
+    """
+
+    first_block = 1_000_000
+
+    def __init__(self, chain: SimulatedChain, block_rate: float, host: str = "127.0.0.1", port: int = 0,
+                 clock: Callable[[], float] = time.perf_counter):
+        self.chain = chain
+        self.block_rate = block_rate
+        self.clock = clock
+        self.host = host
+        self.port = port
+        self.served = np.zeros(len(chain), dtype=bool)
+        self.last_served = -1
+        self.requests = 0
+        self.started: Optional[float] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}/"
+
+    def begin(self):
+        """Start producing blocks; until then the first block is the latest"""
+        self.started = self.clock()
+
+    def produced(self) -> int:
+        """Blocks produced so far"""
+        if self.started is None:
+            return 1
+        return min(int((self.clock() - self.started) * self.block_rate) + 1, len(self.chain))
+
+    def produced_at(self, index: int) -> float:
+        """``clock`` time at which block ``index`` was produced"""
+        return (self.started or 0.0) + index / self.block_rate
+
+    async def handle(self, request):
+        from aiohttp import web
+        body = json.loads(await request.read())
+        self.requests += 1
+        index = self.produced() - 1
+        method = body.get("method")
+        if method == "eth_gasPrice":
+            result = f'"{hex(int(self.chain.gas_price_wei[index]))}"'
+        elif method == "eth_blockNumber":
+            result = f'"{hex(self.first_block + index)}"'
+        elif method == "eth_getBlockByNumber":
+            result = self.chain.block(index, self.first_block + index)
+            self.served[index] = True
+            self.last_served = index
+        else:
+            error = {"code": -32601, "message": f"Method not found: {method}"}
+            return web.json_response({"jsonrpc": "2.0", "id": body.get("id"), "error": error})
+        text = f'{{"jsonrpc":"2.0","id":{json.dumps(body.get("id"))},"result":{result}}}'
+        return web.Response(text=text, content_type="application/json")
+
+    def start(self):
+        """Serve on a background thread; returns once the node is listening"""
+        ready = threading.Event()
+        errors: List[BaseException] = []
+        self._thread = threading.Thread(target=self._serve, args=(ready, errors), name="simulated-l2", daemon=True)
+        self._thread.start()
+        ready.wait()
+        if errors:
+            raise errors[0]
+
+    def stop(self):
+        if self._loop is not None and self._thread is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop = self._thread = None
+
+    def _serve(self, ready: threading.Event, errors: List[BaseException]):
+        from aiohttp import web
+        loop = asyncio.new_event_loop()
+        app = web.Application()
+        app.router.add_post("/", self.handle)
+        runner = web.AppRunner(app, access_log=None)
+        try:
+            loop.run_until_complete(runner.setup())
+            site = web.TCPSite(runner, self.host, self.port)
+            loop.run_until_complete(site.start())
+            self.port = runner.addresses[0][1]
+        except BaseException as e:
+            errors.append(e)
+            ready.set()
+            loop.close()
+            return
+        self._loop = loop
+        ready.set()
+        try:
+            loop.run_forever()
+        finally:
+            loop.run_until_complete(runner.cleanup())
+            loop.close()
+
+
+class LagProbe(Subscription):
+    """
+    Event subscriber that times one network's samples and proposals as they are published
+
+    Each metrics or proposals event is matched with the block its tick
+    fetched (the block last served by the network's node), giving the lag
+    from block production to stored sample and to recorded proposal.
+    """
+
+    def __init__(self, network_id: str, node: SimulatedL2Node):
+        super().__init__(TOPICS, buffer_size=1, network=network_id)
+        self.node = node
+        self.sample_lag: List[float] = []
+        self.proposal_lag: List[float] = []
+        self.proposal_blocks: List[int] = []
+
+    def push(self, frame: bytes):
+        index = self.node.last_served
+        if index < 0:
+            return
+        lag = self.node.clock() - self.node.produced_at(index)
+        if b"event: proposals\n" in frame:
+            self.proposal_lag.append(lag)
+            self.proposal_blocks.append(index)
+        else:
+            self.sample_lag.append(lag)
+
+
+def latency_summary(latencies: Sequence[float]) -> Dict[str, float]:
+    """Count and p50/p95/p99/max in milliseconds"""
+    if not len(latencies):
+        return {"count": 0, "p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+    values = np.asarray(latencies, dtype=np.float64) * 1000
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {"count": len(values), "p50_ms": round(float(p50), 3), "p95_ms": round(float(p95), 3),
+            "p99_ms": round(float(p99), 3), "max_ms": round(float(values.max()), 3)}
+
+
+class StressHarness:
+    """
+    Runs an agent's real monitor loop against simulated L2 nodes under API load
+
+    Every network gets its own SimulatedL2Node playing the scenario at
+    ``rate`` blocks per second and an ``l2_rpc`` collector polling it on a
+    fixed ``1 / rate`` cadence, so ideally each tick stores exactly one new
+    block. Meanwhile ``http_clients`` keep-alive connections cycle through
+    the read endpoints and ``chat_clients`` through chat questions, each at
+    ``client_rate`` requests per second (0: back to back). The report gives
+    dropped samples (blocks the agent never fetched), lag from block to
+    sample and to proposal, memory growth and API latency percentiles.
+    Logging is silenced and journals are disabled for the run.
+    """
+
+    def __init__(self, scenario: str = "mixed", rate: float = 1000.0, duration: float = 10.0,
+                 http_clients: int = 8, chat_clients: int = 4, client_rate: float = 20.0, seed: int = 0,
+                 agent_factory: Optional[Callable] = None):
+        if scenario not in SCENARIOS:
+            raise ValueError(f"Unknown scenario: {scenario} (expected one of {', '.join(SCENARIOS)})")
+        if rate <= 0 or duration <= 0:
+            raise ValueError("rate and duration must be positive")
+        self.scenario = scenario
+        self.rate = rate
+        self.duration = duration
+        self.http_clients = http_clients
+        self.chat_clients = chat_clients
+        self.client_rate = client_rate
+        self.seed = seed
+        self.agent_factory = agent_factory
+
+    async def run(self) -> Dict:
+        """Run the scenario once and return the report"""
+        was_enabled = rahu_agent.logger.enabled
+        rahu_agent.logger.enabled = False
+        try:
+            return await self._run()
+        finally:
+            rahu_agent.logger.enabled = was_enabled
+
+    def _make_agent(self):
+        agent = self.agent_factory() if self.agent_factory else rahu_agent.RahuAgent()
+        agent.rng.seed(self.seed)
+        interval = 1.0 / self.rate
+        nodes = {}
+        for i, network in enumerate(agent.networks.values()):
+            chain = SimulatedChain(SCENARIOS[self.scenario], int(self.duration * self.rate) + 1,
+                                   seed=self.seed + i, params=network.current_params)
+            nodes[network.network_id] = SimulatedL2Node(chain, self.rate)
+            network.journal = None
+            network.scheduler = AdaptiveScheduler(interval, min_interval=interval, max_interval=interval)
+        return agent, nodes
+
+    async def _run(self) -> Dict:
+        agent, nodes = self._make_agent()
+        server = AgentHTTPServer(agent, "127.0.0.1", 0)
+        latencies: Dict[str, List[float]] = {name: [] for name in (*API_ENDPOINTS, "chat")}
+        errors = {"count": 0}
+        probes: Dict[str, LagProbe] = {}
+        memory: List[float] = []
+        stopping = asyncio.Event()
+        tasks: List[asyncio.Task] = []
+        clients: List[HttpClient] = []
+        try:
+            for network_id, node in nodes.items():
+                node.start()
+                network = agent.network(network_id)
+                network.collector = MetricsCollector([L2RpcSource(node.url)], retries=0)
+                await network.collector.start()
+                probes[network_id] = LagProbe(network_id, node)
+                agent.events.subscribers.add(probes[network_id])
+            await server.start()
+
+            clients = [HttpClient("127.0.0.1", server.port) for _ in range(self.http_clients + self.chat_clients)]
+            await asyncio.gather(*(client.connect() for client in clients))
+            rss_start = telemetry.resident_memory_bytes()
+
+            started = time.perf_counter()
+            for node in nodes.values():
+                node.begin()
+            agent.is_running = True
+            tasks.append(asyncio.ensure_future(agent.monitor_all()))
+            tasks.append(asyncio.ensure_future(self._sample_memory(memory, stopping)))
+            for i, client in enumerate(clients):
+                if i < self.http_clients:
+                    requests = [(name, *API_ENDPOINTS[name]) for name in API_ENDPOINTS]
+                else:
+                    requests = [("chat", "POST", "/chat", {"message": message}) for message in CHAT_QUESTIONS]
+                # Offset each client's cycle so the endpoints are hit evenly at any moment
+                offset = i * len(requests) // max(1, len(clients))
+                tasks.append(asyncio.ensure_future(
+                    self._client(client, requests[offset:] + requests[:offset], latencies, errors, stopping)
+                ))
+
+            await asyncio.sleep(self.duration)
+            wall = time.perf_counter() - started
+            produced = {network_id: node.produced() for network_id, node in nodes.items()}
+            agent.is_running = False
+            stopping.set()
+            await asyncio.wait(tasks, timeout=max(1.0, 10.0 / self.rate))
+            rss_end = telemetry.resident_memory_bytes()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            for client in clients:
+                client.close()
+            await server.close()
+            for network_id, node in nodes.items():
+                network = agent.network(network_id)
+                if network.collector:
+                    await network.collector.close()
+                agent.events.unsubscribe(probes.get(network_id))
+                node.stop()
+
+        return {
+            "scenario": self.scenario,
+            "phases": [phase.name for phase in SCENARIOS[self.scenario]],
+            "rate": self.rate,
+            "duration": self.duration,
+            "seed": self.seed,
+            "wall_seconds": wall,
+            "networks": {
+                network_id: self._network_report(agent.network(network_id), node, probes[network_id],
+                                                 produced[network_id], wall)
+                for network_id, node in nodes.items()
+            },
+            "api": {name: latency_summary(values) for name, values in latencies.items()},
+            "api_requests_per_second": sum(len(values) for values in latencies.values()) / wall,
+            "api_errors": errors["count"],
+            "memory": {
+                "rss_start_mb": rss_start / 2 ** 20,
+                "rss_peak_mb": max(memory + [rss_start, rss_end]) / 2 ** 20,
+                "rss_end_mb": rss_end / 2 ** 20,
+                "growth_mb": (rss_end - rss_start) / 2 ** 20,
+                "metrics_store_bytes": sum(agent.network(n).metrics_history.nbytes for n in nodes),
+                "proposal_store_bytes": sum(agent.network(n).proposals.nbytes for n in nodes),
+            },
+        }
+
+    def _network_report(self, network, node: SimulatedL2Node, probe: LagProbe, produced: int, wall: float) -> Dict:
+        observed = int(node.served[:produced].sum())
+        stored = network.metrics_history.total_count
+        proposals_by_phase = np.bincount(node.chain.phase[probe.proposal_blocks],
+                                         minlength=len(node.chain.phases)) if probe.proposal_blocks else None
+        return {
+            "blocks_produced": produced,
+            "samples_observed": observed,
+            "dropped_samples": produced - observed,
+            "drop_rate": (produced - observed) / produced if produced else 0.0,
+            "samples_stored": stored,
+            # Ticks that fetched a block an earlier tick already stored
+            "repeated_samples": max(0, stored - observed),
+            "samples_per_second": stored / wall if wall > 0 else 0.0,
+            "tick_errors": network.tick - stored,
+            "missed_ticks": network.scheduler.missed_ticks,
+            "proposals": len(network.proposals),
+            "proposals_by_phase": [
+                {"phase": phase.name, "proposals": int(proposals_by_phase[i]) if proposals_by_phase is not None else 0}
+                for i, phase in enumerate(node.chain.phases)
+            ],
+            "sample_lag": latency_summary(probe.sample_lag),
+            "proposal_lag": latency_summary(probe.proposal_lag),
+        }
+
+    async def _client(self, client: HttpClient, requests: List, latencies: Dict[str, List[float]],
+                      errors: Dict[str, int], stopping: asyncio.Event):
+        interval = 1.0 / self.client_rate if self.client_rate > 0 else 0.0
+        i = 0
+        while not stopping.is_set():
+            name, method, path, body = requests[i % len(requests)]
+            i += 1
+            started = time.perf_counter()
+            status = await client.request(method, path, body)
+            elapsed = time.perf_counter() - started
+            latencies[name].append(elapsed)
+            if status != 200:
+                errors["count"] += 1
+            # Yield even when unpaced so clients can't starve the monitor of the loop entirely
+            await asyncio.sleep(max(0.0, interval - elapsed))
+
+    async def _sample_memory(self, samples: List[float], stopping: asyncio.Event, interval: float = 0.1):
+        while not stopping.is_set():
+            samples.append(telemetry.resident_memory_bytes())
+            await asyncio.sleep(interval)
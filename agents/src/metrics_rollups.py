@@ -0,0 +1,414 @@
+"""
+Downsampled metrics history for Rahu Protocol
+Per-minute and per-hour min/max/mean/p95 rollups maintained incrementally in fixed memory
+"""
+
+import math
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+
+# Metrics summarised by the rollups, in column order
+ROLLUP_FIELDS = ("gas_price", "tps", "block_time", "congestion_level", "active_users")
+ROLLUP_STATISTICS = ("min", "max", "mean", "p95")
+
+# (name, bucket width in seconds, default buckets retained)
+DEFAULT_TIERS = (("1m", 60.0, 1440), ("1h", 3600.0, 2160))
+
+# Quantiles each closed bucket keeps per field, so percentiles over several
+# buckets are merged from them rather than averaged: the midpoints of 24 rank
+# intervals, half of them spent on the top 10% where p95 lives
+POINT_EDGES = np.r_[np.linspace(0.0, 0.9, 13), np.linspace(0.9, 1.0, 13)[1:]]
+POINT_RANKS = (POINT_EDGES[:-1] + POINT_EDGES[1:]) / 2
+POINT_WEIGHTS = np.diff(POINT_EDGES)
+QUANTILE_POINTS = len(POINT_RANKS)
+
+
+class QuantileSketch:
+    """
+    Log-bucketed quantile sketch over several fields at once
+
+    Values are counted in geometrically spaced bins, so any quantile is
+    recovered within ``relative_accuracy`` of the true value using a fixed
+    number of counters, however many samples arrive. Values below
+    ``min_value`` share one bin that reads back as zero.
+    """
+
+    def __init__(self, fields: int, relative_accuracy: float = 0.01,
+                 min_value: float = 1e-4, max_value: float = 1e12):
+        gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(gamma)
+        self._offset = math.ceil(math.log(min_value) / self._log_gamma) - 1
+        self.min_value = min_value
+        self.bins = math.ceil(math.log(max_value) / self._log_gamma) - self._offset + 1
+        self._counts = np.zeros((fields, self.bins), dtype=np.int32)
+        self._rows = np.arange(fields)
+        # Representative value of each bin: the point with equal relative error to both edges
+        exponents = np.arange(self.bins) + self._offset
+        self._values = 2 * np.exp(exponents * self._log_gamma) / (gamma + 1)
+        self._values[0] = 0.0
+
+    def bin(self, values: np.ndarray) -> np.ndarray:
+        """Bin indices for values shaped (..., fields)"""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            index = np.ceil(np.log(np.maximum(values, self.min_value)) / self._log_gamma) - self._offset
+        index[~(values >= self.min_value)] = 0
+        return np.clip(index, 0, self.bins - 1).astype(np.intp)
+
+    def add(self, bins: np.ndarray):
+        """Count one sample's bins (shape ``(fields,)``) or a block of them (``(n, fields)``)"""
+        if bins.ndim == 1:
+            self._counts[self._rows, bins] += 1
+        else:
+            for row in self._rows:
+                self._counts[row] += np.bincount(bins[:, row], minlength=self.bins).astype(np.int32)
+
+    def quantile(self, q) -> np.ndarray:
+        """Per-field quantile ``q``, shape (fields,), or several at once, shape (fields, len(q))"""
+        cumulative = np.cumsum(self._counts, axis=1)
+        ranks = np.multiply.outer(cumulative[:, -1] - 1, np.atleast_1d(q))
+        index = np.stack([
+            np.searchsorted(row, rank, side="right") for row, rank in zip(cumulative, ranks)
+        ])
+        values = self._values[np.minimum(index, self.bins - 1)]
+        return values if np.ndim(q) else values[:, 0]
+
+    def reset(self):
+        self._counts.fill(0)
+
+    @property
+    def nbytes(self) -> int:
+        return self._counts.nbytes + self._values.nbytes
+
+
+class RollupTier:
+    """
+    Fixed-resolution rollups in a ring of ``capacity`` buckets
+
+    The open bucket keeps running min, max, sum and a quantile sketch, and
+    each block of samples costs one reduction per bucket it touches; when a
+    sample lands in a later bucket the open one is closed into the ring,
+    evicting the oldest. A closed bucket keeps its statistics plus
+    QUANTILE_POINTS quantiles per field, from which percentiles spanning
+    several buckets are merged. Empty intervals store nothing, and samples
+    older than the open bucket are folded into it rather than reopening
+    closed history.
+    """
+
+    def __init__(self, name: str, resolution: float, capacity: int, fields: Sequence[str] = ROLLUP_FIELDS,
+                 sketch: Optional[QuantileSketch] = None):
+        if resolution <= 0 or capacity <= 0:
+            raise ValueError("resolution and capacity must be positive")
+        self.name = name
+        self.resolution = resolution
+        self.capacity = capacity
+        self.fields = tuple(fields)
+        k = len(self.fields)
+
+        self._start = np.zeros(capacity)
+        self._count = np.zeros(capacity, dtype=np.int64)
+        self._stats = np.zeros((len(ROLLUP_STATISTICS), capacity, k))
+        self._points = np.zeros((capacity, k, QUANTILE_POINTS), dtype=np.float32)
+        self._head = 0
+        self._size = 0
+        self.closed_count = 0
+
+        self._bucket: Optional[int] = None
+        self._n = 0
+        self._min = np.empty(k)
+        self._max = np.empty(k)
+        self._sum = np.zeros(k)
+        self._sketch = sketch or QuantileSketch(k)
+
+    def __len__(self) -> int:
+        return self._size + (1 if self._n else 0)
+
+    def extend(self, timestamps: np.ndarray, values: np.ndarray, bins: np.ndarray):
+        """Fold a time-ordered block of samples, one reduction per bucket"""
+        if not len(timestamps):
+            return
+        buckets = (timestamps // self.resolution).astype(np.int64)
+        edges = np.flatnonzero(np.diff(buckets)) + 1
+        for start, end in zip(np.r_[0, edges], np.r_[edges, len(buckets)]):
+            self._open(int(buckets[start]))
+            block = values[start:end]
+            if self._n:
+                np.minimum(self._min, block.min(axis=0), out=self._min)
+                np.maximum(self._max, block.max(axis=0), out=self._max)
+            else:
+                self._min[:] = block.min(axis=0)
+                self._max[:] = block.max(axis=0)
+            self._sum += block.sum(axis=0)
+            self._n += end - start
+            self._sketch.add(bins[start:end])
+
+    def _open(self, bucket: int):
+        if self._bucket is None:
+            self._bucket = bucket
+        elif bucket > self._bucket:
+            self._close()
+            self._bucket = bucket
+
+    def _close(self):
+        if not self._n:
+            return
+        slot = self._head
+        self._start[slot] = self._bucket * self.resolution
+        self._count[slot] = self._n
+        for i, value in enumerate(self._current()):
+            self._stats[i, slot] = value
+        self._points[slot] = self._sketch.quantile(POINT_RANKS)
+        self._head = (slot + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+        self.closed_count += 1
+        self._n = 0
+        self._sum.fill(0.0)
+        self._sketch.reset()
+
+    def _current(self) -> Tuple[np.ndarray, ...]:
+        return self._min, self._max, self._sum / self._n, self._sketch.quantile(0.95)
+
+    @property
+    def oldest(self) -> Optional[float]:
+        """Start of the oldest bucket held, or None when empty"""
+        if self._size:
+            return float(self._start[(self._head - self._size) % self.capacity])
+        return self._bucket * self.resolution if self._n else None
+
+    @property
+    def complete(self) -> bool:
+        """True while no closed bucket has been evicted"""
+        return self.closed_count <= self.capacity
+
+    def rows(self, start: Optional[float] = None, end: Optional[float] = None,
+             points: bool = False) -> Dict[str, np.ndarray]:
+        """
+        Buckets overlapping [start, end], oldest first, including the open one
+
+        Columns are ``timestamp`` (bucket start), ``count`` and
+        ``<field>_<statistic>`` for every field and statistic; with
+        ``points``, also ``<field>_points``, each bucket's quantile points
+        (shape ``(rows, QUANTILE_POINTS)``) for ``merged_quantile``.
+        """
+        order = (self._head - self._size + np.arange(self._size)) % self.capacity
+        timestamps = self._start[order]
+        counts = self._count[order]
+        stats = self._stats[:, order]
+        if self._n:
+            timestamps = np.append(timestamps, self._bucket * self.resolution)
+            counts = np.append(counts, self._n)
+            stats = np.concatenate([stats, np.stack(self._current())[:, None, :]], axis=1)
+
+        lo = 0 if start is None else np.searchsorted(timestamps, start - self.resolution, side="right")
+        hi = len(timestamps) if end is None else np.searchsorted(timestamps, end, side="right")
+        columns = {"timestamp": timestamps[lo:hi], "count": counts[lo:hi]}
+        for i, statistic in enumerate(ROLLUP_STATISTICS):
+            for j, field in enumerate(self.fields):
+                columns[f"{field}_{statistic}"] = stats[i, lo:hi, j]
+        if points:
+            quantiles = self._points[order]
+            if self._n:
+                quantiles = np.concatenate([quantiles, self._sketch.quantile(POINT_RANKS)[None]])
+            for j, field in enumerate(self.fields):
+                columns[f"{field}_points"] = quantiles[lo:hi, j]
+        return columns
+
+    @property
+    def nbytes(self) -> int:
+        return (self._start.nbytes + self._count.nbytes + self._stats.nbytes + self._points.nbytes
+                + 3 * self._sum.nbytes + self._sketch.nbytes)
+
+    def reset(self):
+        """Drop every bucket, closed and open"""
+        self._head = self._size = self.closed_count = 0
+        self._bucket = None
+        self._n = 0
+        self._sum.fill(0.0)
+        self._sketch.reset()
+
+    def state(self) -> Dict[str, np.ndarray]:
+        """Copies of the ring and the open bucket, for ``load``"""
+        position = [self._head, self._size, self.closed_count, -1 if self._bucket is None else self._bucket, self._n]
+        return {
+            "start": self._start.copy(), "count": self._count.copy(), "stats": self._stats.copy(),
+            "points": self._points.copy(), "position": np.array(position, dtype=np.int64),
+            "min": self._min.copy(), "max": self._max.copy(), "sum": self._sum.copy(),
+            "sketch": self._sketch._counts.copy(),
+        }
+
+    def load(self, state: Dict[str, np.ndarray]):
+        """Replace this tier's contents with a ``state`` taken from a tier of the same shape"""
+        for name, array in (("start", self._start), ("count", self._count), ("stats", self._stats),
+                            ("points", self._points), ("min", self._min), ("max", self._max),
+                            ("sum", self._sum), ("sketch", self._sketch._counts)):
+            array[...] = state[name]
+        self._head, self._size, self.closed_count, bucket, self._n = (int(value) for value in state["position"])
+        self._bucket = None if bucket < 0 else bucket
+
+
+class MetricsRollups:
+    """
+    Every rollup tier for one metrics stream
+
+    Appended samples are staged in a small fixed buffer and folded into
+    every tier a block at a time (binned for the quantile sketches once),
+    so each append costs a row write; reads fold the staged samples first.
+    Memory is fixed by the tier capacities regardless of uptime. A
+    ``snapshot`` restored into rollups of the same layout resumes them.
+    """
+
+    def __init__(self, tiers: Sequence[Tuple[str, float, int]] = DEFAULT_TIERS,
+                 fields: Sequence[str] = ROLLUP_FIELDS, batch: int = 256):
+        self.fields = tuple(fields)
+        self._timestamps = np.empty(batch)
+        self._values = np.empty((batch, len(self.fields)))
+        self._staged = 0
+        self.samples = 0                    # Samples ever folded
+        self.last_timestamp = -math.inf     # Newest timestamp folded
+        self.tiers: List[RollupTier] = [
+            RollupTier(name, resolution, capacity, self.fields) for name, resolution, capacity in tiers
+        ]
+        # Every tier's sketch bins identically; one of them bins each sample for all
+        self._binner = self.tiers[0]._sketch
+
+    def tier(self, name: str) -> RollupTier:
+        self.flush()
+        for tier in self.tiers:
+            if tier.name == name:
+                return tier
+        raise KeyError(name)
+
+    def append(self, metrics):
+        row = self._staged
+        self._timestamps[row] = metrics.timestamp
+        self._values[row] = [getattr(metrics, field) for field in self.fields]
+        self._staged = row + 1
+        if self._staged == len(self._timestamps):
+            self.flush()
+
+    def extend(self, columns: Dict[str, np.ndarray]):
+        self.flush()
+        self._fold(
+            np.asarray(columns["timestamp"], dtype=np.float64),
+            np.column_stack([np.asarray(columns[field], dtype=np.float64) for field in self.fields])
+        )
+
+    def flush(self):
+        """Fold staged samples into the tiers"""
+        if self._staged:
+            count, self._staged = self._staged, 0
+            self._fold(self._timestamps[:count], self._values[:count])
+
+    def _fold(self, timestamps: np.ndarray, values: np.ndarray):
+        if not len(timestamps):
+            return
+        bins = self._binner.bin(values)
+        for tier in self.tiers:
+            tier.extend(timestamps, values, bins)
+        self.samples += len(timestamps)
+        self.last_timestamp = max(self.last_timestamp, float(timestamps.max()))
+
+    def reset(self):
+        """Drop staged samples and every tier's buckets"""
+        self._staged = 0
+        self.samples = 0
+        self.last_timestamp = -math.inf
+        for tier in self.tiers:
+            tier.reset()
+
+    def select(self, start: float) -> RollupTier:
+        """The finest tier whose history reaches back to ``start`` (else the coarsest)"""
+        self.flush()
+        for tier in self.tiers:
+            oldest = tier.oldest
+            if tier.complete or (oldest is not None and oldest <= start):
+                return tier
+        return self.tiers[-1]
+
+    @property
+    def nbytes(self) -> int:
+        return self._timestamps.nbytes + self._values.nbytes + sum(tier.nbytes for tier in self.tiers)
+
+    @property
+    def layout(self) -> str:
+        """Fields, tiers and sketch bins: snapshots only restore into rollups with the same layout"""
+        tiers = tuple((tier.name, tier.resolution, tier.capacity) for tier in self.tiers)
+        return repr((self.fields, tiers, self._binner.bins))
+
+    def snapshot(self) -> Dict[str, np.ndarray]:
+        """Every tier's state as named arrays, covering samples up to ``last_timestamp``"""
+        self.flush()
+        snapshot = {
+            "layout": np.array(self.layout),
+            "samples": np.array(self.samples, dtype=np.int64),
+            "last_timestamp": np.array(self.last_timestamp),
+        }
+        for tier in self.tiers:
+            snapshot.update((f"{tier.name}/{name}", array) for name, array in tier.state().items())
+        return snapshot
+
+    def restore(self, snapshot: Dict[str, np.ndarray]) -> bool:
+        """Resume from a ``snapshot``; False (leaving the rollups as they were) when its layout differs"""
+        if str(snapshot["layout"]) != self.layout:
+            return False
+        self._staged = 0
+        for tier in self.tiers:
+            tier.load({name.split("/", 1)[1]: array for name, array in snapshot.items()
+                       if name.startswith(f"{tier.name}/")})
+        self.samples = int(snapshot["samples"])
+        self.last_timestamp = float(snapshot["last_timestamp"])
+        return True
+
+
+def merged_quantile(points: np.ndarray, counts: np.ndarray, starts: np.ndarray, q: float) -> np.ndarray:
+    """
+    Quantile ``q`` of each group of rollup rows, merged from the rows' quantile points
+
+    ``points`` has one row of QUANTILE_POINTS quantiles per bucket; groups
+    are runs of rows beginning at ``starts``. Each point stands for its
+    rank interval's share of the bucket's samples, so a group's points
+    sorted by value form a weighted sample of the whole group, interpolated
+    at the midpoint of each point's weight.
+    """
+    rows, width = points.shape
+    sizes = np.diff(np.r_[starts, rows])
+    group = np.repeat(np.repeat(np.arange(len(starts)), sizes), width)
+    values = points.reshape(-1).astype(np.float64)
+    weights = np.outer(np.asarray(counts, dtype=np.float64), POINT_WEIGHTS).reshape(-1)
+    order = np.lexsort((values, group))
+    values, weights = values[order], weights[order]
+    cumulative = np.cumsum(weights)
+    middle = cumulative - weights / 2
+
+    first = starts * width
+    last = (starts + sizes) * width - 1
+    base = np.where(first > 0, cumulative[np.maximum(first - 1, 0)], 0.0)
+    target = base + q * (cumulative[last] - base)
+    above = np.clip(np.searchsorted(middle, target, side="left"), first, last)
+    below = np.maximum(above - 1, first)
+    span = middle[above] - middle[below]
+    fraction = np.clip(np.divide(target - middle[below], span, out=np.zeros_like(span), where=span > 0), 0.0, 1.0)
+    return values[below] + (values[above] - values[below]) * fraction
+
+
+def summarize_rows(rows: Dict[str, np.ndarray], fields: Sequence[str] = ROLLUP_FIELDS) -> Dict[str, Dict[str, float]]:
+    """
+    Combine rollup buckets (with their ``<field>_points``) into one min/max/mean/p95 per field
+
+    Min, max and the count-weighted mean are exact; p95 is merged from the
+    buckets' quantile points by ``merged_quantile``.
+    """
+    counts = rows["count"]
+    total = counts.sum()
+    if not total:
+        return {}
+    starts = np.zeros(1, dtype=np.int64)
+    return {
+        field: {
+            "min": float(rows[f"{field}_min"].min()),
+            "max": float(rows[f"{field}_max"].max()),
+            "mean": float((rows[f"{field}_mean"] * counts).sum() / total),
+            "p95": float(rows[f"{field}_p95"][0]) if len(counts) == 1
+            else float(merged_quantile(rows[f"{field}_points"], counts, starts, 0.95)[0]),
+        }
+        for field in fields
+    }
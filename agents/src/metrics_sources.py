@@ -0,0 +1,267 @@
+"""
+Metrics source plugins for the Rahu Agent
+Fetches network metrics from several backends concurrently over pooled connections
+"""
+
+import asyncio
+import itertools
+import time
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence
+
+if TYPE_CHECKING:
+    import aiohttp
+
+WEI_PER_GWEI = 10 ** 9
+
+# Function selector for PythOracle.getLatestMetrics()
+GET_LATEST_METRICS_SELECTOR = "0x395924dc"
+
+
+class MetricsSourceError(Exception):
+    """Raised when a source returns an unusable response"""
+    pass
+
+
+class MetricsSource:
+    """
+    Base class for metrics source plugins
+
+    Subclasses implement ``fetch`` and return a dict of NetworkMetrics field
+    values (any subset). Other keys are passed through in the merged result
+    for diagnostics.
+    """
+
+    name = "source"
+
+    async def fetch(self, session: "aiohttp.ClientSession") -> Dict[str, float]:
+        raise NotImplementedError
+
+
+class JsonRpcSource(MetricsSource):
+    """Base for sources that speak Ethereum JSON-RPC"""
+
+    def __init__(self, url: str):
+        self.url = url
+        self._ids = itertools.count(1)
+
+    async def rpc(self, session: "aiohttp.ClientSession", method: str, params: Optional[List] = None):
+        payload = {"jsonrpc": "2.0", "id": next(self._ids), "method": method, "params": params or []}
+        async with session.post(self.url, json=payload) as response:
+            if response.status != 200:
+                raise MetricsSourceError(f"{method} returned HTTP {response.status}")
+            body = await response.json(content_type=None)
+        if "error" in body:
+            raise MetricsSourceError(f"{method} failed: {body['error']}")
+        return body["result"]
+
+
+class L2RpcSource(JsonRpcSource):
+    """Gas price, throughput, block time and utilisation from an L2 JSON-RPC node"""
+
+    name = "l2_rpc"
+
+    def __init__(self, url: str):
+        super().__init__(url)
+        self._previous_block: Optional[Dict] = None
+
+    async def fetch(self, session: "aiohttp.ClientSession") -> Dict[str, float]:
+        gas_price, block = await asyncio.gather(
+            self.rpc(session, "eth_gasPrice"),
+            self.rpc(session, "eth_getBlockByNumber", ["latest", False]),
+        )
+        number = int(block["number"], 16)
+        timestamp = int(block["timestamp"], 16)
+        tx_count = len(block.get("transactions", []))
+        gas_used = int(block["gasUsed"], 16)
+        gas_limit = int(block["gasLimit"], 16)
+
+        metrics = {
+            "gas_price": int(gas_price, 16) / WEI_PER_GWEI,
+            "congestion_level": gas_used / gas_limit if gas_limit else 0.0,
+        }
+
+        previous = self._previous_block
+        if previous and number > previous["number"] and timestamp > previous["timestamp"]:
+            blocks = number - previous["number"]
+            elapsed = timestamp - previous["timestamp"]
+            metrics["block_time"] = elapsed / blocks
+            metrics["tps"] = int(round(tx_count / metrics["block_time"]))
+        self._previous_block = {"number": number, "timestamp": timestamp}
+        return metrics
+
+
+class PythOracleSource(JsonRpcSource):
+    """Gas price published by the deployed PythOracle contract"""
+
+    name = "pyth"
+
+    def __init__(self, url: str, contract_address: str):
+        super().__init__(url)
+        self.contract_address = contract_address
+
+    async def fetch(self, session: "aiohttp.ClientSession") -> Dict[str, float]:
+        result = await self.rpc(session, "eth_call", [
+            {"to": self.contract_address, "data": GET_LATEST_METRICS_SELECTOR}, "latest"
+        ])
+        data = bytes.fromhex(result[2:] if result.startswith("0x") else result)
+        if len(data) < 128:
+            raise MetricsSourceError("getLatestMetrics returned a short result")
+        gas_price, eth_price, timestamp, confidence = (
+            int.from_bytes(data[i:i + 32], "big") for i in range(0, 128, 32)
+        )
+        # PythOracle stores the gas price in whole gwei and the ETH price with 8 decimals
+        return {
+            "gas_price": float(gas_price),
+            "eth_price": eth_price / 1e8,
+            "oracle_timestamp": timestamp,
+            "oracle_confidence": confidence / 1e8,
+        }
+
+
+class AvailStatusSource(MetricsSource):
+    """Data-availability status from an Avail light client's HTTP API"""
+
+    name = "avail"
+
+    def __init__(self, url: str):
+        self.url = url.rstrip("/")
+
+    async def fetch(self, session: "aiohttp.ClientSession") -> Dict[str, float]:
+        async with session.get(f"{self.url}/v2/status") as response:
+            if response.status != 200:
+                raise MetricsSourceError(f"Avail status returned HTTP {response.status}")
+            status = await response.json(content_type=None)
+        blocks = status.get("blocks", {})
+        latest = blocks.get("latest", 0)
+        available = (blocks.get("available") or {}).get("last", latest)
+        return {"avail_latest_block": latest, "avail_lag_blocks": max(0, latest - available)}
+
+
+class SourceStats:
+    """Per-source latency and error tracking"""
+
+    def __init__(self, alpha: float = 0.2):
+        self.alpha = alpha
+        self.successes = 0
+        self.failures = 0
+        self.last_latency = 0.0
+        self.latency_ewma = 0.0
+        self.last_error: Optional[str] = None
+        self.last_success: Optional[float] = None
+
+    def record_success(self, latency: float):
+        self.successes += 1
+        self.last_latency = latency
+        self.latency_ewma = latency if self.successes == 1 else (
+            self.latency_ewma + self.alpha * (latency - self.latency_ewma)
+        )
+        self.last_success = time.time()
+
+    def record_failure(self, error: str):
+        self.failures += 1
+        self.last_error = error
+
+    def to_dict(self) -> Dict:
+        return {
+            "successes": self.successes,
+            "failures": self.failures,
+            "last_latency_ms": self.last_latency * 1000,
+            "latency_ewma_ms": self.latency_ewma * 1000,
+            "last_error": self.last_error,
+        }
+
+
+class MetricsCollector:
+    """
+    Fetches every source concurrently through one pooled HTTP session
+
+    Each source gets one deadline (``timeout``) covering all of its retries,
+    so a slow or failing source only loses its own contribution and a tick
+    never waits longer than the deadline. Values are merged in
+    source order, with earlier sources taking precedence.
+    """
+
+    def __init__(self, sources: Sequence[MetricsSource], timeout: float = 2.0,
+                 retries: int = 1, pool_size: int = 20):
+        self.sources = list(sources)
+        self.timeout = timeout
+        self.retries = retries
+        self.pool_size = pool_size
+        self.stats = {source.name: SourceStats() for source in self.sources}
+        self._session: Optional["aiohttp.ClientSession"] = None
+
+    async def start(self):
+        if self._session is None:
+            # Imported here: aiohttp dominates the agent's import time and simulated-only agents never need it
+            import aiohttp
+            connector = aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=30)
+            self._session = aiohttp.ClientSession(connector=connector)
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def collect(self) -> Dict[str, float]:
+        """Fetch all sources for one tick and merge their results"""
+        await self.start()
+        results = await asyncio.gather(*(self._fetch_source(source) for source in self.sources))
+
+        merged: Dict[str, float] = {}
+        for values in results:
+            if values:
+                for key, value in values.items():
+                    merged.setdefault(key, value)
+        return merged
+
+    async def _fetch_source(self, source: MetricsSource) -> Optional[Dict[str, float]]:
+        import aiohttp
+        stats = self.stats[source.name]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        for attempt in range(self.retries + 1):
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            started = time.perf_counter()
+            try:
+                values = await asyncio.wait_for(source.fetch(self._session), remaining)
+            except asyncio.TimeoutError:
+                stats.record_failure(f"timeout after {self.timeout}s")
+                break
+            except (aiohttp.ClientError, MetricsSourceError, KeyError, ValueError) as e:
+                stats.record_failure(str(e) or type(e).__name__)
+            else:
+                stats.record_success(time.perf_counter() - started)
+                return values
+            if attempt < self.retries:
+                await asyncio.sleep(min(0.05 * 2 ** attempt, max(0.0, deadline - loop.time())))
+        return None
+
+    def source_stats(self) -> Dict[str, Dict]:
+        return {name: stats.to_dict() for name, stats in self.stats.items()}
+
+
+# Configuration keys read by build_sources
+CONFIG_KEYS = ("L2_RPC_URL", "ETHEREUM_RPC_URL", "PYTH_CONTRACT_ADDRESS", "AVAIL_STATUS_URL")
+
+
+def build_sources(names: Sequence[str], config: Dict[str, str]) -> List[MetricsSource]:
+    """Instantiate source plugins by name from configuration values"""
+    def require(key: str) -> str:
+        value = config.get(key)
+        if not value:
+            raise ValueError(f"{key} is required for the configured metrics sources")
+        return value
+
+    sources = []
+    for name in names:
+        if name == "l2_rpc":
+            sources.append(L2RpcSource(require("L2_RPC_URL")))
+        elif name == "pyth":
+            sources.append(PythOracleSource(require("ETHEREUM_RPC_URL"), require("PYTH_CONTRACT_ADDRESS")))
+        elif name == "avail":
+            sources.append(AvailStatusSource(require("AVAIL_STATUS_URL")))
+        else:
+            raise ValueError(f"Unknown metrics source: {name}")
+    return sources
@@ -0,0 +1,335 @@
+"""
+Columnar metrics storage for Rahu Protocol
+Fixed-capacity ring buffer backed by NumPy arrays
+"""
+
+import math
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
+import numpy as np
+
+from .metrics_rollups import ROLLUP_FIELDS, MetricsRollups, merged_quantile, summarize_rows
+
+# Column layout shared by the ring buffer, the journal and the replay engine
+METRIC_FIELDS = ("timestamp", "gas_price", "tps", "block_time", "congestion_level", "active_users")
+METRIC_DTYPES = {
+    "timestamp": np.float64,
+    "gas_price": np.float64,
+    "tps": np.int64,
+    "block_time": np.float64,
+    "congestion_level": np.float64,
+    "active_users": np.int64,
+}
+INTEGER_FIELDS = frozenset(name for name, dtype in METRIC_DTYPES.items() if dtype is np.int64)
+
+# Bucket statistics for range queries, besides percentiles written as ``p<q>`` (``p95``, ``p99.9``)
+RANGE_STATISTICS = ("min", "max", "mean", "median")
+
+
+class NetworkMetrics:
+    """Network metrics data structure (lightweight view of one sample)"""
+    __slots__ = METRIC_FIELDS
+
+    def __init__(self, timestamp, gas_price, tps, block_time, congestion_level, active_users):
+        self.timestamp = timestamp
+        self.gas_price = gas_price
+        self.tps = tps
+        self.block_time = block_time
+        self.congestion_level = congestion_level
+        self.active_users = active_users
+
+    def to_dict(self) -> Dict[str, float]:
+        return {name: getattr(self, name) for name in METRIC_FIELDS}
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in METRIC_FIELDS)
+        return f"NetworkMetrics({fields})"
+
+
+class MetricsStore:
+    """
+    Bounded columnar ring buffer for network metrics
+
+    Every column is allocated at twice the retention capacity and each sample
+    is written to both halves, so the most recent ``n`` samples are always a
+    contiguous slice. Appends are O(1) and windows are zero-copy views.
+
+    With ``rollups``, every sample is also folded into the downsampled
+    tiers, which keep the long view after raw samples are evicted.
+    """
+
+    def __init__(self, capacity: int = 10000, rollups: Optional[MetricsRollups] = None):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self._columns = {
+            name: np.zeros(2 * capacity, dtype=dtype) for name, dtype in METRIC_DTYPES.items()
+        }
+        self._head = 0          # Next write slot in [0, capacity)
+        self._size = 0          # Retained samples
+        self.total_count = 0    # Samples ever appended
+        self.rollups = rollups
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __bool__(self) -> bool:
+        return self._size > 0
+
+    def append(self, metrics: NetworkMetrics):
+        """Append one sample, evicting the oldest when full"""
+        head = self._head
+        mirror = head + self.capacity
+        for name, column in self._columns.items():
+            value = getattr(metrics, name)
+            column[head] = value
+            column[mirror] = value
+
+        self._head = head + 1 if head + 1 < self.capacity else 0
+        if self._size < self.capacity:
+            self._size += 1
+        self.total_count += 1
+        if self.rollups is not None:
+            self.rollups.append(metrics)
+
+    def extend(self, columns: Dict[str, np.ndarray], fold: bool = True):
+        """Bulk-append samples given as equal-length column arrays (``fold=False``: rollups already hold them)"""
+        count = len(columns["timestamp"])
+        if count == 0:
+            return
+        skipped = max(0, count - self.capacity)
+        kept = count - skipped
+
+        # Only the newest ``capacity`` samples can survive; write them in at most two runs
+        first = min(kept, self.capacity - self._head)
+        for name, column in self._columns.items():
+            values = np.asarray(columns[name][skipped:], dtype=column.dtype)
+            self._write_run(column, self._head, values[:first])
+            self._write_run(column, 0, values[first:])
+
+        self._head = (self._head + kept) % self.capacity
+        self._size = min(self.capacity, self._size + kept)
+        self.total_count += count
+        if fold and self.rollups is not None:
+            self.rollups.extend(columns)
+
+    def _write_run(self, column: np.ndarray, start: int, values: np.ndarray):
+        if len(values):
+            column[start:start + len(values)] = values
+            column[start + self.capacity:start + self.capacity + len(values)] = values
+
+    def clear(self):
+        """Drop every sample, raw and rolled up"""
+        self._head = 0
+        self._size = 0
+        self.total_count = 0
+        if self.rollups is not None:
+            self.rollups.reset()
+
+    def column(self, name: str, last: Optional[int] = None) -> np.ndarray:
+        """Zero-copy view of the newest ``last`` values of a column, oldest first"""
+        count = self._size if last is None else max(0, min(last, self._size))
+        end = self._head + self.capacity
+        view = self._columns[name][end - count:end]
+        view.flags.writeable = False
+        return view
+
+    def window(self, last: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Zero-copy views of every column for the newest ``last`` samples"""
+        return {name: self.column(name, last) for name in METRIC_FIELDS}
+
+    def _slot(self, index: int) -> int:
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("metrics index out of range")
+        return self._head + self.capacity - self._size + index
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[NetworkMetrics, List[NetworkMetrics]]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._size))]
+        slot = self._slot(index)
+        values = {}
+        for name, column in self._columns.items():
+            value = column[slot]
+            values[name] = int(value) if name in INTEGER_FIELDS else float(value)
+        return NetworkMetrics(**values)
+
+    def __iter__(self) -> Iterator[NetworkMetrics]:
+        for i in range(self._size):
+            yield self[i]
+
+    def latest(self) -> Optional[NetworkMetrics]:
+        return self[-1] if self._size else None
+
+    def tier_for(self, start: float) -> str:
+        """``raw`` while the ring buffer still reaches back to ``start``, else the finest rollup tier that does"""
+        if self.rollups is None or self.total_count <= self.capacity:
+            return "raw"
+        if self._size and self._columns["timestamp"][self._slot(0)] <= start:
+            return "raw"
+        return self.rollups.select(start).name
+
+    def query(self, start: float, end: Optional[float] = None,
+              points: bool = False) -> Tuple[str, Dict[str, np.ndarray]]:
+        """
+        History between ``start`` and ``end`` from the finest tier covering it
+
+        Returns the tier name with raw columns (``raw``) or rollup rows
+        (``1m``, ``1h``: bucket ``timestamp``, ``count`` and
+        ``<field>_<min|max|mean|p95>``, plus ``<field>_points`` with
+        ``points`` for merging percentiles across rows).
+        """
+        tier = self.tier_for(start)
+        if tier == "raw":
+            timestamps = self.column("timestamp")
+            lo = np.searchsorted(timestamps, start, side="left")
+            hi = len(timestamps) if end is None else np.searchsorted(timestamps, end, side="right")
+            return tier, {name: self.column(name)[lo:hi] for name in METRIC_FIELDS}
+        return tier, self.rollups.tier(tier).rows(start, end, points)
+
+    def summary(self, start: float, end: Optional[float] = None) -> Dict:
+        """Min, max, mean and p95 of each metric between ``start`` and ``end``, from the tier covering it"""
+        tier, columns = self.query(start, end, points=True)
+        if tier == "raw":
+            count = len(columns["timestamp"])
+            fields = {
+                field: {
+                    "min": float(values.min()),
+                    "max": float(values.max()),
+                    "mean": float(values.mean()),
+                    "p95": float(np.percentile(values, 95)),
+                }
+                for field, values in ((field, columns[field]) for field in ROLLUP_FIELDS)
+            } if count else {}
+        else:
+            count = int(columns["count"].sum())
+            fields = summarize_rows(columns)
+        return {"tier": tier, "samples": count, "fields": fields}
+
+    def aggregate(self, start: float, end: Optional[float] = None, step: Optional[float] = None,
+                  statistics: Sequence[str] = ("mean",),
+                  fields: Sequence[str] = ROLLUP_FIELDS) -> Tuple[str, Dict[str, np.ndarray]]:
+        """
+        Per-bucket statistics between ``start`` and ``end`` from the finest tier covering it
+
+        Buckets are ``step`` seconds wide and aligned to multiples of
+        ``step``; only buckets holding samples are returned. Columns are
+        ``timestamp`` (bucket start), ``count`` and ``<field>_<statistic>``.
+        Without a step, raw samples come back as they are (``timestamp``
+        and each field) and rollups one bucket per stored row. Beyond the
+        raw window only min, max, mean and p95 exist, combined across rows
+        as ``summarize_rows`` does. The arrays are copies, so they stay
+        valid while new samples arrive.
+        """
+        if step is not None and not step > 0:
+            raise ValueError("step must be positive")
+        for statistic in statistics:
+            _percentile(statistic)
+        unknown = set(fields) - set(ROLLUP_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+
+        tier, columns = self.query(start, end, points=True)
+        if tier == "raw":
+            if step is None:
+                return tier, {name: columns[name].copy() for name in ("timestamp",) + tuple(fields)}
+            return tier, aggregate_samples(columns, step, statistics, fields)
+
+        unsupported = [statistic for statistic in statistics if statistic not in ("min", "max", "mean", "p95")]
+        if unsupported:
+            raise ValueError(f"{tier} rollups only keep min, max, mean and p95, not {', '.join(unsupported)}")
+        resolution = self.rollups.tier(tier).resolution
+        return tier, aggregate_rows(columns, max(step or resolution, resolution), statistics, fields)
+
+    @property
+    def nbytes(self) -> int:
+        total = sum(column.nbytes for column in self._columns.values())
+        return total + (self.rollups.nbytes if self.rollups is not None else 0)
+
+
+def _percentile(statistic: str) -> Optional[float]:
+    """The percentile a ``p<q>`` statistic names, None for the others"""
+    if statistic in RANGE_STATISTICS:
+        return 50.0 if statistic == "median" else None
+    try:
+        q = float(statistic[1:]) if statistic.startswith("p") else math.nan
+    except ValueError:
+        q = math.nan
+    if not 0 <= q <= 100:
+        raise ValueError(f"Unknown statistic: {statistic}")
+    return q
+
+
+def _buckets(timestamps: np.ndarray, step: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Bucket id of each (sorted) timestamp, plus the first index and size of every non-empty bucket"""
+    ids = np.floor(timestamps / step).astype(np.int64)
+    starts = np.r_[0, np.flatnonzero(np.diff(ids)) + 1]
+    counts = np.diff(np.r_[starts, len(ids)])
+    return ids, starts, counts
+
+
+def aggregate_samples(columns: Dict[str, np.ndarray], step: float, statistics: Sequence[str],
+                      fields: Sequence[str] = ROLLUP_FIELDS) -> Dict[str, np.ndarray]:
+    """
+    Bucket raw samples and reduce every bucket at once
+
+    Min, max and mean are ``reduceat`` passes over the contiguous buckets;
+    percentiles sort each field once by (bucket, value) and interpolate
+    linearly between ranks, matching ``np.percentile``.
+    """
+    timestamps = columns["timestamp"]
+    if not len(timestamps):
+        return _empty(statistics, fields)
+    ids, starts, counts = _buckets(timestamps, step)
+    result = {"timestamp": ids[starts] * step, "count": counts}
+    for field in fields:
+        values = np.asarray(columns[field], dtype=np.float64)
+        ordered = None
+        for statistic in statistics:
+            if statistic == "min":
+                value = np.minimum.reduceat(values, starts)
+            elif statistic == "max":
+                value = np.maximum.reduceat(values, starts)
+            elif statistic == "mean":
+                value = np.add.reduceat(values, starts) / counts
+            else:
+                if ordered is None:
+                    ordered = values[np.lexsort((values, ids))]
+                rank = starts + _percentile(statistic) / 100 * (counts - 1)
+                below = np.floor(rank).astype(np.int64)
+                above = np.minimum(below + 1, starts + counts - 1)
+                value = ordered[below] + (ordered[above] - ordered[below]) * (rank - below)
+            result[f"{field}_{statistic}"] = value
+    return result
+
+
+def aggregate_rows(rows: Dict[str, np.ndarray], step: float, statistics: Sequence[str],
+                   fields: Sequence[str] = ROLLUP_FIELDS) -> Dict[str, np.ndarray]:
+    """Merge rollup rows into ``step``-wide buckets: exact min, max and mean, p95 merged from quantile points"""
+    timestamps = rows["timestamp"]
+    if not len(timestamps):
+        return _empty(statistics, fields)
+    ids, starts, sizes = _buckets(timestamps, step)
+    counts = np.add.reduceat(rows["count"], starts)
+    result = {"timestamp": ids[starts] * step, "count": counts}
+    for field in fields:
+        for statistic in statistics:
+            values = rows[f"{field}_{statistic}"]
+            if statistic == "min":
+                value = np.minimum.reduceat(values, starts)
+            elif statistic == "max":
+                value = np.maximum.reduceat(values, starts)
+            elif statistic == "p95":
+                # A bucket built from one row keeps that row's sketch p95
+                merged = merged_quantile(rows[f"{field}_points"], rows["count"], starts, 0.95)
+                value = np.where(sizes == 1, values[starts], merged)
+            else:
+                value = np.add.reduceat(values * rows["count"], starts) / counts
+            result[f"{field}_{statistic}"] = value
+    return result
+
+
+def _empty(statistics: Sequence[str], fields: Sequence[str]) -> Dict[str, np.ndarray]:
+    columns = {"timestamp": np.empty(0), "count": np.empty(0, dtype=np.int64)}
+    columns.update((f"{field}_{statistic}", np.empty(0)) for field in fields for statistic in statistics)
+    return columns
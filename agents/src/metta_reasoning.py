@@ -3,10 +3,45 @@ MeTTa Reasoning Engine for Rahu Protocol
 Uses symbolic reasoning to determine optimal blockchain parameters
 """
 
-from hyperon import MeTTa, AtomType
+from hyperon import MeTTa
 from loguru import logger
-from typing import Dict, List, Tuple
+from typing import Dict, List, Sequence, Tuple, Union
+from functools import lru_cache
+import hashlib
 import os
+import numpy as np
+
+from .rule_compiler import DEFAULT_KNOWLEDGE_BASE, compile_knowledge_base, format_value, knowledge_base_files
+from .safety_constraints import defines_safety_rules, load_safety_rules, validate_batch
+from .telemetry import STAGE_SECONDS, timed
+
+# Parsed atoms per knowledge-base file, keyed by the SHA-256 of its contents
+_parsed_knowledge: Dict[str, list] = {}
+
+
+def load_knowledge_base(metta: MeTTa, path: str) -> int:
+    """
+    Add the definitions in a knowledge base to a MeTTa space
+
+    Files are parsed once per process and content hash, so engines built
+    later (or after an unchanged reload) only copy atoms into their space.
+    Knowledge-base files hold definitions; ``!`` queries are rejected.
+    """
+    files = knowledge_base_files(path)
+    for filename in files:
+        with open(filename, "rb") as f:
+            data = f.read()
+        digest = hashlib.sha256(data).hexdigest()
+        atoms = _parsed_knowledge.get(digest)
+        if atoms is None:
+            atoms = metta.parse_all(data.decode())
+            if any(str(atom) == "!" for atom in atoms):
+                raise ValueError(f"{filename}: knowledge base files may not contain ! queries")
+            _parsed_knowledge[digest] = atoms
+        space = metta.space()
+        for atom in atoms:
+            space.add_atom(atom)
+    return len(files)
 
 class MeTTaReasoningEngine:
     """
@@ -20,8 +55,12 @@ class MeTTaReasoningEngine:
     
     def __init__(self):
         self.metta = MeTTa()
-        self.knowledge_base_path = os.getenv("METTA_KNOWLEDGE_BASE_PATH", "./knowledge_base")
+        self.knowledge_base_path = os.getenv("METTA_KNOWLEDGE_BASE_PATH") or DEFAULT_KNOWLEDGE_BASE
         self.reasoning_depth = int(os.getenv("REASONING_DEPTH", "5"))
+        self.cache_size = int(os.getenv("METTA_CACHE_SIZE", "4096"))
+        
+        # Memoized symbolic queries, keyed on discretized metric inputs
+        self._query_state = lru_cache(maxsize=self.cache_size)(self._evaluate_state)
         
         # Initialize knowledge base
         self._initialize_knowledge_base()
@@ -29,62 +68,19 @@ class MeTTaReasoningEngine:
         logger.info("🧠 MeTTa Reasoning Engine initialized")
     
     def _initialize_knowledge_base(self):
-        """Initialize MeTTa knowledge base with blockchain rules"""
-        
-        # Define blockchain optimization rules in MeTTa
-        rules = """
-        ; Network State Rules
-        (: congested (-> Network Bool))
-        (: high-gas (-> Network Bool))
-        (: low-throughput (-> Network Bool))
-        
-        ; Parameter Adjustment Rules
-        (: increase-gas-limit (-> Network Action))
-        (: decrease-block-time (-> Network Action))
-        (: optimize-tps (-> Network Action))
-        
-        ; Optimization Logic
-        (= (should-optimize $net)
-           (if (congested $net) True
-           (if (high-gas $net) True
-           (if (low-throughput $net) True False))))
-        
-        ; Congestion Rules
-        (= (congested $net)
-           (> (congestion-level $net) 0.7))
-        
-        (= (high-gas $net)
-           (> (gas-price $net) 100))
-        
-        (= (low-throughput $net)
-           (< (tps $net) 200))
-        
-        ; Parameter Optimization Rules
-        (= (optimize-params $net)
-           (if (congested $net)
-               (increase-gas-limit $net)
-           (if (high-gas $net)
-               (decrease-block-time $net)
-           (if (low-throughput $net)
-               (optimize-tps $net)
-               (no-action)))))
-        
-        ; Expected Improvement Calculation
-        (= (calculate-improvement $current $proposed)
-           (* (/ (- $proposed $current) $current) 100))
-        
-        ; Confidence Score Calculation
-        (= (confidence-score $history-length)
-           (min 0.95 (+ 0.7 (* (/ $history-length 100) 0.25))))
-        """
-        
+        """Load the blockchain rules from METTA_KNOWLEDGE_BASE_PATH"""
+        self.rules = None
         try:
-            # Load rules into MeTTa space
-            self.metta.run(rules)
-            logger.success("✅ Knowledge base loaded successfully")
+            files = load_knowledge_base(self.metta, self.knowledge_base_path)
+            # Hot-path decisions use the compiled rules; the interpreter explains them
+            self.rules = compile_knowledge_base(self.knowledge_base_path)
+            logger.success(f"✅ Knowledge base loaded successfully ({files} files)")
         except Exception as e:
             logger.error(f"❌ Failed to load knowledge base: {e}")
+        # A knowledge base without its own safety constraints is validated against the bundled ones
+        self.safety_rules = self.rules if defines_safety_rules(self.rules) else load_safety_rules()
     
+    @timed(STAGE_SECONDS.labels("metta_reasoning"))
     def reason_about_optimization(
         self,
         metrics: Dict[str, float],
@@ -104,60 +100,44 @@ class MeTTaReasoningEngine:
         """
         logger.info("🧠 Starting MeTTa reasoning process...")
         
-        # Create network state representation
-        network_state = f"""
-        (= (congestion-level network) {metrics.get('congestion_level', 0)})
-        (= (gas-price network) {metrics.get('gas_price', 0)})
-        (= (tps network) {metrics.get('tps', 0)})
-        """
-        
         try:
-            # Load current state
-            self.metta.run(network_state)
-            
-            # Query if optimization is needed
-            should_optimize = self.metta.run("(should-optimize network)")
+            # Evaluate the compiled rules on the raw metrics
+            rules = self.rules
+            state = self.network_state(metrics)
+            should_optimize = rules["should-optimize"](state)
             logger.info(f"Should optimize: {should_optimize}")
-            
-            # Determine optimization actions
-            actions = self.metta.run("(optimize-params network)")
-            logger.info(f"Recommended actions: {actions}")
+            logger.info(f"Recommended actions: {format_value(rules['optimize-params'](state))}")
             
             # Generate proposed parameters using reasoning
             proposed_params = current_params.copy()
             reasoning_steps = []
             
-            # Apply reasoning-based adjustments
-            if metrics.get('congestion_level', 0) > 0.7:
-                adjustment_factor = 1 + (metrics['congestion_level'] - 0.7) * 0.5
+            # Apply reasoning-based adjustments, with factors from the knowledge base
+            if rules["congested"](state):
+                adjustment_factor = float(rules["gas-limit-factor"](state))
                 proposed_params['gas_limit'] = int(current_params['gas_limit'] * adjustment_factor)
                 reasoning_steps.append(
                     f"Congestion at {metrics['congestion_level']:.1%} → "
                     f"Increase gas limit by {(adjustment_factor - 1) * 100:.1f}%"
                 )
             
-            if metrics.get('gas_price', 0) > 100:
-                reduction_factor = 1 - min(0.2, (metrics['gas_price'] - 100) / 1000)
+            if rules["high-gas"](state):
+                reduction_factor = float(rules["block-time-factor"](state))
                 proposed_params['block_time'] = current_params['block_time'] * reduction_factor
                 reasoning_steps.append(
                     f"High gas price ({metrics['gas_price']:.1f} Gwei) → "
                     f"Reduce block time by {(1 - reduction_factor) * 100:.1f}%"
                 )
             
-            if metrics.get('tps', 0) < 200:
-                improvement_factor = 1 + (200 - metrics['tps']) / 1000
+            if rules["low-throughput"](state):
+                improvement_factor = float(rules["max-tps-factor"](state))
                 proposed_params['max_tps'] = int(current_params['max_tps'] * improvement_factor)
                 reasoning_steps.append(
                     f"Low throughput ({metrics['tps']} TPS) → "
                     f"Increase max TPS by {(improvement_factor - 1) * 100:.1f}%"
                 )
             
-            # Calculate confidence using MeTTa
-            confidence_query = f"(confidence-score {history_length})"
-            confidence_result = self.metta.run(confidence_query)
-            
-            # Parse confidence (simplified for now)
-            confidence = min(0.95, 0.7 + (history_length / 100) * 0.25)
+            confidence = float(rules["confidence-score"](history_length))
             
             reasoning_explanation = " | ".join(reasoning_steps) if reasoning_steps else "No optimization needed"
             
@@ -169,11 +149,118 @@ class MeTTaReasoningEngine:
             logger.error(f"❌ Reasoning error: {e}")
             return current_params, f"Error in reasoning: {e}", 0.0
     
+    def reason_about_optimization_batch(
+        self,
+        metrics: Dict[str, Sequence[float]],
+        current_params: Dict[str, Union[float, Sequence[float]]],
+        history_length: Union[int, Sequence[int]]
+    ) -> Tuple[Dict[str, np.ndarray], List[str], np.ndarray]:
+        """
+        Evaluate many metric snapshots at once
+        
+        Applies the same adjustments as reason_about_optimization, with the
+        compiled rules and adjustment factors evaluated element-wise over
+        all snapshots.
+        
+        Args:
+            metrics: Columns of congestion_level, gas_price and tps (one entry per snapshot)
+            current_params: Current parameters, either scalars or one value per snapshot
+            history_length: History length, either a scalar or one value per snapshot
+        
+        Returns:
+            Tuple of (proposed_params columns, reasoning explanations, confidence scores)
+        """
+        congestion = np.asarray(metrics.get('congestion_level', 0), dtype=np.float64)
+        count = congestion.shape[0] if congestion.ndim else 1
+        congestion = np.broadcast_to(congestion, (count,))
+        gas_price = np.broadcast_to(np.asarray(metrics.get('gas_price', 0), dtype=np.float64), (count,))
+        tps = np.broadcast_to(np.asarray(metrics.get('tps', 0), dtype=np.float64), (count,))
+        
+        gas_limit = np.broadcast_to(np.asarray(current_params['gas_limit'], dtype=np.float64), (count,))
+        block_time = np.broadcast_to(np.asarray(current_params['block_time'], dtype=np.float64), (count,))
+        max_tps = np.broadcast_to(np.asarray(current_params['max_tps'], dtype=np.float64), (count,))
+        
+        # The compiled rules evaluate element-wise, one mask and one factor per condition
+        state = ("network-state", congestion, gas_price, tps)
+        congested = self.rules["congested"](state)
+        adjustment_factor = np.where(congested, self.rules["gas-limit-factor"](state), 1.0)
+        high_gas = self.rules["high-gas"](state)
+        reduction_factor = np.where(high_gas, self.rules["block-time-factor"](state), 1.0)
+        low_throughput = self.rules["low-throughput"](state)
+        improvement_factor = np.where(low_throughput, self.rules["max-tps-factor"](state), 1.0)
+        
+        proposed_params = {
+            'gas_limit': np.where(congested, np.trunc(gas_limit * adjustment_factor), gas_limit).astype(np.int64),
+            'block_time': np.where(high_gas, block_time * reduction_factor, block_time),
+            'max_tps': np.where(low_throughput, np.trunc(max_tps * improvement_factor), max_tps).astype(np.int64),
+        }
+        
+        history = np.broadcast_to(np.asarray(history_length, dtype=np.float64), (count,))
+        confidence = np.asarray(self.rules["confidence-score"](history), dtype=np.float64)
+        
+        # Only the explanation text is built per snapshot
+        gas_increase = (adjustment_factor - 1) * 100
+        block_reduction = (1 - reduction_factor) * 100
+        tps_increase = (improvement_factor - 1) * 100
+        explanations = []
+        for i in range(count):
+            steps = []
+            if congested[i]:
+                steps.append(
+                    f"Congestion at {congestion[i]:.1%} → "
+                    f"Increase gas limit by {gas_increase[i]:.1f}%"
+                )
+            if high_gas[i]:
+                steps.append(
+                    f"High gas price ({gas_price[i]:.1f} Gwei) → "
+                    f"Reduce block time by {block_reduction[i]:.1f}%"
+                )
+            if low_throughput[i]:
+                steps.append(
+                    f"Low throughput ({int(tps[i])} TPS) → "
+                    f"Increase max TPS by {tps_increase[i]:.1f}%"
+                )
+            explanations.append(" | ".join(steps) if steps else "No optimization needed")
+        
+        return proposed_params, explanations, confidence
+    
+    @staticmethod
+    def network_state(metrics: Dict[str, float]) -> Tuple:
+        """The (network-state congestion gas tps) term the rules take, as a compiled value"""
+        return ("network-state", metrics.get('congestion_level', 0), metrics.get('gas_price', 0), metrics.get('tps', 0))
+    
+    @staticmethod
+    def discretize(metrics: Dict[str, float]) -> Tuple[float, float, int]:
+        """Round metrics to the resolution used for symbolic queries and caching"""
+        return (
+            round(float(metrics.get('congestion_level', 0)), 2),
+            float(round(metrics.get('gas_price', 0))),
+            int(round(metrics.get('tps', 0)))
+        )
+    
+    def _evaluate_state(self, congestion_level: float, gas_price: float, tps: int) -> Tuple[List, List]:
+        """
+        Evaluate the optimization rules for one network state
+        
+        The state is passed to the rules as a scratch ``(network-state ...)``
+        term instead of being asserted as facts, so the space holds only the
+        static knowledge base and an old state can never match a new query.
+        """
+        state = f"(network-state {congestion_level} {gas_price} {tps})"
+        should_optimize = self.metta.run(f"!(should-optimize {state})")
+        actions = self.metta.run(f"!(optimize-params {state})")
+        return should_optimize, actions
+    
+    def cache_info(self) -> Dict[str, int]:
+        info = self._query_state.cache_info()
+        return {"hits": info.hits, "misses": info.misses, "size": info.currsize, "maxsize": info.maxsize}
+    
     def explain_decision(self, proposal: Dict) -> str:
         """
         Generate human-readable explanation of optimization decision
         
-        Uses MeTTa's symbolic reasoning to provide transparent explanations
+        Uses MeTTa's symbolic reasoning to provide transparent explanations:
+        the interpreter re-derives the decision for the proposal's metrics
         """
         explanation = f"""
         🧠 MeTTa Reasoning Explanation
@@ -197,54 +284,50 @@ class MeTTaReasoningEngine:
                 change_pct = ((value - current[param]) / current[param]) * 100
                 explanation += f"\n  • {param}: {current[param]} → {value} ({change_pct:+.1f}%)"
         
+        metrics = proposal.get('metrics')
+        if metrics:
+            should_optimize, actions = self._query_state(*self.discretize(metrics))
+            explanation += "\n\nSymbolic Derivation:"
+            explanation += f"\n  • (should-optimize state) → {', '.join(map(str, should_optimize[0]))}"
+            explanation += f"\n  • (optimize-params state) → {', '.join(map(str, actions[0]))}"
+        
         explanation += f"\n\nConfidence Score: {proposal.get('confidence_score', 0):.2%}"
         explanation += f"\nExpected Improvement: {proposal.get('expected_improvement', 0):.2%}"
         
         return explanation
     
+    @timed(STAGE_SECONDS.labels("metta_validation"))
     def validate_proposal(self, proposal: Dict) -> bool:
         """
         Validate proposal using MeTTa reasoning rules
         
-        Ensures proposals are safe and reasonable
-        """
-        proposed = proposal.get('proposed_params', {})
-        current = proposal.get('current_params', {})
-        
-        # Safety checks using symbolic reasoning
-        safety_rules = """
-        ; Safety constraints
-        (= (safe-gas-limit $current $proposed)
-           (and (> $proposed 0)
-                (< $proposed (* $current 2))))
-        
-        (= (safe-block-time $current $proposed)
-           (and (> $proposed 0.5)
-                (< $proposed (* $current 1.5))))
-        
-        (= (safe-tps $current $proposed)
-           (and (> $proposed 0)
-                (< $proposed (* $current 2))))
+        Ensures proposals are safe and reasonable: every parameter must pass
+        its rule in the knowledge base's safety constraints
         """
-        
         try:
-            self.metta.run(safety_rules)
-            
-            # Check each parameter
-            for param in ['gas_limit', 'block_time', 'max_tps']:
-                if param in proposed and param in current:
-                    # Verify change is within safe bounds
-                    ratio = proposed[param] / current[param]
-                    if ratio < 0.5 or ratio > 2.0:
-                        logger.warning(f"⚠️  Unsafe parameter change: {param} ratio {ratio:.2f}")
-                        return False
-            
-            logger.success("✅ Proposal validated successfully")
-            return True
-            
+            result = self.validate_proposals([proposal])[0]
         except Exception as e:
             logger.error(f"❌ Validation error: {e}")
             return False
+        
+        for param, violation in result["violations"].items():
+            logger.warning(f"⚠️  Unsafe parameter change: {param} ratio {violation['ratio']:.2f} fails {violation['rule']}")
+        if result["valid"]:
+            logger.success("✅ Proposal validated successfully")
+        return result["valid"]
+    
+    def validate_proposals(self, proposals: Sequence[Dict]) -> List[Dict]:
+        """
+        Validate a batch of proposals at once
+        
+        The compiled safety rules run once per parameter over columns of the
+        whole batch, so candidate searches and backtests can check thousands
+        of proposals without a per-proposal loop.
+        
+        Returns:
+            One {"valid": bool, "violations": {param: {rule, current, proposed, ratio}}} per proposal
+        """
+        return validate_batch(proposals, self.safety_rules)
 
 # Singleton instance
 _reasoning_engine = None
@@ -0,0 +1,92 @@
+"""
+Per-network monitoring state for the Rahu Agent
+One MonitoredNetwork per configured L2 deployment, all driven from one event loop
+"""
+
+import os
+import re
+from typing import Dict, Optional
+
+from .journal import AgentJournal
+from .metrics_sources import MetricsCollector
+from .metrics_rollups import MetricsRollups
+from .metrics_store import MetricsStore
+from .proposal_store import ProposalStore
+from .scheduler import AdaptiveScheduler
+from .streaming_stats import AnomalyDetector
+
+DEFAULT_NETWORK = "default"
+
+DEFAULT_PARAMS = {
+    "gas_limit": 30000000,
+    "block_time": 2.0,
+    "max_tps": 1000
+}
+
+NETWORK_ID_PATTERN = re.compile(r"^[a-z0-9][a-z0-9_-]*$")
+
+
+def network_env(network_id: str, key: str, default: Optional[str] = None) -> Optional[str]:
+    """
+    Configuration value for one network
+
+    ``NETWORK_<ID>_<KEY>`` overrides the global ``<KEY>`` for that network
+    (the id is upper-cased with dashes turned into underscores).
+    """
+    if network_id != DEFAULT_NETWORK:
+        value = os.getenv(f"NETWORK_{network_id.upper().replace('-', '_')}_{key}")
+        if value is not None:
+            return value
+    return os.getenv(key, default)
+
+
+def parse_network_ids(value: str):
+    ids = [name.strip().lower() for name in value.split(",") if name.strip()]
+    for network_id in ids:
+        if not NETWORK_ID_PATTERN.match(network_id):
+            raise ValueError(f"Invalid network id: {network_id}")
+    if len(set(ids)) != len(ids):
+        raise ValueError("Network ids must be unique")
+    return ids or [DEFAULT_NETWORK]
+
+
+class MonitoredNetwork:
+    """
+    Metrics, statistics, cadence, parameters and proposals for one network
+
+    Networks share nothing mutable, so each one's monitor coroutine can run
+    concurrently with the others on the agent's event loop.
+    """
+
+    def __init__(self, network_id: str, metrics_retention: int = 10000, proposals_retention: int = 10000,
+                 anomaly_window: int = 60, ewma_alpha: float = 0.3,
+                 scheduler: Optional[AdaptiveScheduler] = None,
+                 collector: Optional[MetricsCollector] = None,
+                 journal: Optional[AgentJournal] = None,
+                 current_params: Optional[Dict] = None,
+                 governance_address: Optional[str] = None,
+                 rollups: Optional[MetricsRollups] = None):
+        self.network_id = network_id
+        # Raw samples for the recent window, rollups for the long view
+        self.metrics_history = MetricsStore(metrics_retention, rollups=rollups or MetricsRollups())
+        self.anomaly_detector = AnomalyDetector(window=anomaly_window, alpha=ewma_alpha)
+        self.proposals = ProposalStore(proposals_retention)
+        self.scheduler = scheduler or AdaptiveScheduler(30.0)
+        self.collector = collector
+        self.journal = journal
+        self.current_params = dict(current_params or DEFAULT_PARAMS)
+        # AIGovernance contract that receives this network's proposals, if any
+        self.governance_address = governance_address
+        self.anomaly_window = anomaly_window
+        self.tick = 0
+
+    def summary(self) -> Dict:
+        latest = self.metrics_history.latest()
+        return {
+            "network": self.network_id,
+            "metrics_count": self.metrics_history.total_count,
+            "proposals_count": len(self.proposals),
+            "monitoring_interval": self.scheduler.effective_interval,
+            "current_params": self.current_params,
+            "latest_metrics": latest.to_dict() if latest else None,
+        }
@@ -0,0 +1,191 @@
+"""
+Parameter search for Rahu Protocol proposals
+Scores a dense grid of candidate parameters at once against a cost model fitted on metrics history
+"""
+
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+import numpy as np
+
+from .safety_constraints import check_columns
+
+# Searched parameters, in candidate column order
+SEARCH_PARAMS = ("gas_limit", "block_time", "max_tps")
+INTEGER_PARAMS = frozenset(("gas_limit", "max_tps"))
+
+# Proposed/current ratio range the grid spans: the bounds of the safety rules in
+# knowledge_base/safety.metta, which candidates are also checked against
+SAFETY_BOUNDS = {"gas_limit": (0.5, 2.0), "block_time": (0.5, 1.5), "max_tps": (0.5, 2.0)}
+
+# Relative weight of each cost term; latency, gas price and resources are 1 at the current parameters
+COST_WEIGHTS = {"latency": 1.0, "gas_price": 0.5, "unserved": 1.0, "resources": 0.25, "change": 0.5}
+
+# Utilisation at which the queueing model stops growing latency
+UTILISATION_CAP = 0.99
+
+# Largest log gas price the model extrapolates to
+MAX_EXPONENT = 50.0
+
+# Newest samples the model is fitted on
+FIT_WINDOW = 1000
+
+
+@lru_cache(maxsize=8)
+def candidate_axes(points: int) -> Tuple[np.ndarray, ...]:
+    """
+    Candidate ratios to the current value of each parameter in SEARCH_PARAMS
+
+    ``points`` evenly spaced ratios strictly inside each parameter's safety
+    bounds, plus 1.0 so the current value is always a candidate. The
+    candidate set is every combination, ``len(axis) ** 3`` of them.
+    """
+    axes = tuple(
+        np.union1d(np.linspace(low, high, points + 2)[1:-1], [1.0])
+        for low, high in (SAFETY_BOUNDS[param] for param in SEARCH_PARAMS)
+    )
+    for axis in axes:
+        axis.flags.writeable = False
+    return axes
+
+
+def candidate_count(points: int) -> int:
+    return int(np.prod([len(axis) for axis in candidate_axes(points)]))
+
+
+def current_vector(current_params: Dict) -> np.ndarray:
+    return np.array([float(current_params[param]) for param in SEARCH_PARAMS])
+
+
+def within_bounds(current: np.ndarray, candidates: np.ndarray) -> np.ndarray:
+    """Which candidate rows (absolute values, columns in SEARCH_PARAMS order) the safety rules accept"""
+    passed = check_columns(
+        {param: current[column] for column, param in enumerate(SEARCH_PARAMS)},
+        {param: candidates[:, column] for column, param in enumerate(SEARCH_PARAMS)},
+    )
+    return np.logical_and.reduce([passed[param] for param in SEARCH_PARAMS])
+
+
+class CostModel:
+    """
+    Throughput, latency and gas price of a network as a function of its parameters
+
+    Fitted on metrics observed at the current parameters: capacity is the
+    TPS at which congestion would reach 100% (least squares of congestion on
+    TPS through the origin), demand is the p95 congestion in units of that
+    capacity, and gas price grows exponentially with congestion (least
+    squares of log gas price on congestion). A candidate's capacity scales
+    with ``max_tps`` or with gas per second (``gas_limit / block_time``),
+    whichever binds first, and its latency is block time stretched by the
+    queueing factor ``1 / (1 - utilisation)``.
+    """
+
+    def __init__(self, capacity: float, demand: float, gas_intercept: float, gas_slope: float,
+                 weights: Optional[Dict[str, float]] = None):
+        self.capacity = capacity
+        self.demand = demand
+        self.gas_intercept = gas_intercept
+        self.gas_slope = gas_slope
+        self.weights = weights or COST_WEIGHTS
+        self._baseline = self.predict(1.0, 1.0, 1.0)
+
+    @classmethod
+    def fit(cls, history: Dict[str, np.ndarray], current_params: Dict,
+            congestion: Optional[float] = None) -> "CostModel":
+        """Fit on history columns; ``congestion`` (the latest sample) floors the demand estimate"""
+        tps = np.asarray(history["tps"][-FIT_WINDOW:], dtype=np.float64)
+        load = np.asarray(history["congestion_level"][-FIT_WINDOW:], dtype=np.float64)
+        gas = np.asarray(history["gas_price"][-FIT_WINDOW:], dtype=np.float64)
+
+        denominator = float(tps @ load)
+        capacity = float(tps @ tps) / denominator if denominator > 0 else float(current_params["max_tps"])
+        level = float(np.percentile(load, 95)) if len(load) else 0.0
+        if congestion is not None:
+            level = max(level, congestion)
+
+        positive = gas > 0
+        x, y = load[positive], np.log(gas[positive])
+        spread = float(((x - x.mean()) ** 2).sum()) if len(x) else 0.0
+        gas_slope = float(((x - x.mean()) * (y - y.mean())).sum()) / spread if spread > 0 else 0.0
+        gas_intercept = float(y.mean() - gas_slope * x.mean()) if len(x) else 0.0
+        return cls(capacity, level * capacity, gas_intercept, gas_slope)
+
+    def predict(self, gas_limit, block_time, max_tps) -> Dict[str, np.ndarray]:
+        """
+        Utilisation, served TPS, latency (in current block times) and gas price
+
+        Arguments are ratios to the current parameters and broadcast
+        together, so a whole grid is scored from its three axes.
+        """
+        capacity = self.capacity * np.minimum(max_tps, np.divide(gas_limit, block_time))
+        utilisation = self.demand / capacity
+        queueing = 1.0 / (1.0 - np.minimum(utilisation, UTILISATION_CAP))
+        exponent = self.gas_intercept + self.gas_slope * np.minimum(utilisation, 1.0)
+        return {
+            "utilisation": utilisation,
+            "throughput": np.minimum(self.demand, capacity),
+            "latency": block_time * queueing,
+            "gas_price": np.exp(np.minimum(exponent, MAX_EXPONENT)),
+        }
+
+    def evaluate(self, gas_limit, block_time, max_tps) -> np.ndarray:
+        """Cost of candidates given as broadcastable ratios to the current parameters; lower is better"""
+        predicted = self.predict(gas_limit, block_time, max_tps)
+        baseline, weights = self._baseline, self.weights
+        cost = weights["latency"] * predicted["latency"] / baseline["latency"]
+        cost += weights["gas_price"] * predicted["gas_price"] / baseline["gas_price"]
+        if self.demand > 0:
+            cost += weights["unserved"] * (1.0 - predicted["throughput"] / self.demand)
+        # Node load grows with gas processed per second; large steps are riskier than small ones
+        cost += weights["resources"] * np.divide(gas_limit, block_time)
+        cost += weights["change"] * (np.log(gas_limit) ** 2 + np.log(block_time) ** 2 + np.log(max_tps) ** 2)
+        return cost
+
+
+def search(model: CostModel, current_params: Dict, points: int = 20) -> Tuple[Dict, float, Dict[str, float]]:
+    """
+    The lowest-cost candidate within the safety bounds
+
+    Returns the proposed parameters (integers where the chain needs them),
+    the relative cost reduction against keeping the current parameters (in
+    [0, 1), every cost term being non-negative), and the model's prediction
+    for the winner (latency in seconds). Returns the current parameters
+    with zero improvement when nothing beats them.
+    """
+    current = current_vector(current_params)
+    values, ratios = [], []
+    for column, param in enumerate(SEARCH_PARAMS):
+        axis = candidate_axes(points)[column] * current[column]
+        if param in INTEGER_PARAMS:
+            axis = np.floor(axis)
+        values.append(axis)
+        ratios.append(axis / current[column])
+    # Each safety rule bounds one parameter, so checking the axes covers the whole grid
+    passed = check_columns(
+        {param: current[column] for column, param in enumerate(SEARCH_PARAMS)},
+        dict(zip(SEARCH_PARAMS, values)),
+    )
+    valid = [passed[param] for param in SEARCH_PARAMS]
+
+    # Score the whole grid by broadcasting the three axes against each other
+    shape = [(-1, 1, 1), (1, -1, 1), (1, 1, -1)]
+    grid = [ratio.reshape(axis_shape) for ratio, axis_shape in zip(ratios, shape)]
+    mask = valid[0].reshape(shape[0]) & valid[1].reshape(shape[1]) & valid[2].reshape(shape[2])
+    costs = np.where(mask, model.evaluate(*grid), np.inf)
+    best = np.unravel_index(int(np.argmin(costs)), costs.shape)
+    baseline = float(model.evaluate(1.0, 1.0, 1.0))
+    improvement = (baseline - costs[best]) / baseline if baseline > 0 else 0.0
+    if not improvement > 0:
+        return dict(current_params), 0.0, _prediction(model, (1.0, 1.0, 1.0), current_params)
+
+    proposed = dict(current_params)
+    for column, param in enumerate(SEARCH_PARAMS):
+        value = values[column][best[column]]
+        proposed[param] = int(value) if param in INTEGER_PARAMS else float(value)
+    best_ratios = tuple(ratios[column][best[column]] for column in range(len(SEARCH_PARAMS)))
+    return proposed, float(improvement), _prediction(model, best_ratios, current_params)
+
+
+def _prediction(model: CostModel, ratios: Tuple[float, ...], current_params: Dict) -> Dict[str, float]:
+    prediction = {name: float(value) for name, value in model.predict(*ratios).items()}
+    prediction["latency"] *= float(current_params["block_time"])
+    return prediction
@@ -0,0 +1,154 @@
+"""
+Indexed proposal storage for the Rahu Agent
+Proposals keyed by id and ordered by time, with cursor pagination
+"""
+
+import sys
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Sort key for the time index: (timestamp, insertion sequence)
+Key = Tuple[float, int]
+
+
+def encode_cursor(key: Key) -> str:
+    timestamp, seq = key
+    return f"{timestamp!r}:{seq}"
+
+
+def decode_cursor(cursor: str) -> Key:
+    try:
+        timestamp, seq = cursor.split(":")
+        return float(timestamp), int(seq)
+    except ValueError:
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+
+def _approximate_size(proposal) -> int:
+    return (sys.getsizeof(proposal) + sys.getsizeof(proposal.__dict__)
+            + sys.getsizeof(proposal.reasoning) + sys.getsizeof(proposal.proposed_params)
+            + sys.getsizeof(proposal.current_params))
+
+
+class ProposalStore:
+    """
+    Proposal history with a hash index on ``proposal_id`` and a time index
+
+    The time index is a sorted list of ``(timestamp, seq)`` keys, so lookups
+    by time are a binary search and pages are slices. Pagination cursors
+    encode the last key returned, which stays valid as new proposals arrive
+    and old ones are evicted. A proposal with the same parameters as the one
+    accepted on the previous tick is treated as a duplicate and not stored.
+    """
+
+    def __init__(self, retention: Optional[int] = None):
+        self.retention = retention
+        self._by_id: Dict[str, object] = {}
+        self._keys: List[Key] = []
+        self._ids: List[str] = []
+        self._seq = 0
+        self._last_signature = None
+        self._last_tick: Optional[int] = None
+        self.duplicates = 0
+        self.nbytes = sys.getsizeof(self._by_id)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __bool__(self) -> bool:
+        return bool(self._ids)
+
+    def __iter__(self) -> Iterator:
+        by_id = self._by_id
+        return (by_id[proposal_id] for proposal_id in self._ids)
+
+    def __getitem__(self, index: int):
+        return self._by_id[self._ids[index]]
+
+    def __contains__(self, proposal_id: str) -> bool:
+        return proposal_id in self._by_id
+
+    @staticmethod
+    def _signature(proposal) -> Tuple:
+        return (tuple(sorted(proposal.proposed_params.items())),
+                tuple(sorted(proposal.current_params.items())))
+
+    def add(self, proposal, tick: Optional[int] = None) -> bool:
+        """
+        Store a proposal; returns False when it was dropped as a duplicate
+
+        ``tick`` is the monitoring tick the proposal came from. Deduplication
+        only applies when the previous accepted proposal came from tick - 1,
+        so a run of identical proposals collapses to its first entry.
+        """
+        if proposal.proposal_id in self._by_id:
+            self.duplicates += 1
+            return False
+
+        signature = self._signature(proposal)
+        if tick is not None:
+            consecutive = self._last_tick is not None and tick == self._last_tick + 1
+            repeated = consecutive and signature == self._last_signature
+            self._last_tick = tick
+            self._last_signature = signature
+            if repeated:
+                self.duplicates += 1
+                return False
+
+        key = (float(proposal.timestamp), self._seq)
+        self._seq += 1
+        if not self._keys or key > self._keys[-1]:
+            self._keys.append(key)
+            self._ids.append(proposal.proposal_id)
+        else:
+            index = bisect_left(self._keys, key)
+            self._keys.insert(index, key)
+            self._ids.insert(index, proposal.proposal_id)
+        self._by_id[proposal.proposal_id] = proposal
+        self.nbytes += _approximate_size(proposal)
+
+        if self.retention is not None and len(self._ids) > self.retention:
+            self._evict(len(self._ids) - self.retention)
+        return True
+
+    def _evict(self, count: int):
+        for proposal_id in self._ids[:count]:
+            self.nbytes -= _approximate_size(self._by_id.pop(proposal_id))
+        del self._ids[:count]
+        del self._keys[:count]
+
+    def get(self, proposal_id: str):
+        return self._by_id.get(proposal_id)
+
+    @property
+    def version(self) -> int:
+        """Proposals ever stored; changes whenever the store does"""
+        return self._seq
+
+    def count_since(self, since: float) -> int:
+        return len(self._keys) - bisect_left(self._keys, (float(since), -1))
+
+    def latest(self):
+        return self._by_id[self._ids[-1]] if self._ids else None
+
+    def list(self, since: Optional[float] = None, limit: int = 50,
+             cursor: Optional[str] = None) -> Tuple[List, Optional[str]]:
+        """
+        One page of proposals in time order, oldest first
+
+        Returns the page and a cursor for the next one (None on the last
+        page). ``since`` filters by timestamp; ``cursor`` resumes after the
+        last proposal of a previous page.
+        """
+        if limit <= 0:
+            raise ValueError("limit must be positive")
+        start = 0
+        if since is not None:
+            start = bisect_left(self._keys, (float(since), -1))
+        if cursor is not None:
+            start = max(start, bisect_right(self._keys, decode_cursor(cursor)))
+
+        end = min(start + limit, len(self._ids))
+        page = [self._by_id[proposal_id] for proposal_id in self._ids[start:end]]
+        next_cursor = encode_cursor(self._keys[end - 1]) if end < len(self._ids) and page else None
+        return page, next_cursor
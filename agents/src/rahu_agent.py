@@ -4,41 +4,51 @@ Built with uAgents framework for ASI Alliance prize track
 """
 
 import asyncio
-import json
 import time
 import random
-import threading
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 import os
 from dotenv import load_dotenv
 import hashlib
 
-# Simple HTTP server using built-in modules
-from http.server import HTTPServer, BaseHTTPRequestHandler
-import urllib.parse
+from .chat_intents import ChatEngine
+from .chain_submitter import JsonRpcClient, ProposalSubmitter, local_signer
+from .event_stream import EventBroker
+from .http_api import AgentHTTPServer
+from .journal import AgentJournal
+from .metrics_rollups import MetricsRollups
+from .metrics_sources import CONFIG_KEYS, MetricsCollector, MetricsSourceError, build_sources
+from .metrics_store import NetworkMetrics
+from .network_monitor import DEFAULT_NETWORK, MonitoredNetwork, network_env, parse_network_ids
+from .parameter_search import FIT_WINDOW, SEARCH_PARAMS, CostModel, candidate_count, search
+from .reasoning_pool import ReasoningPool, ReasoningTimeout
+from .scheduler import AdaptiveScheduler
+from . import telemetry
+
+# Pipeline stage histograms, resolved once so the hot path skips the label lookup
+FETCH_SECONDS = telemetry.STAGE_SECONDS.labels("fetch")
+SHOULD_OPTIMIZE_SECONDS = telemetry.STAGE_SECONDS.labels("should_optimize")
+GENERATE_PROPOSAL_SECONDS = telemetry.STAGE_SECONDS.labels("generate_proposal")
+TICK_SECONDS = telemetry.STAGE_SECONDS.labels("tick")
 
 # Simple logging
 class SimpleLogger:
-    def info(self, msg): print(f"ℹ️  {msg}")
-    def success(self, msg): print(f"✅ {msg}")
-    def warning(self, msg): print(f"⚠️  {msg}")
-    def error(self, msg): print(f"❌ {msg}")
+    def __init__(self):
+        self.enabled = True
+    def info(self, msg):
+        if self.enabled: print(f"ℹ️  {msg}")
+    def success(self, msg):
+        if self.enabled: print(f"✅ {msg}")
+    def warning(self, msg):
+        if self.enabled: print(f"⚠️  {msg}")
+    def error(self, msg):
+        if self.enabled: print(f"❌ {msg}")
 
 logger = SimpleLogger()
 
 load_dotenv()
 
 # Define simple data structures
-class NetworkMetrics:
-    """Network metrics data structure"""
-    def __init__(self, timestamp, gas_price, tps, block_time, congestion_level, active_users):
-        self.timestamp = timestamp
-        self.gas_price = gas_price
-        self.tps = tps
-        self.block_time = block_time
-        self.congestion_level = congestion_level
-        self.active_users = active_users
-
 class OptimizationProposal:
     """AI-generated optimization proposal"""
     def __init__(self, proposal_id, timestamp, current_params, proposed_params, expected_improvement, confidence_score, reasoning, zk_proof_hash=None):
@@ -50,89 +60,345 @@ class OptimizationProposal:
         self.confidence_score = confidence_score
         self.reasoning = reasoning
         self.zk_proof_hash = zk_proof_hash
+    
+    def to_dict(self) -> Dict:
+        return {
+            "proposal_id": self.proposal_id,
+            "timestamp": self.timestamp,
+            "current_params": self.current_params,
+            "proposed_params": self.proposed_params,
+            "expected_improvement": self.expected_improvement,
+            "confidence_score": self.confidence_score,
+            "reasoning": self.reasoning,
+            "zk_proof_hash": self.zk_proof_hash
+        }
+
+def _network_attribute(name: str, doc: str):
+    """Agent attribute that reads and writes the default network's state"""
+    def getter(self):
+        return getattr(self.default_network, name)
+    def setter(self, value):
+        setattr(self.default_network, name, value)
+    return property(getter, setter, doc=doc)
 
 class RahuAgent:
     
+    # Single-network view kept for callers that predate multi-network monitoring
+    metrics_history = _network_attribute("metrics_history", "Default network's metrics ring buffer")
+    anomaly_detector = _network_attribute("anomaly_detector", "Default network's trigger detector")
+    scheduler = _network_attribute("scheduler", "Default network's adaptive scheduler")
+    proposals = _network_attribute("proposals", "Default network's proposal store")
+    journal = _network_attribute("journal", "Default network's journal")
+    collector = _network_attribute("collector", "Default network's metrics collector")
+    current_params = _network_attribute("current_params", "Default network's chain parameters")
+    tick = _network_attribute("tick", "Default network's tick counter")
+    
     def __init__(self):
         self.agent_name = os.getenv("AGENT_NAME", "rahu_optimizer_agent")
         self.agent_address = os.getenv("AGENT_ADDRESS", "agent1q09nfstjfeakh2l69rezeng6qzta897ta9s5yvcu3xtvxemgxrcyq2ug4vx")
         
-        self.monitoring_interval = int(os.getenv("MONITORING_INTERVAL", "30"))
+        self.monitoring_interval = float(os.getenv("MONITORING_INTERVAL", "30"))
         self.optimization_threshold = float(os.getenv("OPTIMIZATION_THRESHOLD", "0.15"))
         self.min_confidence = float(os.getenv("MIN_CONFIDENCE_SCORE", "0.75"))
+        self.http_host = os.getenv("AGENT_HTTP_HOST", "localhost")
+        self.http_port = int(os.getenv("AGENT_HTTP_PORT", "8001"))
+        self.journal_dir = os.getenv("AGENT_JOURNAL_DIR", "./journal")
+        self.journal_flush_interval = float(os.getenv("JOURNAL_FLUSH_INTERVAL", "1.0"))
+        self.metrics_retention = int(os.getenv("METRICS_RETENTION", "10000"))
+        self.rollup_tiers = (
+            ("1m", 60.0, int(os.getenv("ROLLUP_MINUTE_RETENTION", "1440"))),
+            ("1h", 3600.0, int(os.getenv("ROLLUP_HOUR_RETENTION", "2160"))),
+        )
+        self.proposals_retention = int(os.getenv("PROPOSALS_RETENTION", "10000"))
+        self.anomaly_window = int(os.getenv("ANOMALY_WINDOW", "60"))
+        self.ewma_alpha = float(os.getenv("EWMA_ALPHA", "0.3"))
+        self.max_concurrent_ticks = int(os.getenv("MAX_CONCURRENT_TICKS", "8"))
+        self.search_points = int(os.getenv("PROPOSAL_SEARCH_POINTS", "20"))
         
-        # Storage
-        self.metrics_history: List[NetworkMetrics] = []
-        self.proposals: List[OptimizationProposal] = []
-        self.current_params = {
-            "gas_limit": 30000000,
-            "block_time": 2.0,
-            "max_tps": 1000
-        }
+        # MeTTa reasoning runs in worker processes when enabled; 0 keeps the built-in heuristic
+        self.reasoning: Optional[ReasoningPool] = None
+        reasoning_workers = int(os.getenv("REASONING_WORKERS", "0"))
+        if reasoning_workers > 0:
+            self.reasoning = ReasoningPool(
+                workers=reasoning_workers,
+                timeout=float(os.getenv("REASONING_TIMEOUT", "5.0"))
+            )
+        
+        # One MonitoredNetwork per configured network; the first is the default
+        self.networks: Dict[str, MonitoredNetwork] = {}
+        for network_id in parse_network_ids(os.getenv("NETWORKS", DEFAULT_NETWORK)):
+            self.networks[network_id] = self._build_network(network_id)
+        self.default_network = next(iter(self.networks.values()))
+        
+        # Accepted proposals go on-chain for networks with an AIGovernance address
+        self.submitter: Optional[ProposalSubmitter] = None
+        if any(network.governance_address for network in self.networks.values()):
+            self.submitter = self._build_submitter()
+        
+        # Chat answers, cached until the agent's state changes
+        self.chat = ChatEngine(self, cache_size=int(os.getenv("CHAT_CACHE_SIZE", "1024")))
+        
+        # Subscribers to /stream; each gets its own bounded buffer
+        self.events = EventBroker(buffer_size=int(os.getenv("STREAM_BUFFER_SIZE", "256")))
+        
+        # Time and randomness sources; the replay engine swaps in a virtual clock and a fixed seed
+        self.clock = time.time
+        seed = os.getenv("AGENT_RANDOM_SEED")
+        self.rng = random.Random(int(seed) if seed else None)
         
         self.is_running = True
+        self._tick_slots: Optional[asyncio.Semaphore] = None
+        self._register_gauges()
         
-        logger.info(f"🌙 Rahu Agent initialized: {self.agent_address}")
+        logger.info(f"🌙 Rahu Agent initialized: {self.agent_address} ({len(self.networks)} network(s): {', '.join(self.networks)})")
+    
+    def _build_network(self, network_id: str) -> MonitoredNetwork:
+        """Create one network's state from its (possibly network-scoped) configuration"""
+        interval = float(network_env(network_id, "MONITORING_INTERVAL", str(self.monitoring_interval)))
+        min_interval = network_env(network_id, "MONITORING_MIN_INTERVAL")
+        max_interval = network_env(network_id, "MONITORING_MAX_INTERVAL")
+        scheduler = AdaptiveScheduler(
+            interval,
+            min_interval=float(min_interval) if min_interval else None,
+            max_interval=float(max_interval) if max_interval else None
+        )
+        
+        # Live metrics sources; "simulated" keeps the built-in random generator
+        collector = None
+        sources = [name.strip() for name in network_env(network_id, "METRICS_SOURCES", "simulated").split(",") if name.strip()]
+        if sources != ["simulated"]:
+            config = {key: network_env(network_id, key) for key in CONFIG_KEYS}
+            collector = MetricsCollector(
+                build_sources(sources, config),
+                timeout=float(network_env(network_id, "METRICS_SOURCE_TIMEOUT", "2.0")),
+                retries=int(network_env(network_id, "METRICS_SOURCE_RETRIES", "1"))
+            )
+        
+        # Opened in run_async so constructing an agent never touches the disk.
+        # The default network journals to the top-level directory, others to a subdirectory.
+        rollups = MetricsRollups(self.rollup_tiers)
+        journal = None
+        if self.journal_dir:
+            directory = self.journal_dir if network_id == DEFAULT_NETWORK else os.path.join(self.journal_dir, network_id)
+            journal = AgentJournal(
+                directory,
+                flush_interval=self.journal_flush_interval,
+                metrics_retention=self.metrics_retention,
+                proposals_retention=self.proposals_retention,
+                rollups=rollups
+            )
         
-    async def monitor_network(self):
+        return MonitoredNetwork(
+            network_id,
+            metrics_retention=self.metrics_retention,
+            proposals_retention=self.proposals_retention,
+            anomaly_window=self.anomaly_window,
+            ewma_alpha=self.ewma_alpha,
+            scheduler=scheduler,
+            collector=collector,
+            journal=journal,
+            governance_address=network_env(network_id, "AI_GOVERNANCE_ADDRESS"),
+            rollups=rollups
+        )
+    
+    def _build_submitter(self) -> ProposalSubmitter:
+        """Proposal submitter for the governance RPC endpoint and the agent's account"""
+        rpc_url = os.getenv("GOVERNANCE_RPC_URL") or os.getenv("ETHEREUM_RPC_URL")
+        if not rpc_url:
+            raise ValueError("GOVERNANCE_RPC_URL is required when AI_GOVERNANCE_ADDRESS is set")
+        # A private key signs locally; otherwise the node signs for AGENT_ACCOUNT
+        private_key = os.getenv("PRIVATE_KEY")
+        if private_key:
+            sender, signer = local_signer(private_key)
+        else:
+            sender, signer = os.getenv("AGENT_ACCOUNT"), None
+        gas_limit = os.getenv("SUBMIT_GAS_LIMIT")
+        return ProposalSubmitter(
+            JsonRpcClient(rpc_url),
+            sender,
+            signer=signer,
+            window=float(os.getenv("SUBMIT_WINDOW", "5.0")),
+            max_in_flight=int(os.getenv("SUBMIT_MAX_IN_FLIGHT", "4")),
+            gas_price_multiplier=float(os.getenv("SUBMIT_GAS_PRICE_MULTIPLIER", "1.1")),
+            gas_limit=int(gas_limit) if gas_limit else None,
+            replace_after=float(os.getenv("SUBMIT_REPLACE_AFTER", "60"))
+        )
+    
+    def network(self, network_id: Optional[str] = None) -> MonitoredNetwork:
+        """Look up a network by id (the default network when None)"""
+        if network_id is None:
+            return self.default_network
+        try:
+            return self.networks[network_id]
+        except KeyError:
+            raise KeyError(f"Unknown network: {network_id}")
+    
+    async def monitor_all(self):
+        """Run every network's monitor loop concurrently on this event loop"""
+        self._tick_slots = asyncio.Semaphore(self.max_concurrent_ticks)
+        count = len(self.networks)
+        await asyncio.gather(*(
+            self.monitor_network(network, start_delay=network.scheduler.effective_interval * i / count)
+            for i, network in enumerate(self.networks.values())
+        ))
+    
+    async def monitor_network(self, network: Optional[MonitoredNetwork] = None, start_delay: float = 0.0):
         """Monitor network and generate proposals"""
+        network = network or self.default_network
+        name = network.network_id
+        # Stagger the first tick so networks sharing an interval don't all fire together
+        if start_delay:
+            await asyncio.sleep(start_delay)
+        
         while self.is_running:
-            try:
-                logger.info("🔍 Monitoring network metrics...")
+            if self._tick_slots is not None:
+                # FIFO semaphore: when many networks are due at once they take turns
+                async with self._tick_slots:
+                    await self.run_tick(network)
+            else:
+                await self.run_tick(network)
             
-                # Get metrics
-                metrics = await self.fetch_network_metrics()
-                
-                # Store metrics
-                self.metrics_history.append(metrics)
-                
-                logger.info(f"📊 Metrics #{len(self.metrics_history)}: Gas={metrics.gas_price:.1f} Gwei, TPS={metrics.tps}, Congestion={metrics.congestion_level:.1%}")
-                
-                # Check if optimization needed
-                should_opt = await self.should_optimize(metrics)
-                if should_opt:
-                    logger.warning("⚠️  Optimization needed!")
-                    proposal = await self.generate_proposal(metrics)
-                    
-                    if proposal and proposal.confidence_score >= self.min_confidence:
-                        self.proposals.append(proposal)
-                        
-                        logger.success(f"✨ Proposal #{len(self.proposals)} generated: {proposal.proposal_id}")
-                        logger.info(f"   Expected improvement: {proposal.expected_improvement:.2%}")
-                        logger.info(f"   Confidence: {proposal.confidence_score:.2%}")
-                        logger.info(f"   Reasoning: {proposal.reasoning}")
+            self.adapt_interval(network)
+            await network.scheduler.wait()
+            telemetry.TICK_LAG_SECONDS.labels(name).observe(network.scheduler.last_lag)
+    
+    async def run_tick(self, network: Optional[MonitoredNetwork] = None):
+        """One fetch / detect / propose pass for a network"""
+        network = network or self.default_network
+        name = network.network_id
+        tick_started = time.perf_counter()
+        try:
+            logger.info(f"🔍 Monitoring network metrics ({name})...")
+        
+            # Get metrics
+            with FETCH_SECONDS.time():
+                metrics = await self.fetch_network_metrics(network)
+            
+            # Store metrics
+            network.metrics_history.append(metrics)
+            if network.journal:
+                network.journal.record_metrics(metrics)
+            self.events.publish("metrics", metrics.to_dict(), network=name)
+            
+            logger.info(f"📊 [{name}] Metrics #{network.metrics_history.total_count}: Gas={metrics.gas_price:.1f} Gwei, TPS={metrics.tps}, Congestion={metrics.congestion_level:.1%}")
+            
+            # Check if optimization needed
+            with SHOULD_OPTIMIZE_SECONDS.time():
+                should_opt = await self.should_optimize(metrics, network)
+            if should_opt:
+                telemetry.TRIGGERS.labels(name).inc()
+                logger.warning(f"⚠️  [{name}] Optimization needed!")
+                with GENERATE_PROPOSAL_SECONDS.time():
+                    proposal = await self.generate_proposal(metrics, network)
                 
-            except Exception as e:
-                logger.error(f"❌ Error in monitoring: {e}")
+                if proposal and proposal.confidence_score >= self.min_confidence:
+                    self.record_proposal(proposal, network)
+            
+        except Exception as e:
+            telemetry.TICK_ERRORS.labels(name).inc()
+            logger.error(f"❌ Error in monitoring {name}: {e}")
+        
+        network.tick += 1
+        telemetry.TICKS.labels(name).inc()
+        TICK_SECONDS.observe(time.perf_counter() - tick_started)
+    
+    def record_proposal(self, proposal: OptimizationProposal, network: Optional[MonitoredNetwork] = None) -> bool:
+        """Store and journal an accepted proposal unless it repeats the previous tick's"""
+        network = network or self.default_network
+        name = network.network_id
+        if not network.proposals.add(proposal, tick=network.tick):
+            telemetry.PROPOSALS_DEDUPLICATED.labels(name).inc()
+            logger.info(f"♻️  [{name}] Proposal {proposal.proposal_id} repeats the previous tick's; skipped")
+            return False
+        
+        telemetry.PROPOSALS.labels(name).inc()
+        record = proposal.to_dict()
+        if network.journal:
+            network.journal.record_proposal(record)
+        if self.submitter and network.governance_address:
+            self.submitter.submit(record, name, network.governance_address)
+        self.events.publish("proposals", record, network=name)
         
-            await asyncio.sleep(self.monitoring_interval)
+        logger.success(f"✨ [{name}] Proposal #{len(network.proposals)} generated: {proposal.proposal_id}")
+        logger.info(f"   Expected improvement: {proposal.expected_improvement:.2%}")
+        logger.info(f"   Confidence: {proposal.confidence_score:.2%}")
+        logger.info(f"   Reasoning: {proposal.reasoning}")
+        return True
     
-    async def fetch_network_metrics(self) -> NetworkMetrics:
+    def adapt_interval(self, network: Optional[MonitoredNetwork] = None) -> float:
+        """Retune the monitoring cadence from the smoothed congestion and z-score volatility"""
+        network = network or self.default_network
+        stats = network.anomaly_detector.stats
+        if stats.count == 0:
+            return network.scheduler.effective_interval
+        congestion = float(stats.ewma[stats.index["congestion_level"]])
+        volatility = float(abs(stats.zscore).max())
+        return network.scheduler.adapt(congestion, volatility)
+    
+    @property
+    def effective_interval(self) -> float:
+        return self.default_network.scheduler.effective_interval
+    
+    def _register_gauges(self):
+        """Point the scrape-time memory, cadence and chain gauges at this agent, replacing any earlier one's"""
+        per_network = (
+            (telemetry.METRICS_STORE_BYTES, lambda network: network.metrics_history.nbytes),
+            (telemetry.METRICS_STORE_SAMPLES, lambda network: len(network.metrics_history)),
+            (telemetry.PROPOSALS_STORED, lambda network: len(network.proposals)),
+            (telemetry.PROPOSAL_STORE_BYTES, lambda network: network.proposals.nbytes),
+            (telemetry.MONITORING_INTERVAL_SECONDS, lambda network: network.scheduler.effective_interval),
+        )
+        for family, read in per_network:
+            family.clear()
+            for name, network in self.networks.items():
+                family.labels(name).bind(network, read)
+        if self.submitter is not None:
+            telemetry.CHAIN_IN_FLIGHT.bind(self.submitter, lambda submitter: submitter.in_flight)
+        else:
+            telemetry.CHAIN_IN_FLIGHT.set_function(None)
+            telemetry.CHAIN_IN_FLIGHT.set(0)
+    
+    async def fetch_network_metrics(self, network: Optional[MonitoredNetwork] = None) -> NetworkMetrics:
+        network = network or self.default_network
+        if network.collector:
+            return await self.collect_network_metrics(network)
+        
         base_congestion = 0.5
-        time_factor = (time.time() % 300) / 300
+        time_factor = (self.clock() % 300) / 300
         
         metrics = NetworkMetrics(
-            timestamp=int(time.time()),
-            gas_price=random.uniform(30, 180),
-            tps=random.randint(100, 900),
-            block_time=random.uniform(1.8, 2.5),
+            timestamp=int(self.clock()),
+            gas_price=self.rng.uniform(30, 180),
+            tps=self.rng.randint(100, 900),
+            block_time=self.rng.uniform(1.8, 2.5),
             congestion_level=base_congestion + (time_factor * 0.4),
-            active_users=random.randint(5000, 75000)
+            active_users=self.rng.randint(5000, 75000)
         )
         
         return metrics
     
-    async def should_optimize(self, metrics: NetworkMetrics) -> bool:
-        triggers = []
-        
-        if metrics.congestion_level > 0.7:
-            triggers.append(f"High congestion: {metrics.congestion_level:.1%}")
+    async def collect_network_metrics(self, network: Optional[MonitoredNetwork] = None) -> NetworkMetrics:
+        """Fetch all configured sources concurrently and merge them into one sample"""
+        network = network or self.default_network
+        values = await network.collector.collect()
+        if not values:
+            raise MetricsSourceError("No metrics source responded")
         
-        if metrics.gas_price > 120:
-            triggers.append(f"High gas: {metrics.gas_price:.1f} Gwei")
+        # Fields no source reported carry over from the previous sample
+        previous = network.metrics_history.latest()
+        fields = {}
+        for name in ("gas_price", "tps", "block_time", "congestion_level", "active_users"):
+            if name in values:
+                fields[name] = values[name]
+            else:
+                fields[name] = getattr(previous, name) if previous else 0
         
-        if metrics.tps < 250:
-            triggers.append(f"Low TPS: {metrics.tps}")
+        return NetworkMetrics(timestamp=int(self.clock()), **fields)
+    
+    async def should_optimize(self, metrics: NetworkMetrics, network: Optional[MonitoredNetwork] = None) -> bool:
+        """Feed the sample to the streaming detector and check its trigger rules"""
+        network = network or self.default_network
+        triggers = network.anomaly_detector.observe(metrics)
         
         if triggers:
             for trigger in triggers:
@@ -141,95 +407,190 @@ class RahuAgent:
         
         return False
     
-    async def generate_proposal(self, metrics: NetworkMetrics) -> Optional[OptimizationProposal]:
-        """Generate optimization proposal using simple reasoning"""
+    async def generate_proposal(self, metrics: NetworkMetrics, network: Optional[MonitoredNetwork] = None) -> Optional[OptimizationProposal]:
+        """Generate optimization proposal from a cost-model search over candidate parameters"""
+        network = network or self.default_network
+        if self.reasoning is not None:
+            return await self.reason_proposal(metrics, network)
+        current_params = network.current_params
     
-    
-        # Simple reasoning logic (replacing MeTTa for now)
-        confidence = random.uniform(0.75, 0.95)
+        # Built-in optimizer (used when the MeTTa reasoning pool is disabled)
+        confidence = self.rng.uniform(0.75, 0.95)
         
         if confidence < self.min_confidence:
             logger.warning(f"⚠️  Confidence too low: {confidence:.2%} (need {self.min_confidence:.2%})")
             return None
         
-        # Generate proposed parameters
-        proposed_params = {
-            "gas_limit": int(self.current_params["gas_limit"] * random.uniform(1.1, 1.2)),
-            "block_time": self.current_params["block_time"] * random.uniform(0.8, 0.9),
-            "max_tps": int(self.current_params["max_tps"] * random.uniform(1.1, 1.3))
+        # Best candidate on the parameter grid under a cost model fitted on this network's history
+        history = network.metrics_history.window(FIT_WINDOW) if network.metrics_history else {
+            name: [value] for name, value in metrics.to_dict().items()
         }
-        
-        # Calculate expected improvement
-        improvements = []
-        for param in ["gas_limit", "block_time", "max_tps"]:
-            if proposed_params[param] != self.current_params[param]:
-                change = (proposed_params[param] - self.current_params[param]) / self.current_params[param]
-                improvements.append(abs(change))
-        
-        expected_improvement = sum(improvements) / len(improvements) if improvements else 0
+        model = CostModel.fit(history, current_params, congestion=metrics.congestion_level)
+        proposed_params, expected_improvement, prediction = search(model, current_params, self.search_points)
+        if not expected_improvement > 0:
+            logger.info("   Current parameters already score best under the cost model")
+            return None
         
         proposal_id = hashlib.sha256(
             f"{metrics.timestamp}{proposed_params}".encode()
         ).hexdigest()[:16]
         
-        reasoning_text = f"Network congestion detected at {metrics.congestion_level:.1%}. Proposing gas limit increase by {((proposed_params['gas_limit'] - self.current_params['gas_limit']) / self.current_params['gas_limit'] * 100):.1f}% to improve throughput."
+        changes = ", ".join(
+            f"{param} {(proposed_params[param] - current_params[param]) / current_params[param]:+.1%}"
+            for param in SEARCH_PARAMS if proposed_params[param] != current_params[param]
+        )
+        reasoning_text = (
+            f"Network congestion detected at {metrics.congestion_level:.1%}. "
+            f"Best of {candidate_count(self.search_points)} candidates: {changes}. "
+            f"Predicted utilisation {prediction['utilisation']:.1%}, latency {prediction['latency']:.2f}s."
+        )
         
         logger.success(f"🧠 Proposal generated: {confidence:.2%} confidence")
         
         return OptimizationProposal(
             proposal_id=proposal_id,
-            timestamp=int(time.time()),
-            current_params=self.current_params,
+            timestamp=int(self.clock()),
+            current_params=current_params,
             proposed_params=proposed_params,
             expected_improvement=expected_improvement,
             confidence_score=confidence,
             reasoning=reasoning_text
         )
     
+    async def reason_proposal(self, metrics: NetworkMetrics, network: MonitoredNetwork) -> Optional[OptimizationProposal]:
+        """Proposal from the MeTTa engine, evaluated and validated in the reasoning pool"""
+        current_params = network.current_params
+        try:
+            proposed_params, reasoning_text, confidence = await self.reasoning.reason(
+                metrics.to_dict(), current_params, len(network.metrics_history)
+            )
+            if proposed_params == current_params:
+                return None
+            if confidence < self.min_confidence:
+                logger.warning(f"⚠️  Confidence too low: {confidence:.2%} (need {self.min_confidence:.2%})")
+                return None
+            if not await self.reasoning.validate({"current_params": current_params, "proposed_params": proposed_params}):
+                logger.warning("⚠️  Proposal rejected by safety constraints")
+                return None
+        except ReasoningTimeout as e:
+            logger.error(f"❌ Reasoning timed out: {e}")
+            return None
+        
+        proposal_id = hashlib.sha256(
+            f"{metrics.timestamp}{proposed_params}".encode()
+        ).hexdigest()[:16]
+        
+        logger.success(f"🧠 MeTTa proposal generated: {confidence:.2%} confidence")
+        
+        return OptimizationProposal(
+            proposal_id=proposal_id,
+            timestamp=int(self.clock()),
+            current_params=current_params,
+            proposed_params=proposed_params,
+            expected_improvement=self._expected_improvement(current_params, proposed_params),
+            confidence_score=confidence,
+            reasoning=reasoning_text
+        )
+    
+    @staticmethod
+    def _expected_improvement(current_params: Dict, proposed_params: Dict) -> float:
+        improvements = []
+        for param in ["gas_limit", "block_time", "max_tps"]:
+            if proposed_params[param] != current_params[param]:
+                change = (proposed_params[param] - current_params[param]) / current_params[param]
+                improvements.append(abs(change))
+        
+        return sum(improvements) / len(improvements) if improvements else 0
+    
     async def process_chat_message(self, message: str) -> str:
-        message_lower = message.lower()
-        
-        if "status" in message_lower or "health" in message_lower:
-            return f"Active. Monitored {len(self.metrics_history)} metrics, {len(self.proposals)} proposals."
-        elif "proposal" in message_lower:
-            if self.proposals:
-                latest = self.proposals[-1]
-                return f"Latest: {latest.reasoning} (Confidence: {latest.confidence_score:.2%})"
-            return "No proposals yet."
-        elif "metrics" in message_lower:
-            if self.metrics_history:
-                latest = self.metrics_history[-1]
-                return f"Gas={latest.gas_price:.1f} Gwei, TPS={latest.tps}, Congestion={latest.congestion_level:.1%}"
-            return "No metrics yet."
+        return self.chat.respond(message)
+    
+    def state_version(self) -> Tuple:
+        """Changes whenever any network stores a metric or proposal; keys the chat response cache"""
+        return (self.is_running,) + tuple(
+            (network.metrics_history.total_count, network.proposals.version) for network in self.networks.values()
+        )
+    
+    def restore_from_journal(self, network: Optional[MonitoredNetwork] = None):
+        """Replay journaled metrics and proposals into memory"""
+        network = network or self.default_network
+        started = time.perf_counter()
+        network.journal.open()
+        
+        history = network.metrics_history
+        through = network.journal.restore_rollups()
+        if through is None:
+            history.extend(network.journal.replay_metrics(self.metrics_retention))
         else:
-            return "Ask about: status, proposals, or metrics"
+            # The snapshot holds the long history; fold in only what was journaled after it
+            columns = network.journal.replay_metrics()
+            newer = columns["timestamp"] > through
+            history.rollups.extend({name: values[newer] for name, values in columns.items()})
+            history.extend({name: values[-self.metrics_retention:] for name, values in columns.items()}, fold=False)
+            history.total_count = history.rollups.samples
+        # Warm the rolling statistics with the tail of the restored history
+        network.anomaly_detector.warm(network.metrics_history[-self.anomaly_window:])
+        
+        for record in network.journal.replay_proposals(self.proposals_retention):
+            network.proposals.add(OptimizationProposal(**record))
+        
+        elapsed = time.perf_counter() - started
+        logger.info(f"📼 [{network.network_id}] Restored {len(network.metrics_history)} metrics and {len(network.proposals)} proposals in {elapsed * 1000:.1f} ms")
+    
+    async def run_async(self):
+        """Serve the HTTP API and monitor every network on one event loop"""
+        # Listen first so /health answers while journals replay and workers warm up
+        server = AgentHTTPServer(self, self.http_host, self.http_port)
+        await server.start()
+        startup = telemetry.process_uptime()
+        telemetry.STARTUP_SECONDS.set(startup)
+        print(f"✅ HTTP server started on port {server.port} ({startup * 1000:.0f} ms after launch)")
+        
+        flushers = []
+        try:
+            for network in self.networks.values():
+                if network.journal:
+                    self.restore_from_journal(network)
+                    flushers.append(asyncio.create_task(network.journal.run_flusher()))
+                    # Serve requests that arrived during the replay before the next network
+                    await asyncio.sleep(0)
+            
+            if self.reasoning:
+                await self.reasoning.start()
+                print(f"✅ Reasoning pool ready ({self.reasoning.workers} workers)")
+            if self.submitter:
+                await self.submitter.start()
+                print(f"✅ Submitting proposals on-chain as {self.submitter.sender}")
+            await self.monitor_all()
+        finally:
+            await server.close()
+            if self.reasoning:
+                await self.reasoning.close()
+            if self.submitter:
+                await self.submitter.close()
+            for network in self.networks.values():
+                if network.collector:
+                    await network.collector.close()
+            for flusher in flushers:
+                flusher.cancel()
+            await asyncio.gather(*flushers, return_exceptions=True)
+            for network in self.networks.values():
+                if network.journal:
+                    network.journal.close()
     
     def run(self):
         """Run the agent"""
         print("=" * 60)
         print("🏃 Starting Rahu Agent...")
         print(f"📍 Agent address: {self.agent_address}")
-        print(f"⏱️  Monitoring interval: {self.monitoring_interval}s")
-        print(f"🌐 HTTP API: http://localhost:8001")
+        print(f"🛰️  Networks: {', '.join(self.networks)}")
+        print(f"⏱️  Monitoring interval: {self.monitoring_interval}s (adaptive {self.scheduler.min_interval}-{self.scheduler.max_interval}s)")
+        print(f"🌐 HTTP API: http://{self.http_host}:{self.http_port}")
         print("=" * 60)
         
-        # Start HTTP server in a separate thread
-        def run_server():
-            handler = create_handler(self)
-            httpd = HTTPServer(('localhost', 8001), handler)
-            print("✅ HTTP server started on port 8001")
-            httpd.serve_forever()
-        
-        server_thread = threading.Thread(target=run_server, daemon=True)
-        server_thread.start()
-        
-        # Start monitoring
-        async def run_monitoring():
-            await self.monitor_network()
-        
         # Run the agent
         try:
-            asyncio.run(run_monitoring())
+            asyncio.run(self.run_async())
         except KeyboardInterrupt:
             print("\n👋 Agent stopped by user")
             self.is_running = False
@@ -237,106 +598,7 @@ class RahuAgent:
             print(f"❌ Fatal error: {e}")
             self.is_running = False
 
-class AgentHTTPHandler(BaseHTTPRequestHandler):
-    def __init__(self, agent, *args, **kwargs):
-        self.agent = agent
-        super().__init__(*args, **kwargs)
-    
-    def do_GET(self):
-        if self.path == '/health':
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            
-            response = {
-                "status": "healthy",
-                "agent_address": self.agent.agent_address,
-                "timestamp": int(time.time())
-            }
-            self.wfile.write(json.dumps(response).encode())
-            
-        elif self.path == '/status':
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            
-            response = {
-                "status": "active" if self.agent.is_running else "inactive",
-                "metrics_count": len(self.agent.metrics_history),
-                "proposals_count": len(self.agent.proposals),
-                "last_check": int(time.time()),
-                "agent_address": self.agent.agent_address
-            }
-            self.wfile.write(json.dumps(response).encode())
-            
-        elif self.path == '/proposals/latest':
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            
-            if self.agent.proposals:
-                latest = self.agent.proposals[-1]
-                response = {
-                    "proposal_id": latest.proposal_id,
-                    "reasoning": latest.reasoning,
-                    "confidence_score": latest.confidence_score,
-                    "timestamp": latest.timestamp
-                }
-            else:
-                response = {"error": "No proposals yet"}
-            self.wfile.write(json.dumps(response).encode())
-            
-        else:
-            self.send_response(404)
-            self.end_headers()
-    
-    def do_POST(self):
-        if self.path == '/chat':
-            content_length = int(self.headers['Content-Length'])
-            post_data = self.rfile.read(content_length)
-            
-            try:
-                data = json.loads(post_data.decode('utf-8'))
-                message = data.get("message", "")
-                
-                # Process message (this is synchronous, but we'll make it work)
-                response_text = asyncio.run(self.agent.process_chat_message(message))
-                
-                self.send_response(200)
-                self.send_header('Content-type', 'application/json')
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.end_headers()
-                
-                response = {
-                    "response": response_text,
-                    "agent_address": self.agent.agent_address,
-                    "timestamp": int(time.time())
-                }
-                self.wfile.write(json.dumps(response).encode())
-                
-            except Exception as e:
-                self.send_response(500)
-                self.send_header('Content-type', 'application/json')
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.end_headers()
-                response = {"error": str(e)}
-                self.wfile.write(json.dumps(response).encode())
-        else:
-            self.send_response(404)
-            self.end_headers()
-    
-    def log_message(self, format, *args):
-        # Suppress default logging
-        pass
-
-def create_handler(agent):
-    def handler(*args, **kwargs):
-        return AgentHTTPHandler(agent, *args, **kwargs)
-    return handler
-
+# The package uses relative imports: run as `python -m src.rahu_agent` or via scripts/start_agent.py
 if __name__ == "__main__":
     agent = RahuAgent()
-    agent.run()
\ No newline at end of file
+    agent.run()
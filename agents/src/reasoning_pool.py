@@ -0,0 +1,167 @@
+"""
+Process pool for MeTTa reasoning
+Runs reasoning and validation in warm worker processes behind an async facade
+"""
+
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from . import telemetry
+
+# Round trip to a worker, as seen from the event loop
+REASONING_POOL_SECONDS = telemetry.STAGE_SECONDS.labels("reasoning_pool")
+
+# Reasoning engine owned by each worker process, built once by the initializer
+_engine = None
+
+
+def _init_worker():
+    """Load the knowledge base once per worker so calls start warm"""
+    global _engine
+    from loguru import logger
+    from . import metta_reasoning
+    # Per-call info logs from every worker would flood the parent's stderr
+    logger.disable(metta_reasoning.__name__)
+    _engine = metta_reasoning.MeTTaReasoningEngine()
+
+
+def _worker_ready() -> int:
+    return os.getpid()
+
+
+def _reason(metrics: Dict[str, float], current_params: Dict[str, float], history_length: int):
+    return _engine.reason_about_optimization(metrics, current_params, history_length)
+
+
+def _reason_batch(metrics, current_params, history_length):
+    return _engine.reason_about_optimization_batch(metrics, current_params, history_length)
+
+
+def _validate(proposal: Dict) -> bool:
+    return _engine.validate_proposal(proposal)
+
+
+def _validate_batch(proposals: List[Dict]) -> List[Dict]:
+    return _engine.validate_proposals(proposals)
+
+
+class ReasoningTimeout(Exception):
+    """Raised when a reasoning call exceeds its deadline"""
+    pass
+
+
+class ReasoningPool:
+    """
+    Warm pool of reasoning worker processes
+
+    Each worker builds its own MeTTaReasoningEngine when it starts, so a
+    call only pays for the evaluation itself. Awaiting a call never blocks
+    the event loop. Cancelling or timing out a call drops it if it hasn't
+    started. A call still running when its deadline passes can't be
+    interrupted inside hyperon, and a ProcessPoolExecutor can't lose one
+    worker without breaking, so the pool is torn down and restarted rather
+    than leaving a worker stuck. Other calls in flight on the old pool are
+    run again on the new one (within their own deadlines) instead of
+    failing with it, and only the first failure per pool restarts it.
+    """
+
+    def __init__(self, workers: Optional[int] = None, timeout: float = 5.0, start_method: str = "spawn"):
+        self.workers = workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self.start_method = start_method
+        self.restarts = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    async def start(self):
+        """Start the workers and wait until each has loaded the knowledge base"""
+        if self._executor is not None:
+            return
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context(self.start_method),
+            initializer=_init_worker,
+        )
+        loop = asyncio.get_running_loop()
+        # ProcessPoolExecutor starts workers lazily; one call per worker brings them all up
+        await asyncio.gather(*(
+            loop.run_in_executor(self._executor, _worker_ready) for _ in range(self.workers)
+        ))
+
+    async def close(self):
+        if self._executor is not None:
+            executor, self._executor = self._executor, None
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, lambda: executor.shutdown(wait=True, cancel_futures=True))
+
+    async def submit(self, function: Callable, *args, timeout: Optional[float] = None):
+        """Run a picklable function in a worker and await its result"""
+        if self._executor is None:
+            await self.start()
+        loop = asyncio.get_running_loop()
+        limit = timeout if timeout is not None else self.timeout
+        deadline = loop.time() + limit
+        started = time.perf_counter()
+        retried = False
+        try:
+            while True:
+                executor = self._executor
+                if executor is None:
+                    await self.start()
+                    executor = self._executor
+                future = loop.run_in_executor(executor, function, *args)
+                try:
+                    return await asyncio.wait_for(future, max(0.0, deadline - loop.time()))
+                except asyncio.TimeoutError:
+                    telemetry.REASONING_TIMEOUTS.inc()
+                    self._restart(executor)
+                    raise ReasoningTimeout(f"{getattr(function, '__name__', 'call')} exceeded {limit}s")
+                except BrokenProcessPool:
+                    if self._executor is not executor and not retried:
+                        # Another call already replaced the pool (its deadline passed or a worker
+                        # died); this call was only caught in the teardown, so run it again
+                        retried = True
+                        continue
+                    # A worker died (e.g. a hyperon panic); replace the pool and report the failure
+                    self._restart(executor)
+                    raise
+        finally:
+            REASONING_POOL_SECONDS.observe(time.perf_counter() - started)
+
+    def _restart(self, executor: ProcessPoolExecutor):
+        """Replace ``executor``, terminating workers that may still be busy, unless it was already replaced"""
+        if executor is None or self._executor is not executor:
+            return
+        self._executor = None
+        self.restarts += 1
+        processes = list(getattr(executor, "_processes", {}).values())
+        executor.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+
+    async def reason(self, metrics: Dict[str, float], current_params: Dict[str, float], history_length: int,
+                     timeout: Optional[float] = None) -> Tuple[Dict[str, float], str, float]:
+        return await self.submit(_reason, metrics, current_params, history_length, timeout=timeout)
+
+    async def reason_batch(self, metrics: Dict[str, Sequence[float]], current_params, history_length,
+                           timeout: Optional[float] = None):
+        return await self.submit(_reason_batch, metrics, current_params, history_length, timeout=timeout)
+
+    async def validate(self, proposal: Dict, timeout: Optional[float] = None) -> bool:
+        return await self.submit(_validate, proposal, timeout=timeout)
+
+    async def validate_batch(self, proposals: List[Dict], timeout: Optional[float] = None) -> List[Dict]:
+        return await self.submit(_validate_batch, proposals, timeout=timeout)
+
+    async def reason_many(self, snapshots: List[Dict[str, float]], current_params: Dict[str, float],
+                          history_length: int, timeout: Optional[float] = None) -> List[Tuple]:
+        """Reason about several snapshots (or networks) in parallel across the workers"""
+        return list(await asyncio.gather(*(
+            self.reason(metrics, current_params, history_length, timeout=timeout) for metrics in snapshots
+        )))
+
@@ -0,0 +1,202 @@
+"""
+Deterministic replay engine for the Rahu Agent pipeline
+Drives trigger, proposal and reasoning logic from recorded metrics under a virtual clock
+"""
+
+import csv
+import json
+import os
+import time
+from typing import Callable, Dict, List, Optional
+import numpy as np
+
+from . import rahu_agent
+from .metrics_store import METRIC_FIELDS, METRIC_DTYPES, INTEGER_FIELDS, NetworkMetrics
+from .journal import AgentJournal
+
+PARAMS = ("gas_limit", "block_time", "max_tps")
+
+
+class VirtualClock:
+    """Clock that only moves when the replay engine advances it"""
+    def __init__(self, start: float = 0.0):
+        self.now = start
+
+    def __call__(self) -> float:
+        return self.now
+
+    def set(self, timestamp: float):
+        self.now = timestamp
+
+
+def load_recording(path: str) -> Dict[str, np.ndarray]:
+    """
+    Load recorded metrics as columns
+
+    Accepts an agent journal (``metrics.journal`` or the directory holding
+    it), a CSV file with a header row, or a JSON-lines file with one sample
+    per line.
+    """
+    if os.path.isdir(path) or path.endswith(".journal"):
+        directory = path if os.path.isdir(path) else os.path.dirname(path) or "."
+        return AgentJournal(directory).replay_metrics()
+
+    if path.endswith(".csv"):
+        with open(path, newline="") as f:
+            rows = list(csv.DictReader(f))
+    elif path.endswith(".jsonl"):
+        with open(path) as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+    else:
+        raise ValueError(f"Unsupported recording format: {path}")
+
+    return {
+        name: np.array([float(row[name]) for row in rows]).astype(METRIC_DTYPES[name])
+        for name in METRIC_FIELDS
+    }
+
+
+class StageTimer:
+    """Accumulates per-call durations for one pipeline stage"""
+    def __init__(self):
+        self.samples: List[float] = []
+
+    def summary(self) -> Dict[str, float]:
+        if not self.samples:
+            return {"calls": 0, "total_ms": 0.0, "mean_us": 0.0, "p99_us": 0.0}
+        values = np.asarray(self.samples)
+        return {
+            "calls": len(values),
+            "total_ms": float(values.sum() * 1e3),
+            "mean_us": float(values.mean() * 1e6),
+            "p99_us": float(np.percentile(values, 99) * 1e6),
+        }
+
+
+class ReplayEngine:
+    """
+    Replays recorded traffic through should_optimize, generate_proposal and
+    the MeTTa reasoning engine
+
+    Every run uses a fresh agent with a virtual clock and a seeded RNG, so
+    the same recording and seed always produce the same proposals. Samples
+    are fed back-to-back with no sleeping, and reasoning for all triggered
+    samples is scored in one batch call.
+    """
+
+    def __init__(self, columns: Dict[str, np.ndarray], seed: int = 0,
+                 agent_factory: Optional[Callable] = None, reasoning_engine=None):
+        self.columns = columns
+        self.seed = seed
+        self.agent_factory = agent_factory
+        self.reasoning_engine = reasoning_engine
+
+    def _make_agent(self):
+        agent = self.agent_factory() if self.agent_factory else rahu_agent.RahuAgent()
+        agent.journal = None
+        agent.clock = VirtualClock()
+        agent.rng.seed(self.seed)
+        return agent
+
+    async def run(self) -> Dict:
+        """Replay every sample and return the summary report"""
+        was_enabled = rahu_agent.logger.enabled
+        rahu_agent.logger.enabled = False
+        try:
+            return await self._run()
+        finally:
+            rahu_agent.logger.enabled = was_enabled
+
+    async def _run(self) -> Dict:
+        agent = self._make_agent()
+        timestamps = self.columns["timestamp"]
+        count = len(timestamps)
+        columns = [(name, self.columns[name]) for name in METRIC_FIELDS]
+        timers = {"should_optimize": StageTimer(), "generate_proposal": StageTimer(), "reasoning": StageTimer()}
+
+        triggered: List[int] = []
+        proposals = []
+        started = time.perf_counter()
+
+        for i in range(count):
+            values = {
+                name: int(column[i]) if name in INTEGER_FIELDS else float(column[i])
+                for name, column in columns
+            }
+            metrics = NetworkMetrics(**values)
+            agent.clock.set(values["timestamp"])
+            agent.metrics_history.append(metrics)
+
+            t0 = time.perf_counter()
+            should_opt = await agent.should_optimize(metrics)
+            timers["should_optimize"].samples.append(time.perf_counter() - t0)
+            if not should_opt:
+                continue
+            triggered.append(i)
+
+            t0 = time.perf_counter()
+            proposal = await agent.generate_proposal(metrics)
+            timers["generate_proposal"].samples.append(time.perf_counter() - t0)
+            if proposal and proposal.confidence_score >= agent.min_confidence:
+                if agent.proposals.add(proposal, tick=i):
+                    proposals.append(proposal)
+
+        reasoning = self._score_reasoning(agent, triggered, timers["reasoning"])
+        wall = time.perf_counter() - started
+        simulated = float(timestamps[-1] - timestamps[0]) if count > 1 else 0.0
+
+        return {
+            "samples": count,
+            "seed": self.seed,
+            "triggers": len(triggered),
+            "proposals_fired": len(proposals),
+            "trigger_rate": len(triggered) / count if count else 0.0,
+            "proposals": [
+                {
+                    "proposal_id": p.proposal_id,
+                    "timestamp": p.timestamp,
+                    "proposed_params": p.proposed_params,
+                    "confidence_score": p.confidence_score,
+                }
+                for p in proposals
+            ],
+            "parameter_trajectories": self._trajectories(proposals),
+            "reasoning": reasoning,
+            "timings": {name: timer.summary() for name, timer in timers.items()},
+            "wall_seconds": wall,
+            "simulated_seconds": simulated,
+            "speedup": simulated / wall if wall > 0 else 0.0,
+        }
+
+    def _score_reasoning(self, agent, triggered: List[int], timer: StageTimer) -> Dict:
+        if self.reasoning_engine is None or not triggered:
+            return {}
+        index = np.asarray(triggered)
+        metrics = {name: self.columns[name][index] for name in ("congestion_level", "gas_price", "tps")}
+        history = np.minimum(index + 1, agent.metrics_retention)
+
+        t0 = time.perf_counter()
+        proposed, explanations, confidence = self.reasoning_engine.reason_about_optimization_batch(
+            metrics, agent.current_params, history
+        )
+        timer.samples.append(time.perf_counter() - t0)
+
+        return {
+            "mean_confidence": float(confidence.mean()),
+            "above_min_confidence": int((confidence >= agent.min_confidence).sum()),
+            "parameter_ranges": {
+                name: {"min": float(values.min()), "max": float(values.max()), "mean": float(values.mean())}
+                for name, values in proposed.items()
+            },
+            "no_action": sum(1 for text in explanations if text == "No optimization needed"),
+        }
+
+    @staticmethod
+    def _trajectories(proposals) -> Dict[str, Dict[str, List[float]]]:
+        return {
+            name: {
+                "timestamps": [p.timestamp for p in proposals],
+                "values": [p.proposed_params[name] for p in proposals],
+            }
+            for name in PARAMS
+        }
@@ -0,0 +1,252 @@
+"""
+Compiled evaluator for the MeTTa knowledge base
+Turns the rule definitions into Python closures so hot-path decisions skip the interpreter
+"""
+
+import operator
+import os
+import re
+from typing import Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+# Rules shipped with the agent, used when METTA_KNOWLEDGE_BASE_PATH is unset
+DEFAULT_KNOWLEDGE_BASE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "knowledge_base")
+
+_TOKEN = re.compile(r';[^\n]*|\s+|(\()|(\))|([^\s()]+)')
+
+
+def knowledge_base_files(path: str) -> List[str]:
+    """The .metta files at ``path`` (a file, or a directory loaded in name order)"""
+    if os.path.isdir(path):
+        return [os.path.join(path, name) for name in sorted(os.listdir(path)) if name.endswith(".metta")]
+    if os.path.isfile(path):
+        return [path]
+    raise FileNotFoundError(f"No knowledge base at {path}")
+
+
+class Variable:
+    """A ``$name`` pattern variable"""
+    __slots__ = ("name",)
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __repr__(self) -> str:
+        return f"${self.name}"
+
+
+def _atom(token: str):
+    if token.startswith("$"):
+        return Variable(token[1:])
+    if token in ("True", "False"):
+        return token == "True"
+    try:
+        return int(token)
+    except ValueError:
+        pass
+    try:
+        return float(token)
+    except ValueError:
+        return token
+
+
+def parse(text: str) -> List:
+    """Parse MeTTa source into nested tuples of symbols, numbers, booleans and variables"""
+    stack: List[list] = [[]]
+    for match in _TOKEN.finditer(text):
+        opened, closed, token = match.groups()
+        if opened:
+            stack.append([])
+        elif closed:
+            if len(stack) == 1:
+                raise ValueError("Unbalanced ')' in knowledge base")
+            expression = tuple(stack.pop())
+            stack[-1].append(expression)
+        elif token:
+            stack[-1].append(_atom(token))
+    if len(stack) != 1:
+        raise ValueError("Unbalanced '(' in knowledge base")
+    return stack[0]
+
+
+def format_value(value) -> str:
+    """Render a compiled result the way MeTTa prints it"""
+    if isinstance(value, tuple):
+        return "(" + " ".join(format_value(item) for item in value) + ")"
+    return str(value)
+
+
+def _divide(a, b):
+    # MeTTa numbers keep integer division integral (truncating toward zero)
+    if type(a) is int and type(b) is int:
+        quotient = abs(a) // abs(b)
+        return quotient if (a >= 0) == (b >= 0) else -quotient
+    if isinstance(a, np.ndarray) or isinstance(b, np.ndarray):
+        if np.issubdtype(np.result_type(a, b), np.integer):
+            return np.fix(np.true_divide(a, b)).astype(np.int64)
+    return a / b
+
+
+def _logical(vectorized: Callable, scalar: Callable) -> Callable:
+    def apply(*args):
+        if any(isinstance(arg, np.ndarray) for arg in args):
+            return vectorized(*args)
+        return scalar(*args)
+    return apply
+
+
+# Grounded operations, applied to evaluated arguments
+BUILTINS: Dict[str, Callable] = {
+    "+": operator.add,
+    "-": operator.sub,
+    "*": operator.mul,
+    "/": _divide,
+    ">": operator.gt,
+    "<": operator.lt,
+    ">=": operator.ge,
+    "<=": operator.le,
+    "==": operator.eq,
+    "and": _logical(np.logical_and, lambda a, b: a and b),
+    "or": _logical(np.logical_or, lambda a, b: a or b),
+    "not": _logical(np.logical_not, operator.not_),
+}
+
+
+class CompiledRules:
+    """
+    Rule functions from a knowledge base, compiled into closures
+
+    Every ``(= (name args...) body)`` definition becomes a Python callable
+    with MeTTa's semantics for this rule set: argument patterns are matched
+    against tuples, ``if`` evaluates one branch, grounded arithmetic and
+    comparisons run natively, and calls with no matching definition are
+    returned unreduced as tuples (``("no-action",)``). Numeric rules also
+    accept NumPy arrays, with ``if`` becoming an element-wise select.
+    """
+
+    def __init__(self, definitions: Sequence):
+        clauses: Dict[str, List] = {}
+        for form in definitions:
+            if not isinstance(form, tuple) or not form:
+                raise ValueError(f"Unsupported knowledge base form: {format_value(form)}")
+            if form[0] == ":":
+                continue
+            if form[0] != "=" or len(form) != 3 or not isinstance(form[1], tuple) or not form[1]:
+                raise ValueError(f"Unsupported knowledge base form: {format_value(form)}")
+            head, body = form[1], form[2]
+            clauses.setdefault(head[0], []).append((head[1:], body))
+
+        self.functions: Dict[str, Callable] = {}
+        for name, definitions_for_name in clauses.items():
+            self.functions[name] = self._compile_function(name, [
+                (len(patterns), self._compile_patterns(patterns), self._compile(body))
+                for patterns, body in definitions_for_name
+            ])
+
+    def __getitem__(self, name: str) -> Callable:
+        return self.functions[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.functions
+
+    @staticmethod
+    def _compile_function(name: str, clauses: List) -> Callable:
+        def call(*args):
+            for arity, match, body in clauses:
+                if arity == len(args):
+                    env: Dict[str, object] = {}
+                    if match(args, env):
+                        return body(env)
+            return (name,) + args
+        call.__name__ = name
+        return call
+
+    def _compile_patterns(self, patterns: Tuple) -> Callable:
+        matchers = [self._compile_pattern(pattern) for pattern in patterns]
+
+        def match(values, env) -> bool:
+            for matcher, value in zip(matchers, values):
+                if not matcher(value, env):
+                    return False
+            return True
+        return match
+
+    def _compile_pattern(self, pattern) -> Callable:
+        if isinstance(pattern, Variable):
+            name = pattern.name
+
+            def bind(value, env) -> bool:
+                if name in env:
+                    return env[name] is value or env[name] == value
+                env[name] = value
+                return True
+            return bind
+        if isinstance(pattern, tuple):
+            parts = [self._compile_pattern(part) for part in pattern]
+            length = len(pattern)
+
+            def destructure(value, env) -> bool:
+                if not isinstance(value, tuple) or len(value) != length:
+                    return False
+                for part, item in zip(parts, value):
+                    if not part(item, env):
+                        return False
+                return True
+            return destructure
+
+        def literal(value, env) -> bool:
+            return not isinstance(value, np.ndarray) and value == pattern
+        return literal
+
+    def _compile(self, expression) -> Callable:
+        if isinstance(expression, Variable):
+            name = expression.name
+            return lambda env: env[name]
+        if not isinstance(expression, tuple):
+            return lambda env: expression
+        if not expression:
+            return lambda env: ()
+
+        head, args = expression[0], [self._compile(arg) for arg in expression[1:]]
+        if head == "if" and len(args) == 3:
+            condition, then, otherwise = args
+
+            def branch(env):
+                test = condition(env)
+                if isinstance(test, np.ndarray):
+                    return np.where(test, then(env), otherwise(env))
+                return then(env) if test else otherwise(env)
+            return branch
+
+        if head in BUILTINS:
+            function = BUILTINS[head]
+            if len(args) == 2:
+                left, right = args
+                return lambda env: function(left(env), right(env))
+            return lambda env: function(*[arg(env) for arg in args])
+
+        functions = self.functions
+        if isinstance(head, str):
+            # Resolved at call time so definitions may refer to later ones
+            def apply(env):
+                values = [arg(env) for arg in args]
+                function = functions.get(head)
+                return function(*values) if function else (head, *values)
+            return apply
+
+        head_value = self._compile(head)
+        return lambda env: (head_value(env), *[arg(env) for arg in args])
+
+
+def compile_rules(text: str) -> CompiledRules:
+    return CompiledRules(parse(text))
+
+
+def compile_knowledge_base(path: str = DEFAULT_KNOWLEDGE_BASE) -> CompiledRules:
+    """Compile every definition in a knowledge-base file or directory"""
+    definitions = []
+    for filename in knowledge_base_files(path):
+        with open(filename, encoding="utf-8") as f:
+            definitions.extend(parse(f.read()))
+    return CompiledRules(definitions)
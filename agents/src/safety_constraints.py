@@ -0,0 +1,83 @@
+"""
+Safety constraints for proposed parameters
+Compiled once from the knowledge base and checked for a single proposal or a whole batch at a time
+"""
+
+import os
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+
+from .rule_compiler import DEFAULT_KNOWLEDGE_BASE, CompiledRules, compile_knowledge_base
+
+# Rule bounding each parameter, called as (rule current proposed)
+SAFETY_RULES = {"gas_limit": "safe-gas-limit", "block_time": "safe-block-time", "max_tps": "safe-tps"}
+
+# Used when the configured knowledge base does not define the safety rules itself
+SAFETY_KNOWLEDGE_BASE = os.path.join(DEFAULT_KNOWLEDGE_BASE, "safety.metta")
+
+
+@lru_cache(maxsize=None)
+def load_safety_rules(path: str = SAFETY_KNOWLEDGE_BASE) -> CompiledRules:
+    """The compiled safety rules, parsed once per process and path"""
+    return compile_knowledge_base(path)
+
+
+def defines_safety_rules(rules: Optional[CompiledRules]) -> bool:
+    return rules is not None and all(rule in rules for rule in SAFETY_RULES.values())
+
+
+def check_columns(current: Dict[str, np.ndarray], proposed: Dict[str, np.ndarray],
+                  rules: Optional[CompiledRules] = None) -> Dict[str, np.ndarray]:
+    """
+    Pass/fail of every parameter's rule over columns of current and proposed values
+
+    Values are floats or float arrays that broadcast together, so a scalar
+    current value can be checked against an array of candidates; plain
+    floats take the rules' scalar path. Parameters missing from either side
+    are not checked, and NaN entries (a proposal without that parameter)
+    pass.
+    """
+    rules = rules or load_safety_rules()
+    passed = {}
+    for param, rule in SAFETY_RULES.items():
+        if param not in current or param not in proposed:
+            continue
+        old, new = current[param], proposed[param]
+        # NaN is the only value unequal to itself
+        passed[param] = rules[rule](old, new) | (old != old) | (new != new)
+    return passed
+
+
+def validate_batch(proposals: Sequence[Dict], rules: Optional[CompiledRules] = None) -> List[Dict]:
+    """
+    Check proposals (``current_params`` / ``proposed_params`` dicts) in one pass per rule
+
+    Returns, per proposal, ``{"valid": bool, "violations": {param: detail}}``
+    where each detail names the failed ``rule`` with the ``current`` and
+    ``proposed`` values and their ``ratio``. Only failing entries are
+    expanded back into Python objects.
+    """
+    def column(side: str, param: str):
+        values = [proposal.get(side, {}).get(param, np.nan) for proposal in proposals]
+        # A single proposal is checked on plain floats, skipping array overhead
+        return float(values[0]) if len(values) == 1 else np.array(values, dtype=np.float64)
+
+    current = {param: column("current_params", param) for param in SAFETY_RULES}
+    proposed = {param: column("proposed_params", param) for param in SAFETY_RULES}
+
+    results = [{"valid": True, "violations": {}} for _ in proposals]
+    for param, passed in check_columns(current, proposed, rules).items():
+        if passed is True or np.all(passed):
+            continue
+        old_values, new_values = np.atleast_1d(current[param]), np.atleast_1d(proposed[param])
+        for i in np.flatnonzero(np.logical_not(passed)):
+            old, new = float(old_values[i]), float(new_values[i])
+            results[i]["valid"] = False
+            results[i]["violations"][param] = {
+                "rule": SAFETY_RULES[param],
+                "current": old,
+                "proposed": new,
+                "ratio": new / old if old else float("inf"),
+            }
+    return results
@@ -0,0 +1,98 @@
+"""
+Adaptive monitoring scheduler for the Rahu Agent
+Keeps a drift-free cadence whose interval follows network pressure
+"""
+
+import asyncio
+from typing import Optional
+
+
+def _clamp(value: float, low: float = 0.0, high: float = 1.0) -> float:
+    return max(low, min(high, value))
+
+
+class AdaptiveScheduler:
+    """
+    Drift-free tick scheduler with a load-dependent interval
+
+    Ticks are scheduled from the previous *scheduled* time rather than the
+    time the iteration finished, so slow iterations do not push the cadence
+    back. Under congestion or volatility the interval tightens immediately
+    toward ``min_interval``. When the network is calm it backs off gradually
+    toward ``max_interval``.
+    """
+
+    def __init__(self, base_interval: float, min_interval: Optional[float] = None,
+                 max_interval: Optional[float] = None, backoff_factor: float = 1.5):
+        self.base_interval = base_interval
+        self.min_interval = min_interval if min_interval is not None else base_interval / 10
+        self.max_interval = max_interval if max_interval is not None else base_interval * 4
+        if not 0 < self.min_interval <= self.base_interval <= self.max_interval:
+            raise ValueError("intervals must satisfy 0 < min <= base <= max")
+        self.backoff_factor = backoff_factor
+
+        self.effective_interval = base_interval
+        self.pressure = 0.0
+        self.last_lag = 0.0
+        self.missed_ticks = 0
+        self._last_tick: Optional[float] = None
+
+    def adapt(self, congestion_level: float, max_abs_zscore: float) -> float:
+        """
+        Recompute the interval from current network conditions
+
+        Pressure runs from -1 (calm) through 0 (normal) to 1 (under load) and
+        maps geometrically onto [max_interval, base_interval, min_interval].
+        """
+        load = max(
+            _clamp((congestion_level - 0.5) / 0.2),
+            _clamp((max_abs_zscore - 1.0) / 2.0),
+        )
+        if load > 0:
+            pressure = load
+        else:
+            calm = _clamp((0.5 - congestion_level) / 0.2)
+            pressure = -calm
+        self.pressure = pressure
+
+        if pressure >= 0:
+            target = self.base_interval * (self.min_interval / self.base_interval) ** pressure
+        else:
+            target = self.base_interval * (self.max_interval / self.base_interval) ** -pressure
+
+        if target < self.effective_interval:
+            # React to load right away
+            self.effective_interval = target
+        else:
+            # Relax gradually so one quiet sample doesn't stretch the cadence
+            self.effective_interval = min(target, self.effective_interval * self.backoff_factor)
+        return self.effective_interval
+
+    async def wait(self):
+        """Sleep until the next scheduled tick"""
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        if self._last_tick is None:
+            self._last_tick = now
+
+        target = self._last_tick + self.effective_interval
+        if target > now:
+            await asyncio.sleep(target - now)
+            self._last_tick = target
+            self.last_lag = loop.time() - target
+        else:
+            # Overran one or more ticks: count them and start the next one now
+            self.missed_ticks += int((now - target) // self.effective_interval)
+            self.last_lag = now - target
+            self._last_tick = now
+
+    def to_dict(self):
+        return {
+            "effective_interval": self.effective_interval,
+            "base_interval": self.base_interval,
+            "min_interval": self.min_interval,
+            "max_interval": self.max_interval,
+            "pressure": self.pressure,
+            "last_lag": self.last_lag,
+            "missed_ticks": self.missed_ticks,
+        }
@@ -0,0 +1,218 @@
+"""
+Streaming statistics and anomaly detection for Rahu Protocol
+Rolling-window statistics updated incrementally on every sample
+"""
+
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+
+# Metrics the detector tracks, in column order
+TRACKED_METRICS = ("gas_price", "tps", "congestion_level")
+
+STATISTICS = ("value", "ewma", "mean", "std", "zscore", "p50", "p95", "p99")
+
+
+class StreamingStats:
+    """
+    Rolling statistics over a fixed window of vector samples
+
+    Mean and variance use a sliding Welford update and the EWMA is updated in
+    place, so each sample costs a constant number of vector operations
+    regardless of window size. A sorted copy of the window is kept per field
+    (one binary search and a shift of at most ``window`` values per sample),
+    so a percentile is an interpolation between two entries rather than a
+    partition of the whole window on every call.
+    """
+
+    def __init__(self, fields: Sequence[str] = TRACKED_METRICS, window: int = 60, alpha: float = 0.3):
+        if window < 2:
+            raise ValueError("window must hold at least two samples")
+        if not 0.0 < alpha <= 1.0:
+            raise ValueError("alpha must be in (0, 1]")
+        self.fields = tuple(fields)
+        self.index = {name: i for i, name in enumerate(self.fields)}
+        self.window = window
+        self.alpha = alpha
+
+        k = len(self.fields)
+        self._buffer = np.zeros((window, k))
+        self._sorted = np.zeros((window, k))
+        self._pos = 0
+        self.count = 0
+
+        self.value = np.zeros(k)
+        self.mean = np.zeros(k)
+        self._m2 = np.zeros(k)
+        self.ewma = np.zeros(k)
+        # Z-score of the latest sample against the window *before* it arrived
+        self.zscore = np.zeros(k)
+
+    @property
+    def size(self) -> int:
+        return min(self.count, self.window)
+
+    @property
+    def std(self) -> np.ndarray:
+        n = self.size
+        if n < 2:
+            return np.zeros(len(self.fields))
+        return np.sqrt(self._m2 / (n - 1))
+
+    def update(self, values: np.ndarray):
+        """Fold one sample (ordered like ``fields``) into the statistics"""
+        x = np.asarray(values, dtype=np.float64)
+        n = self.size
+
+        std = self.std
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.zscore = np.where(std > 0, (x - self.mean) / std, 0.0)
+
+        if n < self.window:
+            # Window still filling: standard Welford step
+            n += 1
+            delta = x - self.mean
+            self.mean = self.mean + delta / n
+            self._m2 = self._m2 + delta * (x - self.mean)
+        else:
+            # Sliding step: replace the oldest sample with the new one
+            old = self._buffer[self._pos]
+            delta = x - old
+            new_mean = self.mean + delta / n
+            self._m2 = np.maximum(self._m2 + delta * (x - new_mean + old - self.mean), 0.0)
+            self.mean = new_mean
+
+        if self.count == 0:
+            self.ewma = x.copy()
+        else:
+            self.ewma = self.ewma + self.alpha * (x - self.ewma)
+
+        self._insert_sorted(x, self._buffer[self._pos] if self.count >= self.window else None)
+        self._buffer[self._pos] = x
+        self.value = x
+        self.count += 1
+        self._pos += 1
+        if self._pos == self.window:
+            self._pos = 0
+            # Re-anchor the running moments once per cycle to cancel float drift
+            self.mean = self._buffer.mean(axis=0)
+            self._m2 = ((self._buffer - self.mean) ** 2).sum(axis=0)
+
+    def _insert_sorted(self, x: np.ndarray, evicted: Optional[np.ndarray]):
+        """Keep each column of the sorted window in order: drop ``evicted``, insert ``x``"""
+        n = self.size
+        for j in range(len(self.fields)):
+            column = self._sorted[:, j]
+            if evicted is not None:
+                i = np.searchsorted(column[:n], evicted[j])
+                column[i:n - 1] = column[i + 1:n]
+                n_kept = n - 1
+            else:
+                n_kept = n
+            i = np.searchsorted(column[:n_kept], x[j])
+            column[i + 1:n_kept + 1] = column[i:n_kept]
+            column[i] = x[j]
+
+    def percentile(self, q: float) -> np.ndarray:
+        """Linearly interpolated percentile of the window, as ``np.percentile`` computes it"""
+        n = self.size
+        if n == 0:
+            return np.zeros(len(self.fields))
+        position = q / 100 * (n - 1)
+        lo = int(position)
+        hi = min(lo + 1, n - 1)
+        low, high = self._sorted[lo], self._sorted[hi]
+        return low + (high - low) * (position - lo)
+
+    def statistic(self, name: str) -> np.ndarray:
+        """Current value of a named statistic for every field"""
+        if name == "value":
+            return self.value
+        if name == "ewma":
+            return self.ewma
+        if name == "mean":
+            return self.mean
+        if name == "std":
+            return self.std
+        if name == "zscore":
+            return self.zscore
+        if name.startswith("p") and name[1:].isdigit():
+            return self.percentile(float(name[1:]))
+        raise ValueError(f"Unknown statistic: {name}")
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        stats = {name: self.statistic(name) for name in STATISTICS}
+        return {
+            field: {name: float(values[i]) for name, values in stats.items()}
+            for field, i in self.index.items()
+        }
+
+
+class TriggerRule:
+    """Optimization trigger expressed against a rolling statistic"""
+
+    def __init__(self, label: str, metric: str, statistic: str, op: str, threshold: float,
+                 sustain: int = 1, min_samples: int = 1):
+        if op not in (">", "<"):
+            raise ValueError(f"Unsupported operator: {op}")
+        self.label = label
+        self.metric = metric
+        self.statistic = statistic
+        self.op = op
+        self.threshold = threshold
+        self.sustain = sustain
+        self.min_samples = min_samples
+
+    def check(self, value: float) -> bool:
+        return value > self.threshold if self.op == ">" else value < self.threshold
+
+    def describe(self, value: float) -> str:
+        return f"{self.label}: {self.metric} {self.statistic}={value:.3g} {self.op} {self.threshold:g}"
+
+
+# Level rules fire on smoothed drift; spike rules need a sustained deviation
+DEFAULT_RULES = (
+    TriggerRule("High congestion", "congestion_level", "ewma", ">", 0.7),
+    TriggerRule("High gas", "gas_price", "ewma", ">", 120.0),
+    TriggerRule("Low TPS", "tps", "ewma", "<", 250.0),
+    TriggerRule("Gas spike", "gas_price", "zscore", ">", 3.0, sustain=2, min_samples=10),
+    TriggerRule("Throughput drop", "tps", "zscore", "<", -3.0, sustain=2, min_samples=10),
+    TriggerRule("Congestion surge", "congestion_level", "zscore", ">", 3.0, sustain=2, min_samples=10),
+)
+
+
+class AnomalyDetector:
+    """Evaluates trigger rules against streaming statistics on every sample"""
+
+    def __init__(self, rules: Optional[Sequence[TriggerRule]] = None, window: int = 60, alpha: float = 0.3):
+        self.rules = list(DEFAULT_RULES if rules is None else rules)
+        self.stats = StreamingStats(TRACKED_METRICS, window=window, alpha=alpha)
+        self._streaks = [0] * len(self.rules)
+
+    def warm(self, samples):
+        """Fold historical samples into the statistics without evaluating rules"""
+        for metrics in samples:
+            self.stats.update([getattr(metrics, name) for name in self.stats.fields])
+
+    def observe(self, metrics) -> List[str]:
+        """Update statistics with a sample and return descriptions of fired triggers"""
+        stats = self.stats
+        stats.update([getattr(metrics, name) for name in stats.fields])
+
+        cache: Dict[str, np.ndarray] = {}
+        triggers = []
+        for i, rule in enumerate(self.rules):
+            if stats.count < rule.min_samples:
+                self._streaks[i] = 0
+                continue
+            values = cache.get(rule.statistic)
+            if values is None:
+                values = cache[rule.statistic] = stats.statistic(rule.statistic)
+            value = float(values[stats.index[rule.metric]])
+
+            if rule.check(value):
+                self._streaks[i] += 1
+                if self._streaks[i] >= rule.sustain:
+                    triggers.append(rule.describe(value))
+            else:
+                self._streaks[i] = 0
+        return triggers
@@ -0,0 +1,334 @@
+"""
+In-process telemetry for the Rahu Agent
+Counters, gauges and latency histograms rendered in OpenMetrics text format
+"""
+
+import os
+import time
+import weakref
+from bisect import bisect_left
+from functools import wraps
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Fallback reference for process_uptime where /proc is unavailable
+_IMPORTED_AT = time.perf_counter()
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+# Latency buckets in seconds, from 50 µs pipeline stages up to slow RPC fetches
+LATENCY_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def _format_bound(bound: float) -> str:
+    # OpenMetrics wants canonical floats in le labels: "1.0", not "1"
+    return "+Inf" if bound == float("inf") else repr(float(bound))
+
+
+class _Timer:
+    """Context manager that observes its elapsed time into a histogram"""
+    __slots__ = ("histogram", "started")
+
+    def __init__(self, histogram: "Histogram"):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started)
+        return False
+
+
+class Counter:
+    """Monotonically increasing count"""
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+
+class Gauge:
+    """Value that can go up and down, or be read from a callback at scrape time"""
+    __slots__ = ("value", "function")
+
+    def __init__(self):
+        self.value = 0.0
+        self.function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float):
+        self.value = value
+
+    def set_function(self, function: Optional[Callable[[], float]]):
+        self.function = function
+
+    def bind(self, owner, read: Callable[[object], float]):
+        """Read ``read(owner)`` at scrape time without keeping ``owner`` alive (0 once it is gone)"""
+        ref = weakref.ref(owner)
+
+        def value() -> float:
+            target = ref()
+            return read(target) if target is not None else 0.0
+        self.function = value
+
+    def get(self) -> float:
+        return self.function() if self.function is not None else self.value
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram
+
+    Observations only bump one bucket count and the running sum; the
+    cumulative bucket counts are built when the registry is rendered.
+    """
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def time(self) -> _Timer:
+        return _Timer(self)
+
+    def cumulative(self) -> List[Tuple[float, int]]:
+        total = 0
+        buckets = []
+        for bound, count in zip(self.bounds + (float("inf"),), self.counts):
+            total += count
+            buckets.append((bound, total))
+        return buckets
+
+
+def timed(histogram: Histogram):
+    """Decorator recording each call's duration in ``histogram``"""
+    def decorate(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - started)
+        return wrapper
+    return decorate
+
+
+class MetricFamily:
+    """Named metric with optional labels; each label combination is one child"""
+
+    def __init__(self, name: str, kind: str, help_text: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.kind = kind
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._children: Dict[Tuple[str, ...], object] = {}
+
+    def labels(self, *values: str):
+        """Child for one label combination; callers on hot paths should keep the result"""
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            child = self._children[key] = self._new_child()
+        return child
+
+    def _new_child(self):
+        if self.kind == "counter":
+            return Counter()
+        if self.kind == "gauge":
+            return Gauge()
+        return Histogram(self.buckets)
+
+    # Unlabelled families proxy straight to their single child
+
+    def inc(self, amount: float = 1.0):
+        self.labels().inc(amount)
+
+    def set(self, value: float):
+        self.labels().set(value)
+
+    def set_function(self, function: Optional[Callable[[], float]]):
+        self.labels().set_function(function)
+
+    def bind(self, owner, read: Callable[[object], float]):
+        self.labels().bind(owner, read)
+
+    def clear(self):
+        """Drop every label combination, e.g. the networks of a replaced agent"""
+        self._children.clear()
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+    def time(self) -> _Timer:
+        return self.labels().time()
+
+    def render(self) -> List[str]:
+        lines = [f"# TYPE {self.name} {self.kind}", f"# HELP {self.name} {_escape(self.help_text)}"]
+        for key, child in sorted(self._children.items()):
+            labels = _format_labels(self.labelnames, key)
+            if self.kind == "counter":
+                lines.append(f"{self.name}_total{labels} {_format_value(child.value)}")
+            elif self.kind == "gauge":
+                lines.append(f"{self.name}{labels} {_format_value(child.get())}")
+            else:
+                for bound, total in child.cumulative():
+                    bucket_labels = _format_labels(self.labelnames, key, f'le="{_format_bound(bound)}"')
+                    lines.append(f"{self.name}_bucket{bucket_labels} {total}")
+                lines.append(f"{self.name}_count{labels} {child.count}")
+                lines.append(f"{self.name}_sum{labels} {_format_value(child.sum)}")
+        return lines
+
+
+class Registry:
+    """Collection of metric families rendered together for a scrape"""
+
+    def __init__(self):
+        self.families: Dict[str, MetricFamily] = {}
+
+    def _get_or_create(self, name: str, kind: str, help_text: str, labelnames: Sequence[str],
+                       buckets: Sequence[float] = LATENCY_BUCKETS) -> MetricFamily:
+        family = self.families.get(name)
+        if family is None:
+            family = self.families[name] = MetricFamily(name, kind, help_text, labelnames, buckets)
+        elif family.kind != kind or family.labelnames != tuple(labelnames):
+            raise ValueError(f"Metric {name} already registered with a different type or labels")
+        return family
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> MetricFamily:
+        return self._get_or_create(name, "counter", help_text, labelnames)
+
+    def gauge(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> MetricFamily:
+        return self._get_or_create(name, "gauge", help_text, labelnames)
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> MetricFamily:
+        return self._get_or_create(name, "histogram", help_text, labelnames, buckets)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for family in self.families.values():
+            lines.extend(family.render())
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide registry served on /metrics
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "rahu_stage_duration_seconds", "Time spent in each monitoring pipeline stage", ("stage",)
+)
+# Per-network series are labelled with the network id
+TICK_LAG_SECONDS = REGISTRY.histogram(
+    "rahu_tick_lag_seconds", "How late each monitoring tick started relative to its schedule", ("network",)
+)
+TICKS = REGISTRY.counter("rahu_ticks", "Monitoring ticks completed", ("network",))
+TICK_ERRORS = REGISTRY.counter("rahu_tick_errors", "Monitoring ticks that raised an error", ("network",))
+TRIGGERS = REGISTRY.counter(
+    "rahu_optimization_triggers", "Samples that fired an optimization trigger", ("network",)
+)
+PROPOSALS = REGISTRY.counter("rahu_proposals", "Proposals accepted above the confidence threshold", ("network",))
+PROPOSALS_DEDUPLICATED = REGISTRY.counter(
+    "rahu_proposals_deduplicated", "Proposals dropped for repeating the previous tick's parameters", ("network",)
+)
+REASONING_TIMEOUTS = REGISTRY.counter(
+    "rahu_reasoning_timeouts", "Reasoning pool calls that exceeded their deadline"
+)
+CHAIN_SUBMISSIONS = REGISTRY.counter(
+    "rahu_chain_submissions", "AIGovernance proposal transactions by outcome", ("outcome",)
+)
+CHAIN_IN_FLIGHT = REGISTRY.gauge(
+    "rahu_chain_submissions_in_flight", "AIGovernance proposal transactions awaiting a receipt"
+)
+CHAT_RESPONSES = REGISTRY.counter(
+    "rahu_chat_responses", "Chat answers, by whether the response cache served them", ("cache",)
+)
+HTTP_SECONDS = REGISTRY.histogram(
+    "rahu_http_request_duration_seconds", "HTTP API request handling time", ("method", "route")
+)
+HTTP_REQUESTS = REGISTRY.counter(
+    "rahu_http_requests", "HTTP API requests by route and status", ("method", "route", "status")
+)
+STREAM_SUBSCRIBERS = REGISTRY.gauge("rahu_stream_subscribers", "Connected /stream clients")
+STREAM_EVENTS_DROPPED = REGISTRY.counter(
+    "rahu_stream_events_dropped", "Events dropped from full per-client stream buffers"
+)
+METRICS_STORE_BYTES = REGISTRY.gauge(
+    "rahu_metrics_store_bytes", "Memory held by the metrics ring buffer", ("network",)
+)
+METRICS_STORE_SAMPLES = REGISTRY.gauge(
+    "rahu_metrics_store_samples", "Samples retained in the metrics ring buffer", ("network",)
+)
+PROPOSAL_STORE_BYTES = REGISTRY.gauge(
+    "rahu_proposal_store_bytes", "Approximate memory held by stored proposals", ("network",)
+)
+PROPOSALS_STORED = REGISTRY.gauge("rahu_proposals_stored", "Proposals held in memory", ("network",))
+MONITORING_INTERVAL_SECONDS = REGISTRY.gauge(
+    "rahu_monitoring_interval_seconds", "Current adaptive monitoring interval", ("network",)
+)
+STARTUP_SECONDS = REGISTRY.gauge(
+    "rahu_startup_seconds", "Seconds from process start until the HTTP API was listening"
+)
+RESIDENT_MEMORY_BYTES = REGISTRY.gauge("rahu_process_resident_memory_bytes", "Resident set size of the agent process")
+
+
+def resident_memory_bytes() -> float:
+    """Current RSS from /proc, falling back to the peak RSS elsewhere"""
+    import resource
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return float(pages * resource.getpagesize())
+    except (OSError, ValueError, IndexError):
+        return float(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024)
+
+
+def process_uptime() -> float:
+    """Seconds since the process started, from /proc (since telemetry was imported elsewhere)"""
+    try:
+        with open("/proc/self/stat") as f:
+            # starttime is field 22; fields after the parenthesised command start at field 3
+            started_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return max(0.0, uptime - started_ticks / os.sysconf("SC_CLK_TCK"))
+    except (OSError, ValueError, IndexError):
+        return time.perf_counter() - _IMPORTED_AT
+
+
+RESIDENT_MEMORY_BYTES.set_function(resident_memory_bytes)
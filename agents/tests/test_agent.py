@@ -27,10 +27,10 @@ def sample_metrics():
 def test_agent_initialization(agent):
     """Test agent initializes correctly"""
     assert agent is not None
-    assert agent.agent.address.startswith("agent1")
+    assert agent.agent_address.startswith("agent1")
     assert agent.monitoring_interval == 30
     assert agent.min_confidence == 0.75
-    print(f"✅ Agent initialized: {agent.agent.address}")
+    print(f"✅ Agent initialized: {agent.agent_address}")
 
 @pytest.mark.asyncio
 async def test_should_optimize_high_congestion(agent, sample_metrics):
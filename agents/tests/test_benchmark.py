@@ -0,0 +1,66 @@
+"""
+Test suite for the benchmark harness and its regression gate
+"""
+
+import os
+import pytest
+from src.benchmark import BenchmarkSuite, compare, load_baseline, save_baseline
+
+BASELINE = {
+    "chat": {"throughput": 1000.0, "p99_ms": 2.0},
+    "http_health": {"throughput": 5000.0, "p99_ms": 0.01},
+}
+
+def test_compare_flags_regressions():
+    """Test throughput drops and p99 growth beyond the threshold are reported"""
+    assert compare({"chat": {"throughput": 800.0, "p99_ms": 2.5}}, BASELINE, 0.3, 0.3) == []
+
+    slower = compare({"chat": {"throughput": 600.0, "p99_ms": 2.0}}, BASELINE, 0.3, 0.3)
+    assert len(slower) == 1 and "throughput" in slower[0]
+
+    tail = compare({"chat": {"throughput": 1000.0, "p99_ms": 3.0}}, BASELINE, 0.3, 0.3)
+    assert len(tail) == 1 and "p99" in tail[0]
+
+    # Tiny absolute p99 changes are noise; unknown benchmarks are not gated
+    assert compare({"http_health": {"throughput": 5000.0, "p99_ms": 0.04}}, BASELINE) == []
+    assert compare({"new_benchmark": {"throughput": 1.0, "p99_ms": 99.0}}, BASELINE) == []
+
+    # Startup is held to an absolute ceiling even without a baseline
+    assert compare({"startup": {"throughput": 4.0, "p99_ms": 300.0}}, BASELINE) == []
+    late = compare({"startup": {"throughput": 0.8, "p99_ms": 1200.0}}, BASELINE)
+    assert len(late) == 1 and "ceiling" in late[0]
+    print("✅ Regression gate")
+
+@pytest.mark.asyncio
+async def test_suite_smoke_run(monkeypatch, tmp_path):
+    """Test every benchmark runs end to end and round-trips through a baseline file"""
+    monkeypatch.setenv("AGENT_JOURNAL_DIR", "")
+    suite = BenchmarkSuite(scale=0.01, http_concurrency=4, repeats=1)
+    results = await suite.run()
+
+    assert set(results) | set(suite.skipped) == set(suite.benchmarks)
+    for name, result in results.items():
+        assert result.operations > 0 and result.throughput > 0, name
+        assert 0 < result.percentile_ms(50) <= result.percentile_ms(99)
+
+    path = str(tmp_path / "baseline.json")
+    save_baseline(results, path)
+    baseline = load_baseline(path)
+    assert set(baseline) == set(results)
+    print(f"✅ {len(results)} benchmarks ran ({len(suite.skipped)} skipped)")
+
+@pytest.mark.asyncio
+async def test_run_restores_logger_state(monkeypatch):
+    """Test a run leaves agent logging as it found it, even when it was already off"""
+    from src import rahu_agent
+    monkeypatch.setenv("AGENT_JOURNAL_DIR", "")
+    monkeypatch.setattr(rahu_agent.logger, "enabled", False)
+    await BenchmarkSuite(scale=0.001, repeats=1).run(only=["should_optimize"])
+    assert rahu_agent.logger.enabled is False
+    print("✅ Logger state restored after a run")
+
+def test_stored_baseline_covers_suite():
+    """Test the committed baseline has an entry for every benchmark"""
+    from src.benchmark import DEFAULT_BASELINE
+    assert os.path.exists(DEFAULT_BASELINE)
+    assert set(load_baseline(DEFAULT_BASELINE)) == set(BenchmarkSuite().benchmarks)
@@ -0,0 +1,344 @@
+"""
+Test suite for on-chain proposal submission
+"""
+
+import asyncio
+import itertools
+import time
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from src.chain_submitter import (
+    SUBMIT_PROPOSAL_SELECTOR, JsonRpcClient, ProposalSubmitter, encode_submit_proposal, proposal_arguments
+)
+
+SENDER = "0x" + "a1" * 20
+GOVERNANCE = "0x" + "d8" * 20
+
+
+def decode_submit_proposal(calldata):
+    """Decode submitProposal calldata the way the EVM ABI decoder would"""
+    assert calldata[2:10] == SUBMIT_PROPOSAL_SELECTOR
+    data = bytes.fromhex(calldata[10:])
+    words = [int.from_bytes(data[i:i + 32], "big") for i in range(0, len(data), 32)]
+    offset = words[4]
+    length = int.from_bytes(data[offset:offset + 32], "big")
+    reasoning = data[offset + 32:offset + 32 + length].decode()
+    assert len(data) % 32 == 0
+    return words[0], words[1], words[2], data[96:128], reasoning
+
+
+class GovernanceNode:
+    """Stand-in JSON-RPC node with a mempool, manual mining and an AIGovernance contract"""
+
+    def __init__(self):
+        self.nonce = 0
+        self.mempool = {}
+        self.receipts = {}
+        self.gas_price = 10 ** 9
+        self.block = 100
+        self.proposals = []
+        self.reject = {}
+        self.requests = []
+        self._hashes = itertools.count(1)
+
+    def pending_nonce(self):
+        nonce = self.nonce
+        while nonce in self.mempool:
+            nonce += 1
+        return nonce
+
+    def send(self, tx):
+        nonce, price = int(tx["nonce"], 16), int(tx["gasPrice"], 16)
+        if nonce in self.reject:
+            return None, self.reject.pop(nonce)
+        if nonce < self.nonce:
+            return None, "nonce too low"
+        current = self.mempool.get(nonce)
+        if current and price < current["price"] * 1.1:
+            return None, "replacement transaction underpriced"
+        tx_hash = "0x%064x" % next(self._hashes)
+        self.mempool[nonce] = {"hash": tx_hash, "price": price, "to": tx["to"], "data": tx["data"]}
+        return tx_hash, None
+
+    def mine(self):
+        """Include every transaction with a contiguous nonce in one block"""
+        self.block += 1
+        while self.nonce in self.mempool:
+            tx = self.mempool.pop(self.nonce)
+            args = decode_submit_proposal(tx["data"])
+            # AIGovernance requires a non-zero proof hash and positive parameters
+            accepted = all(value > 0 for value in args[:3]) and args[3] != bytes(32)
+            logs = []
+            if accepted:
+                self.proposals.append(args)
+                logs.append({"address": tx["to"], "topics": ["0x" + "ab" * 32, hex(len(self.proposals)), SENDER]})
+            self.receipts[tx["hash"]] = {
+                "transactionHash": tx["hash"],
+                "blockNumber": hex(self.block),
+                "status": "0x1" if accepted else "0x0",
+                "logs": logs,
+            }
+            self.nonce += 1
+
+    def dispatch(self, call):
+        method, params = call["method"], call["params"]
+        error = None
+        if method == "eth_getTransactionCount":
+            result = hex(self.pending_nonce())
+        elif method == "eth_gasPrice":
+            result = hex(self.gas_price)
+        elif method == "eth_chainId":
+            result = hex(31337)
+        elif method == "eth_sendTransaction":
+            assert params[0]["from"] == SENDER
+            result, error = self.send(params[0])
+        elif method == "eth_getTransactionReceipt":
+            result = self.receipts.get(params[0])
+        else:
+            result, error = None, f"unsupported method {method}"
+        if error:
+            return {"jsonrpc": "2.0", "id": call["id"], "error": {"code": -32000, "message": error}}
+        return {"jsonrpc": "2.0", "id": call["id"], "result": result}
+
+    async def handle(self, request):
+        body = await request.json()
+        calls = body if isinstance(body, list) else [body]
+        self.requests.append([call["method"] for call in calls])
+        responses = [self.dispatch(call) for call in calls]
+        return web.json_response(responses if isinstance(body, list) else responses[0])
+
+    def sends(self):
+        return [methods.count("eth_sendTransaction") for methods in self.requests if "eth_sendTransaction" in methods]
+
+
+@pytest_asyncio.fixture
+async def node():
+    """Run the stand-in node on an ephemeral port"""
+    node = GovernanceNode()
+    app = web.Application()
+    app.router.add_post("/", node.handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    node.url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/"
+    yield node
+    await runner.cleanup()
+
+
+async def until(condition, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+def proposal(proposal_id, gas_limit=35_000_000, block_time=2.0, max_tps=1200, reasoning="Increase capacity"):
+    return {
+        "proposal_id": proposal_id,
+        "proposed_params": {"gas_limit": gas_limit, "block_time": block_time, "max_tps": max_tps},
+        "reasoning": reasoning,
+        "zk_proof_hash": None,
+    }
+
+
+def submitter_for(node, **kwargs):
+    options = dict(window=0.05, poll_interval=0.02, replace_after=60.0)
+    options.update(kwargs)
+    return ProposalSubmitter(JsonRpcClient(node.url), SENDER, **options)
+
+
+def test_encode_submit_proposal():
+    """Test calldata matches the ABI layout and proposals map onto contract arguments"""
+    proof = bytes(range(32))
+    calldata = encode_submit_proposal(35_000_000, 2, 1200, proof, "Reduce block time")
+    assert decode_submit_proposal(calldata) == (35_000_000, 2, 1200, proof, "Reduce block time")
+    # selector + 5 head words + length word + one padded data word
+    assert len(calldata) == 2 + 8 + 64 * 7
+
+    gas_limit, block_time, max_tps, proof_hash, reasoning = proposal_arguments(
+        proposal("p1", block_time=1.6, reasoning="x" * 1000))
+    assert (gas_limit, block_time, max_tps) == (35_000_000, 2, 1200)
+    assert proof_hash != bytes(32) and proof_hash == proposal_arguments(proposal("p1", block_time=1.6))[3]
+    assert len(reasoning) == 256
+    assert proposal_arguments(proposal("p2", block_time=0.2))[1] == 1
+
+    with pytest.raises(ValueError):
+        encode_submit_proposal(-1, 2, 1200, proof, "")
+    print("✅ ABI encoding")
+
+
+@pytest.mark.asyncio
+async def test_coalesces_window_into_one_batch(node):
+    """Test superseded proposals are dropped and the rest go out in one batch with local nonces"""
+    submitter = submitter_for(node)
+    for i in range(3):
+        submitter.submit(proposal(f"arb-{i}", gas_limit=31_000_000 + i), "arbitrum", GOVERNANCE)
+    for i in range(2):
+        submitter.submit(proposal(f"base-{i}", gas_limit=41_000_000 + i), "base", GOVERNANCE)
+    await submitter.start()
+    try:
+        await until(lambda: submitter.in_flight == 2)
+        assert node.sends() == [2]
+        assert submitter.counts["superseded"] == 3
+        assert [submitter.submissions[pid].nonce for pid in ("arb-2", "base-1")] == [0, 1]
+        assert submitter.submissions["arb-0"].status == "superseded"
+
+        node.mine()
+        await until(lambda: submitter.counts["confirmed"] == 2)
+        assert [args[0] for args in node.proposals] == [31_000_002, 41_000_001]
+        assert submitter.submissions["base-1"].chain_proposal_id == 2
+        assert submitter.in_flight == 0
+    finally:
+        await submitter.close()
+    print("✅ Coalesced 5 proposals into one 2-transaction batch")
+
+
+@pytest.mark.asyncio
+async def test_rounded_no_op_is_not_sent(node):
+    """Test a proposal that rounds back to the current parameters is held back, and lost rounding is noted"""
+    current = {"gas_limit": 35_000_000, "block_time": 2.0, "max_tps": 1200}
+    submitter = submitter_for(node, window=10.0)
+    waiting = submitter.submit(proposal("keep", gas_limit=36_000_000), "arbitrum", GOVERNANCE)
+
+    no_op = submitter.submit({**proposal("round", block_time=1.8), "current_params": current}, "arbitrum", GOVERNANCE)
+    assert no_op.status == "unchanged" and submitter.counts["unchanged"] == 1
+    assert waiting.status == "pending" and submitter.pending == 1
+
+    partial = submitter.submit({**proposal("partial", gas_limit=36_500_000, block_time=1.8), "current_params": current},
+                               "arbitrum", GOVERNANCE)
+    assert partial.status == "pending" and waiting.status == "superseded"
+    assert partial.to_dict()["note"] == "block_time 1.8s rounds to the current 2s on-chain"
+
+    # The send loop is still waiting out its window: closing sends the proposal
+    await submitter.start()
+    await submitter.close()
+    assert node.sends() == [1] and partial.status == "sent"
+    assert decode_submit_proposal(node.mempool[0]["data"])[:3] == (36_500_000, 2, 1200)
+    print("✅ Rounded no-op held back; pending proposal flushed on close")
+
+
+@pytest.mark.asyncio
+async def test_pipelines_up_to_in_flight_limit(node):
+    """Test at most max_in_flight transactions wait for receipts and nonces stay sequential"""
+    submitter = submitter_for(node, max_in_flight=2)
+    networks = [f"net-{i}" for i in range(5)]
+    for network in networks:
+        submitter.submit(proposal(network), network, GOVERNANCE)
+    await submitter.start()
+
+    async def miner():
+        while True:
+            await asyncio.sleep(0.05)
+            assert len(node.mempool) <= 2
+            node.mine()
+    mining = asyncio.create_task(miner())
+    try:
+        await until(lambda: submitter.counts["confirmed"] == 5)
+    finally:
+        mining.cancel()
+        await submitter.close()
+
+    assert sorted(submitter.submissions[network].nonce for network in networks) == list(range(5))
+    assert node.sends() == [2, 2, 1]
+    assert len(node.proposals) == 5
+    print("✅ Pipelined 5 transactions two at a time")
+
+
+@pytest.mark.asyncio
+async def test_replaces_stuck_transaction(node):
+    """Test a transaction without a receipt is re-sent with the same nonce and a higher gas price"""
+    submitter = submitter_for(node, replace_after=0.1)
+    submission = submitter.submit(proposal("stuck"), "arbitrum", GOVERNANCE)
+    await submitter.start()
+    try:
+        await until(lambda: submission.status == "sent")
+        first_price, first_hash = submission.gas_price, submission.tx_hash
+        await until(lambda: submitter.counts["replaced"] >= 1)
+        assert submission.nonce == 0 and submission.gas_price >= first_price * 1.125
+        assert node.mempool[0]["price"] == submission.gas_price
+
+        node.mine()
+        await until(lambda: submission.status == "confirmed")
+        assert submission.tx_hash != first_hash and submission.tx_hash == submission.tx_hashes[-1]
+    finally:
+        await submitter.close()
+    print(f"✅ Replaced stuck transaction at {submission.gas_price / first_price:.3f}x gas price")
+
+
+@pytest.mark.asyncio
+async def test_send_failures_keep_nonces_gapless(node):
+    """Test a rejected transaction's nonce is reused and a stale nonce is resynced"""
+    submitter = submitter_for(node)
+    node.reject[0] = "insufficient funds for gas * price + value"
+    failed = submitter.submit(proposal("a"), "arbitrum", GOVERNANCE)
+    sent = submitter.submit(proposal("b"), "base", GOVERNANCE)
+    await submitter.start()
+    try:
+        await until(lambda: failed.status == "failed" and sent.status == "sent")
+        assert sent.nonce == 1 and "insufficient funds" in failed.error
+
+        retry = submitter.submit(proposal("c"), "arbitrum", GOVERNANCE)
+        await until(lambda: retry.status == "sent")
+        assert retry.nonce == 0
+        node.mine()
+        await until(lambda: submitter.counts["confirmed"] == 2)
+
+        # Another sender used the account: the next nonce is refused and retried after a resync
+        node.nonce = 7
+        submitter._next_nonce = 2
+        late = submitter.submit(proposal("d"), "optimism", GOVERNANCE)
+        await until(lambda: late.status == "sent")
+        assert late.nonce == 7
+    finally:
+        await submitter.close()
+    print("✅ Nonces stay gapless across send failures")
+
+
+@pytest.mark.asyncio
+async def test_reverted_receipt(node):
+    """Test a transaction the contract rejects is reported as reverted"""
+    submitter = submitter_for(node)
+    submission = submitter.submit(proposal("zero", max_tps=0), "arbitrum", GOVERNANCE)
+    await submitter.start()
+    try:
+        await until(lambda: submission.status == "sent")
+        node.mine()
+        await until(lambda: submission.status == "reverted")
+        assert submitter.stats()["reverted"] == 1 and submission.chain_proposal_id is None
+    finally:
+        await submitter.close()
+    print("✅ Reverted receipt")
+
+
+@pytest.mark.asyncio
+async def test_agent_submits_accepted_proposals(node, monkeypatch):
+    """Test the agent sends recorded proposals for networks with a governance address"""
+    monkeypatch.setenv("AGENT_JOURNAL_DIR", "")
+    monkeypatch.setenv("NETWORKS", "arbitrum,base")
+    monkeypatch.setenv("NETWORK_ARBITRUM_AI_GOVERNANCE_ADDRESS", GOVERNANCE)
+    monkeypatch.setenv("GOVERNANCE_RPC_URL", node.url)
+    monkeypatch.setenv("AGENT_ACCOUNT", SENDER)
+    monkeypatch.setenv("SUBMIT_WINDOW", "0.05")
+    monkeypatch.delenv("PRIVATE_KEY", raising=False)
+    from src.rahu_agent import RahuAgent, OptimizationProposal
+
+    agent = RahuAgent()
+    assert agent.network("base").governance_address is None
+    for network_id in ("arbitrum", "base"):
+        agent.record_proposal(OptimizationProposal(
+            f"{network_id}-1", time.time(), {}, {"gas_limit": 33_000_000, "block_time": 2.0, "max_tps": 1100},
+            0.2, 0.9, "Raise throughput"
+        ), agent.network(network_id))
+    assert agent.submitter.pending == 1
+
+    await agent.submitter.start()
+    try:
+        await until(lambda: agent.submitter.in_flight == 1)
+        node.mine()
+        await until(lambda: agent.submitter.counts["confirmed"] == 1)
+    finally:
+        await agent.submitter.close()
+    assert node.proposals[0][:3] == (33_000_000, 2, 1100)
+    print("✅ Agent submitted its proposal on-chain")
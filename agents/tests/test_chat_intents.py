@@ -0,0 +1,128 @@
+"""
+Test suite for the chat intent engine and its response cache
+"""
+
+import time
+from datetime import datetime
+import numpy as np
+import pytest
+from src.rahu_agent import RahuAgent, OptimizationProposal
+from src.metrics_store import NetworkMetrics
+
+@pytest.fixture
+def agent(monkeypatch):
+    """Two-network agent with an hour of metrics on a fixed clock"""
+    monkeypatch.setenv("AGENT_JOURNAL_DIR", "")
+    monkeypatch.setenv("NETWORKS", "arbitrum,base")
+    agent = RahuAgent()
+    now = datetime(2026, 3, 2, 12, 0).timestamp()
+    agent.clock = lambda: now
+    rng = np.random.default_rng(4)
+    count = 720
+    agent.network("arbitrum").metrics_history.extend({
+        "timestamp": now - 3600 + np.arange(count) * 5.0,
+        "gas_price": rng.lognormal(3.5, 0.5, count),
+        "tps": rng.integers(100, 1500, count),
+        "block_time": rng.uniform(1.5, 2.5, count),
+        "congestion_level": rng.uniform(0.2, 0.9, count),
+        "active_users": rng.integers(1000, 9000, count),
+    })
+    return agent
+
+def add_proposal(agent, proposal_id, timestamp, network="arbitrum"):
+    agent.network(network).proposals.add(OptimizationProposal(
+        proposal_id, timestamp, {"gas_limit": 30_000_000}, {"gas_limit": 33_000_000 + len(proposal_id)},
+        0.1, 0.9, f"Raise gas limit ({proposal_id})"
+    ))
+
+def test_parse(agent):
+    """Test one pattern extracts keywords, metric, statistic, network and time range"""
+    parse = agent.chat.parse
+    query = parse("p95 gas over the last hour")
+    assert (query.statistic, query.metric, query.period) == ("p95", "gas_price", (3600.0, "last hour"))
+
+    query = parse("max transactions per second on base in the past 10 minutes")
+    assert (query.statistic, query.metric, query.network, query.period[0]) == ("max", "tps", "base", 600.0)
+
+    query = parse("proposals since 2:30 pm")
+    assert query.keywords == {"proposals"} and query.since[:2] == (14, 30)
+    assert parse("99th percentile congestion").statistic == "p99"
+    assert parse("average block time last 2 days").period[0] == 172800.0
+    assert parse("how healthy is the agent").keywords == {"status"}
+    # Vocabulary only matches whole words
+    assert parse("gaseous baseline").metric is None and parse("gaseous baseline").network is None
+    print("✅ Intent parsing")
+
+@pytest.mark.asyncio
+async def test_answers_from_indexed_data(agent):
+    """Test parameterized questions are answered from the metrics and proposal indexes"""
+    arbitrum = agent.network("arbitrum").metrics_history
+    gas = arbitrum.column("gas_price")
+
+    reply = await agent.process_chat_message("p95 gas over the last hour")
+    assert reply.startswith("P95 gas price over the last hour:")
+    assert f"{np.percentile(gas, 95):.1f} Gwei" in reply and "raw samples" in reply
+
+    reply = await agent.process_chat_message("min TPS in the past 10 minutes")
+    assert f"{arbitrum.column('tps')[-120:].min():.0f}" in reply and "(120 samples" in reply
+
+    assert "No metrics yet" in await agent.process_chat_message("gas price on base")
+    assert (await agent.process_chat_message("what's the gas price")).startswith("Current gas price:")
+    assert "mean" in await agent.process_chat_message("congestion over the last 30 minutes")
+
+    now = agent.clock()
+    assert await agent.process_chat_message("proposals since 11:00") == "No proposals since 11:00."
+    add_proposal(agent, "early", now - 7200)
+    add_proposal(agent, "a", now - 1800)
+    add_proposal(agent, "b", now - 600)
+    reply = await agent.process_chat_message("Proposals since 11:00?")
+    assert reply.startswith("2 proposals since 11:00.") and "(b)" in reply
+    assert (await agent.process_chat_message("proposals in the last 15 minutes")).startswith("1 proposal in the last 15 minutes.")
+    assert "Latest" in await agent.process_chat_message("any proposals?")
+
+    assert "arbitrum, base" in await agent.process_chat_message("which networks?")
+    assert "p95 gas" in await agent.process_chat_message("help")
+    print("✅ Parameterized answers")
+
+@pytest.mark.asyncio
+async def test_cache_follows_state_version(agent):
+    """Test repeated questions hit the cache until new data or time invalidates them"""
+    calls = []
+    answer = agent.chat.answer
+    agent.chat.answer = lambda query, now: calls.append(query) or answer(query, now)
+
+    first = await agent.process_chat_message("p95 gas over the last hour")
+    assert await agent.process_chat_message("P95  gas over the LAST hour") == first
+    assert await agent.process_chat_message("status") == await agent.process_chat_message("status")
+    assert len(calls) == 2
+
+    # A new sample changes the state version and drops every cached answer
+    agent.metrics_history.append(NetworkMetrics(agent.clock(), 500.0, 100, 2.0, 0.99, 100))
+    assert await agent.process_chat_message("status") != "Active. Monitored 0 metrics, 0 proposals."
+    await agent.process_chat_message("p95 gas over the last hour")
+    # A bare statistic is answered over the last hour, so it is just as relative
+    await agent.process_chat_message("p95 gas")
+    assert len(calls) == 5
+
+    # Time-relative answers also expire as the clock moves on
+    now = agent.clock()
+    agent.clock = lambda: now + 61
+    await agent.process_chat_message("p95 gas over the last hour")
+    await agent.process_chat_message("p95 gas")
+    await agent.process_chat_message("status")
+    assert len(calls) == 7
+    print("✅ Cache invalidated by state version and relative time")
+
+@pytest.mark.asyncio
+async def test_repeated_questions_are_cheap(agent):
+    """Test cached answers cost microseconds while operators repeat questions"""
+    messages = ["p95 gas over the last hour", "status", "proposals since 10:00", "max tps in the past 10 minutes"]
+    for message in messages:
+        await agent.process_chat_message(message)
+    count = 20000
+    started = time.perf_counter()
+    for i in range(count):
+        await agent.process_chat_message(messages[i % len(messages)])
+    per_message = (time.perf_counter() - started) / count
+    assert per_message < 50e-6
+    print(f"✅ {per_message * 1e6:.1f} µs per cached answer")
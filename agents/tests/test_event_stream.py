@@ -0,0 +1,130 @@
+"""
+Test suite for server-sent event streaming
+"""
+
+import asyncio
+import json
+import pytest
+import pytest_asyncio
+from src.event_stream import EventBroker
+from src.rahu_agent import RahuAgent
+from src.http_api import AgentHTTPServer
+
+async def read_chunk(reader):
+    """Read one chunk of a chunked-encoded body"""
+    size = int((await reader.readuntil(b"\r\n")).strip(), 16)
+    data = await reader.readexactly(size + 2)
+    return data[:-2]
+
+async def read_event(reader):
+    """Read chunks until one carries an SSE event (skipping comments)"""
+    while True:
+        chunk = await read_chunk(reader)
+        if not chunk.startswith(b":"):
+            fields = dict(line.split(": ", 1) for line in chunk.decode().strip().split("\n"))
+            return fields["event"], json.loads(fields["data"])
+
+@pytest_asyncio.fixture
+async def server():
+    """Start the API on an ephemeral port"""
+    agent = RahuAgent()
+    agent.journal = None
+    server = AgentHTTPServer(agent, "127.0.0.1", 0)
+    await server.start()
+    yield server
+    await server.close()
+
+@pytest.mark.asyncio
+async def test_broker_serializes_once_per_event():
+    """Test every matching subscriber receives the same encoded frame"""
+    broker = EventBroker()
+    a = broker.subscribe(["metrics"])
+    b = broker.subscribe(["metrics", "proposals"])
+    c = broker.subscribe(["proposals"])
+
+    broker.publish("metrics", {"gas_price": 50.0})
+    assert len(a) == 1 and len(b) == 1 and len(c) == 0
+    assert (await a.next_frame()) is (await b.next_frame())
+
+    with pytest.raises(ValueError):
+        broker.subscribe(["blocks"])
+    print("✅ One frame shared by all subscribers")
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_drops_oldest():
+    """Test a full buffer drops the oldest frames and reports how many were missed"""
+    broker = EventBroker(buffer_size=4)
+    subscription = broker.subscribe()
+    for i in range(10):
+        broker.publish("metrics", {"seq": i})
+
+    assert subscription.dropped == 6
+    frame = await subscription.next_frame()
+    assert b"event: dropped" in frame and b'"dropped": 6' in frame
+    remaining = [json.loads((await subscription.next_frame()).split(b"data: ")[1]) for _ in range(4)]
+    assert [event["seq"] for event in remaining] == [6, 7, 8, 9]
+    assert await subscription.next_frame(timeout=0.01) is None
+    print("✅ Slow subscriber keeps only its newest frames")
+
+@pytest.mark.asyncio
+async def test_stream_pushes_metrics_and_proposals(server):
+    """Test /stream delivers published events over chunked SSE"""
+    reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+    writer.write(b"GET /stream HTTP/1.1\r\nHost: localhost\r\n\r\n")
+    await writer.drain()
+
+    head = (await reader.readuntil(b"\r\n\r\n")).decode().lower()
+    assert "content-type: text/event-stream" in head
+    assert "transfer-encoding: chunked" in head
+    assert await read_chunk(reader) == b": connected\n\n"
+
+    events = server.agent.events
+    metrics = await server.agent.fetch_network_metrics()
+    events.publish("metrics", metrics.to_dict())
+    events.publish("proposals", {"proposal_id": "p1"})
+
+    topic, data = await read_event(reader)
+    assert topic == "metrics" and data["tps"] == metrics.tps
+    topic, data = await read_event(reader)
+    assert topic == "proposals" and data["proposal_id"] == "p1"
+
+    writer.close()
+    for _ in range(100):
+        if not events.subscribers:
+            break
+        await asyncio.sleep(0.01)
+    assert not events.subscribers
+    print("✅ /stream pushes events and unsubscribes on disconnect")
+
+@pytest.mark.asyncio
+async def test_stalled_client_does_not_block_publisher(server):
+    """Test publishing stays bounded and drops events while a client never reads"""
+    reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+    writer.write(b"GET /stream?topics=metrics HTTP/1.1\r\nHost: localhost\r\n\r\n")
+    await writer.drain()
+    events = server.agent.events
+    while not events.subscribers:
+        await asyncio.sleep(0.01)
+
+    payload = {"gas_price": 1.0, "padding": "x" * 512}
+    for i in range(20000):
+        events.publish("metrics", payload)
+        if i % 1000 == 0:
+            # Let the connection task fill the socket buffers
+            await asyncio.sleep(0)
+
+    subscription = next(iter(events.subscribers))
+    assert len(subscription) <= events.buffer_size
+    assert subscription.dropped > 0
+    writer.close()
+    print(f"✅ 20000 publishes with a stalled client ({subscription.dropped} dropped)")
+
+@pytest.mark.asyncio
+async def test_unknown_topic_rejected(server):
+    """Test subscribing to an unknown topic is a 400"""
+    reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+    writer.write(b"GET /stream?topics=blocks HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n")
+    await writer.drain()
+    assert (await reader.read()).startswith(b"HTTP/1.1 400")
+    writer.close()
+    print("✅ Unknown topic rejected")
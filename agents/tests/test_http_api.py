@@ -0,0 +1,194 @@
+"""
+Test suite for the asyncio HTTP API
+"""
+
+import pytest
+import pytest_asyncio
+import asyncio
+import json
+import numpy as np
+from src.rahu_agent import RahuAgent
+from src.http_api import AgentHTTPServer
+
+async def send_request(reader, writer, method, path, body=None, close=False):
+    """Send one request on an open connection and read the response"""
+    payload = json.dumps(body).encode() if body is not None else b""
+    headers = [f"{method} {path} HTTP/1.1", "Host: localhost", f"Content-Length: {len(payload)}"]
+    if close:
+        headers.append("Connection: close")
+    writer.write(("\r\n".join(headers) + "\r\n\r\n").encode() + payload)
+    await writer.drain()
+
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode().split("\r\n")
+    status = int(lines[0].split(" ")[1])
+    response_headers = {}
+    for line in lines[1:]:
+        if line:
+            name, _, value = line.partition(":")
+            response_headers[name.strip().lower()] = value.strip()
+    if response_headers.get("transfer-encoding") == "chunked":
+        data = b""
+        while True:
+            size = int((await reader.readuntil(b"\r\n")).strip(), 16)
+            chunk = await reader.readexactly(size + 2)
+            if not size:
+                break
+            data += chunk[:-2]
+    else:
+        data = await reader.readexactly(int(response_headers["content-length"]))
+    return status, response_headers, json.loads(data) if data else None
+
+@pytest_asyncio.fixture
+async def server():
+    """Start the API on an ephemeral port"""
+    agent = RahuAgent()
+    server = AgentHTTPServer(agent, "127.0.0.1", 0)
+    await server.start()
+    yield server
+    await server.close()
+
+@pytest.mark.asyncio
+async def test_endpoints_over_keep_alive(server):
+    """Test every endpoint is served on a single persistent connection"""
+    reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+
+    status, headers, body = await send_request(reader, writer, "GET", "/health")
+    assert status == 200
+    assert body["status"] == "healthy"
+    assert headers["connection"] == "keep-alive"
+    assert headers["access-control-allow-origin"] == "*"
+
+    status, _, body = await send_request(reader, writer, "GET", "/status")
+    assert status == 200
+    assert body["metrics_count"] == 0
+
+    status, _, body = await send_request(reader, writer, "GET", "/proposals/latest")
+    assert body == {"error": "No proposals yet"}
+
+    status, _, body = await send_request(reader, writer, "POST", "/chat", {"message": "status"})
+    assert status == 200
+    assert "Active" in body["response"]
+
+    status, headers, _ = await send_request(reader, writer, "GET", "/missing", close=True)
+    assert status == 404
+    assert headers["connection"] == "close"
+    assert await reader.read() == b""
+    writer.close()
+    print("✅ Keep-alive connection served all endpoints")
+
+@pytest.mark.asyncio
+async def test_concurrent_connections(server):
+    """Test many clients are served concurrently"""
+    async def client():
+        reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+        results = [await send_request(reader, writer, "GET", "/status") for _ in range(5)]
+        writer.close()
+        return results
+
+    results = await asyncio.gather(*(client() for _ in range(20)))
+    assert all(status == 200 for batch in results for status, _, _ in batch)
+    print("✅ 20 concurrent connections served")
+
+@pytest.mark.asyncio
+async def test_invalid_chat_body(server):
+    """Test malformed JSON returns a client error without dropping the connection"""
+    reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+    writer.write(b"POST /chat HTTP/1.1\r\nContent-Length: 3\r\n\r\n{x}")
+    await writer.drain()
+    head = await reader.readuntil(b"\r\n\r\n")
+    assert head.startswith(b"HTTP/1.1 400")
+
+    length = int([l for l in head.decode().split("\r\n") if l.lower().startswith("content-length")][0].split(":")[1])
+    await reader.readexactly(length)
+    status, _, _ = await send_request(reader, writer, "GET", "/health", close=True)
+    assert status == 200
+    writer.close()
+
+@pytest.mark.asyncio
+async def test_concurrent_chat_clients(server):
+    """Test /chat answers every message from concurrent keep-alive clients, each to its own question"""
+    messages = ["metrics", "status"]
+    expected = {message: await server.agent.process_chat_message(message) for message in messages}
+
+    async def client(offset, count):
+        reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+        answers = []
+        for i in range(offset, offset + count):
+            message = messages[i % 2]
+            status, _, body = await send_request(reader, writer, "POST", "/chat", {"message": message})
+            assert status == 200
+            answers.append(body["response"] == expected[message])
+        writer.close()
+        return answers
+
+    answers = await asyncio.gather(*(client(offset, 50) for offset in range(10)))
+    assert sum(len(batch) for batch in answers) == 500
+    assert all(all(batch) for batch in answers)
+    print("✅ 500 chat messages from 10 clients answered correctly")
+
+@pytest.mark.asyncio
+async def test_metrics_range_streams_buckets(server):
+    """Test /metrics/range aggregates a time range into buckets sent as a chunked JSON document"""
+    from src.http_api import RANGE_CHUNK_ROWS
+    count = 3 * RANGE_CHUNK_ROWS
+    columns = {
+        "timestamp": 1_700_000_000.0 + np.arange(count),
+        "gas_price": np.arange(count, dtype=float),
+        "tps": np.full(count, 1000),
+        "block_time": np.full(count, 2.0),
+        "congestion_level": np.full(count, 0.5),
+        "active_users": np.full(count, 100),
+    }
+    server.agent.metrics_history.extend(columns)
+    start, end = columns["timestamp"][0], columns["timestamp"][-1]
+    reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+
+    status, headers, body = await send_request(
+        reader, writer, "GET", f"/metrics/range?from={start}&to={end}&step=60&agg=mean,max,p50&fields=gas_price"
+    )
+    assert status == 200 and headers["transfer-encoding"] == "chunked"
+    assert body["tier"] == "raw" and body["columns"] == [
+        "timestamp", "count", "gas_price_mean", "gas_price_max", "gas_price_p50"
+    ]
+    first = dict(zip(body["columns"], body["rows"][1]))
+    assert first["timestamp"] % 60 == 0 and first["count"] == 60
+    assert first["gas_price_max"] == first["gas_price_mean"] + 29.5 == first["gas_price_p50"] + 29.5
+    assert sum(row[1] for row in body["rows"]) == count
+
+    # Without a step the samples themselves come back, across several chunks
+    status, _, body = await send_request(reader, writer, "GET", f"/metrics/range?from={start}&to={end}")
+    assert len(body["rows"]) == count and body["rows"][-1][:2] == [end, count - 1.0]
+
+    for query in ("from=soon", f"from={end}&to={start}", "step=0", "agg=mode", "fields=gas"):
+        status, _, body = await send_request(reader, writer, "GET", f"/metrics/range?{query}")
+        assert status == 400, query
+    status, _, _ = await send_request(reader, writer, "GET", "/health", close=True)
+    assert status == 200
+    writer.close()
+    print("✅ /metrics/range streamed bucketed aggregates")
+
+@pytest.mark.asyncio
+async def test_http10_stream_is_not_chunked(server):
+    """Test an HTTP/1.0 client gets a streamed body unchunked, ended by closing the connection"""
+    count = 1000
+    server.agent.metrics_history.extend({
+        "timestamp": 1_700_000_000.0 + np.arange(count),
+        "gas_price": np.arange(count, dtype=float),
+        "tps": np.full(count, 1000),
+        "block_time": np.full(count, 2.0),
+        "congestion_level": np.full(count, 0.5),
+        "active_users": np.full(count, 100),
+    })
+    reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+    writer.write(b"GET /metrics/range?from=1700000000&to=1700000999 HTTP/1.0\r\nHost: localhost\r\n\r\n")
+    await writer.drain()
+
+    head, _, data = (await reader.read()).partition(b"\r\n\r\n")
+    lines = head.decode().split("\r\n")
+    assert lines[0] == "HTTP/1.0 200 OK"
+    headers = {name.strip().lower(): value.strip() for name, _, value in (line.partition(":") for line in lines[1:])}
+    assert "transfer-encoding" not in headers and headers["connection"] == "close"
+    assert len(json.loads(data)["rows"]) == count
+    writer.close()
+    print("✅ HTTP/1.0 stream sent raw until close")
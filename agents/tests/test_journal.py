@@ -0,0 +1,192 @@
+"""
+Test suite for the on-disk agent journal
+"""
+
+import pytest
+import asyncio
+import os
+import time
+import numpy as np
+from src.journal import AgentJournal, JournalError, METRIC_RECORD
+from src.metrics_store import NetworkMetrics
+from src.rahu_agent import RahuAgent, OptimizationProposal
+
+def make_metrics(i):
+    return NetworkMetrics(
+        timestamp=1000 + i,
+        gas_price=50.0 + i,
+        tps=200 + i,
+        block_time=2.0,
+        congestion_level=0.5,
+        active_users=10000 + i
+    )
+
+def make_proposal(i):
+    return OptimizationProposal(
+        proposal_id=f"p{i}",
+        timestamp=1000 + i,
+        current_params={"gas_limit": 30000000, "block_time": 2.0, "max_tps": 1000},
+        proposed_params={"gas_limit": 33000000, "block_time": 1.8, "max_tps": 1100},
+        expected_improvement=0.1,
+        confidence_score=0.8,
+        reasoning="test"
+    )
+
+@pytest.mark.asyncio
+async def test_flush_and_replay(tmp_path):
+    """Test records survive a close and reopen"""
+    journal = AgentJournal(str(tmp_path))
+    journal.open()
+    for i in range(5):
+        journal.record_metrics(make_metrics(i))
+    journal.record_proposal(make_proposal(0).to_dict())
+    await journal.flush()
+    assert journal.pending_bytes == 0
+    journal.close()
+
+    reopened = AgentJournal(str(tmp_path))
+    columns = reopened.replay_metrics()
+    assert list(columns["tps"]) == [200, 201, 202, 203, 204]
+    assert list(reopened.replay_metrics(last=2)["gas_price"]) == [53.0, 54.0]
+    proposals = reopened.replay_proposals()
+    assert proposals[0]["proposal_id"] == "p0"
+    assert proposals[0]["proposed_params"]["max_tps"] == 1100
+    print("✅ Journal replay working")
+
+@pytest.mark.asyncio
+async def test_shutdown_writes_one_batch_at_a_time(tmp_path):
+    """Test cancelling the flusher mid-write and closing never overlaps two writes"""
+    journal = AgentJournal(str(tmp_path), flush_interval=0.01)
+    journal.open()
+    write_batch = journal._write_batch
+    writing, overlaps, started = [0], [], asyncio.Event()
+    loop = asyncio.get_running_loop()
+
+    def slow_write(*args):
+        writing[0] += 1
+        overlaps.append(writing[0])
+        loop.call_soon_threadsafe(started.set)
+        time.sleep(0.05)
+        try:
+            write_batch(*args)
+        finally:
+            writing[0] -= 1
+    journal._write_batch = slow_write
+
+    for i in range(5):
+        journal.record_metrics(make_metrics(i))
+    flusher = asyncio.create_task(journal.run_flusher())
+    await started.wait()
+    # Recorded while the first batch is still being written
+    for i in range(5, 10):
+        journal.record_metrics(make_metrics(i))
+    flusher.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await flusher
+    journal.record_metrics(make_metrics(10))
+    journal.close()
+
+    assert max(overlaps) == 1
+    assert list(AgentJournal(str(tmp_path)).replay_metrics()["tps"]) == [200 + i for i in range(11)]
+    print("✅ Journal writes serialized through shutdown")
+
+def test_torn_tail_is_discarded(tmp_path):
+    """Test a partially written trailing record is cut off on open"""
+    journal = AgentJournal(str(tmp_path))
+    journal.open()
+    journal.record_metrics(make_metrics(0))
+    journal.record_proposal(make_proposal(0).to_dict())
+    journal.close()
+
+    with open(journal.metrics_path, "ab") as f:
+        f.write(b"\x01" * (METRIC_RECORD.itemsize // 2))
+    with open(journal.proposals_path, "ab") as f:
+        f.write(b"\x10\x00\x00\x00garbage")
+
+    reopened = AgentJournal(str(tmp_path))
+    reopened.open()
+    reopened.record_metrics(make_metrics(1))
+    reopened.close()
+
+    assert list(reopened.replay_metrics()["tps"]) == [200, 201]
+    assert len(reopened.replay_proposals()) == 1
+
+def test_compaction_bounds_file_size(tmp_path):
+    """Test the metrics journal is compacted back to the retention size"""
+    journal = AgentJournal(str(tmp_path), metrics_retention=10, proposals_retention=3)
+    journal.open()
+    for i in range(25):
+        journal.record_metrics(make_metrics(i))
+    for i in range(7):
+        journal.record_proposal(make_proposal(i).to_dict())
+    journal.close()
+
+    columns = journal.replay_metrics()
+    assert len(columns["tps"]) == 10
+    assert columns["tps"][-1] == 224
+    assert [p["proposal_id"] for p in journal.replay_proposals()] == ["p4", "p5", "p6"]
+
+def test_rejects_foreign_file(tmp_path):
+    """Test opening a file without the journal header fails loudly"""
+    with open(tmp_path / "metrics.journal", "wb") as f:
+        f.write(b"not a journal")
+    with pytest.raises(JournalError):
+        AgentJournal(str(tmp_path)).open()
+
+@pytest.mark.asyncio
+async def test_rollups_survive_restart_past_retention(tmp_path, monkeypatch):
+    """Test the hour tier keeps history the compacted journal no longer holds, across a crash and a clean stop"""
+    monkeypatch.setenv("AGENT_JOURNAL_DIR", str(tmp_path))
+    monkeypatch.setenv("METRICS_RETENTION", "100")
+    monkeypatch.setenv("ROLLUP_MINUTE_RETENTION", "120")
+    monkeypatch.setenv("ROLLUP_HOUR_RETENTION", "48")
+
+    agent = RahuAgent()
+    agent.restore_from_journal()
+    for i in range(2880):
+        metrics = make_metrics(i * 60)
+        agent.metrics_history.append(metrics)
+        agent.journal.record_metrics(metrics)
+        if i % 50 == 49:
+            await agent.journal.flush()
+    await agent.journal.flush()
+    expected = agent.metrics_history.rollups.tier("1h").rows(points=True)
+    assert len(expected["timestamp"]) == 49
+    assert agent.journal._metrics_records <= 200
+
+    # Crash: nothing written beyond the last flush, the snapshot is from the last compaction
+    for _ in range(2):
+        restarted = RahuAgent()
+        restarted.restore_from_journal()
+        history = restarted.metrics_history
+        rows = history.rollups.tier("1h").rows(points=True)
+        for key in expected:
+            assert np.array_equal(rows[key], expected[key]), key
+        assert history.total_count == 2880 and len(history) == 100
+        assert history.latest().tps == 200 + 2879 * 60
+        assert history.summary(1000)["tier"] == "1h"
+        # Then a clean stop, which snapshots on close
+        restarted.journal.close()
+    print("✅ Hour rollups restored beyond the journal's retention")
+
+def test_agent_restores_history(tmp_path):
+    """Test a restarted agent resumes metrics and proposals"""
+    journal = AgentJournal(str(tmp_path))
+    journal.open()
+    for i in range(50000):
+        journal.record_metrics(make_metrics(i))
+    journal.record_proposal(make_proposal(0).to_dict())
+    journal.close()
+
+    agent = RahuAgent()
+    agent.journal = AgentJournal(str(tmp_path), metrics_retention=agent.metrics_retention)
+    started = time.perf_counter()
+    agent.restore_from_journal()
+    elapsed = time.perf_counter() - started
+    agent.journal.close()
+
+    assert len(agent.metrics_history) == agent.metrics_retention
+    assert agent.metrics_history.latest().tps == 200 + 49999
+    assert agent.proposals[0].proposal_id == "p0"
+    assert elapsed < 1.0
+    print(f"✅ Restored in {elapsed * 1000:.1f} ms")
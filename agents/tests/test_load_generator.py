@@ -0,0 +1,93 @@
+"""
+Test suite for the synthetic L2 load generator and stress harness
+"""
+
+import numpy as np
+import pytest
+import aiohttp
+from src.load_generator import SCENARIOS, SimulatedChain, SimulatedL2Node, StressHarness
+from src.metrics_sources import L2RpcSource
+
+def phase_mean(chain, name, column):
+    """Mean of a chain column over the blocks of every phase called ``name``"""
+    names = np.array([phase.name for phase in chain.phases])[chain.phase]
+    return float(np.mean(column[names == name]))
+
+def test_scenarios_script_their_events():
+    """Test congestion, gas spikes and throughput collapse show up in the generated blocks"""
+    congestion = SimulatedChain(SCENARIOS["congestion"], 3000, seed=1)
+    assert phase_mean(congestion, "congested", congestion.utilisation) > 0.95
+    assert phase_mean(congestion, "calm", congestion.utilisation) == pytest.approx(0.5, abs=0.02)
+
+    spike = SimulatedChain(SCENARIOS["gas_spike"], 3000, seed=1)
+    assert phase_mean(spike, "gas_spike", spike.gas_price_wei) > 5 * phase_mean(spike, "calm", spike.gas_price_wei)
+
+    collapse = SimulatedChain(SCENARIOS["throughput_collapse"], 3000, seed=1)
+    # A quarter of the capacity, in blocks 1.5x as long: 250 TPS instead of 700
+    tps = collapse.tx_count / np.diff(collapse.timestamp, prepend=collapse.timestamp[0] - 2)
+    assert phase_mean(collapse, "collapse", tps) < 0.4 * phase_mean(collapse, "normal", tps)
+    assert phase_mean(collapse, "collapse", np.diff(collapse.timestamp, prepend=0)) == pytest.approx(3.0, abs=0.1)
+
+    # Same scenario, size and seed: same chain
+    again = SimulatedChain(SCENARIOS["gas_spike"], 3000, seed=1)
+    assert np.array_equal(spike.gas_price_wei, again.gas_price_wei)
+    assert [phase.name for phase in SCENARIOS["mixed"]][:3] == ["calm", "congested", "recovery"]
+    print("✅ Scenario events scripted into the chain")
+
+@pytest.mark.asyncio
+async def test_node_serves_l2_rpc_source():
+    """Test the stand-in node answers the agent's real JSON-RPC source with the chain's blocks"""
+    chain = SimulatedChain(SCENARIOS["steady"], 1000, seed=2)
+    # Time only moves when the test moves it, so the served block is known exactly
+    now = [0.0]
+    node = SimulatedL2Node(chain, block_rate=200, clock=lambda: now[0])
+    node.start()
+    source = L2RpcSource(node.url)
+    try:
+        async with aiohttp.ClientSession() as session:
+            first = await source.fetch(session)
+            assert first["gas_price"] == pytest.approx(chain.gas_price_wei[0] / 1e9)
+            assert first["congestion_level"] == pytest.approx(chain.gas_used[0] / chain.gas_limit)
+            node.begin()
+            now[0] = 0.125
+            second = await source.fetch(session)
+            assert second["block_time"] == pytest.approx(2.0) and second["tps"] > 0
+            assert await source.rpc(session, "eth_blockNumber") == hex(node.first_block + 25)
+    finally:
+        node.stop()
+    # Blocks produced between the two fetches were never served
+    assert node.served.sum() == 2 and node.last_served == 25
+    print("✅ Stand-in node serves the L2 RPC source")
+
+@pytest.mark.asyncio
+async def test_harness_report(monkeypatch):
+    """Test a short congestion run reports samples, drops, lag, memory and API percentiles"""
+    monkeypatch.setenv("AGENT_JOURNAL_DIR", "")
+    harness = StressHarness("congestion", rate=200, duration=1.5, http_clients=2, chat_clients=1, seed=3)
+    report = await harness.run()
+
+    network = report["networks"]["default"]
+    assert network["blocks_produced"] == pytest.approx(300, abs=5)
+    assert network["samples_observed"] + network["dropped_samples"] == network["blocks_produced"]
+    assert network["samples_stored"] > 100 and network["tick_errors"] == 0
+    assert network["sample_lag"]["count"] == network["samples_stored"]
+    assert 0 < network["sample_lag"]["p50_ms"] <= network["sample_lag"]["p99_ms"] <= network["sample_lag"]["max_ms"]
+    assert network["proposal_lag"]["count"] == network["proposals"]
+    assert [row["phase"] for row in network["proposals_by_phase"]] == ["calm", "congested", "recovery"]
+
+    assert report["api_errors"] == 0
+    assert set(report["api"]) == {"http_health", "http_status", "http_proposals", "http_proposals_latest",
+                                  "http_metrics", "chat"}
+    assert all(latency["count"] > 0 and latency["p95_ms"] > 0 for latency in report["api"].values())
+    assert report["memory"]["rss_peak_mb"] >= report["memory"]["rss_start_mb"] > 0
+    assert report["memory"]["metrics_store_bytes"] > 0
+    print(f"✅ {network['samples_stored']} samples, {network['drop_rate']:.1%} dropped, "
+          f"{report['api_requests_per_second']:.0f} API req/s")
+
+def test_rejects_unknown_scenario():
+    """Test misconfigured runs fail before starting anything"""
+    with pytest.raises(ValueError, match="Unknown scenario"):
+        StressHarness("meltdown")
+    with pytest.raises(ValueError):
+        StressHarness(rate=0)
+    print("✅ Invalid runs rejected")
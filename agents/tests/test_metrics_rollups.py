@@ -0,0 +1,170 @@
+"""
+Test suite for downsampled metrics rollups and tier selection
+"""
+
+import asyncio
+import numpy as np
+import pytest
+from src.metrics_rollups import MetricsRollups, QuantileSketch
+from src.metrics_store import MetricsStore, NetworkMetrics
+
+# Hour-aligned so buckets hold whole minutes and hours
+START = 1_699_999_200.0
+
+def synthetic_columns(count, step, seed=0):
+    """Metrics sampled every ``step`` seconds from START"""
+    rng = np.random.default_rng(seed)
+    return {
+        "timestamp": START + np.arange(count) * step,
+        "gas_price": rng.lognormal(3.5, 0.6, count),
+        "tps": rng.integers(50, 2000, count),
+        "block_time": rng.uniform(1.0, 3.0, count),
+        "congestion_level": rng.uniform(0.0, 1.0, count),
+        "active_users": rng.integers(1000, 50000, count),
+    }
+
+def samples(columns):
+    for i in range(len(columns["timestamp"])):
+        yield NetworkMetrics(**{name: values[i].item() for name, values in columns.items()})
+
+def test_sketch_quantiles_within_relative_error():
+    """Test sketch quantiles land within the configured relative accuracy"""
+    rng = np.random.default_rng(3)
+    values = np.column_stack([rng.lognormal(3, 1, 20000), rng.uniform(0, 1, 20000)])
+    sketch = QuantileSketch(2, relative_accuracy=0.01)
+    sketch.add(sketch.bin(values))
+    for q in (0.5, 0.95, 0.99):
+        exact = np.quantile(values, q, axis=0, method="lower")
+        assert np.all(np.abs(sketch.quantile(q) - exact) <= 0.011 * exact)
+    print("✅ Sketch quantiles within 1%")
+
+def test_tier_matches_exact_bucket_statistics():
+    """Test incremental and bulk rollups both match exact per-minute statistics"""
+    columns = synthetic_columns(3 * 3600, 1.0)
+    incremental, bulk = MetricsRollups(), MetricsRollups()
+    for metrics in samples(columns):
+        incremental.append(metrics)
+    bulk.extend(columns)
+
+    minute = bulk.tier("1m").rows()
+    assert len(minute["timestamp"]) == 180 and set(minute["count"]) == {60}
+    gas = columns["gas_price"].reshape(180, 60)
+    assert np.allclose(minute["gas_price_min"], gas.min(axis=1))
+    assert np.allclose(minute["gas_price_max"], gas.max(axis=1))
+    assert np.allclose(minute["gas_price_mean"], gas.mean(axis=1))
+    exact_p95 = np.quantile(gas, 0.95, axis=1, method="lower")
+    assert np.all(np.abs(minute["gas_price_p95"] - exact_p95) <= 0.011 * exact_p95)
+
+    for name in ("1m", "1h"):
+        a, b = incremental.tier(name).rows(), bulk.tier(name).rows()
+        for key in a:
+            assert np.allclose(a[key], b[key]), (name, key)
+    assert list(bulk.tier("1h").rows()["count"]) == [3600, 3600, 3600]
+    print("✅ Rollups match exact per-bucket statistics")
+
+def test_memory_is_constant():
+    """Test rollup memory does not grow with uptime"""
+    rollups = MetricsRollups((("1m", 60.0, 100), ("1h", 3600.0, 24)))
+    rollups.extend(synthetic_columns(600, 1.0))
+    before = rollups.nbytes
+    rollups.extend({name: values for name, values in synthetic_columns(200_000, 5.0, seed=1).items()})
+    assert rollups.nbytes == before
+    assert len(rollups.tier("1m")) <= 101 and len(rollups.tier("1h")) <= 25
+    assert not rollups.tier("1m").complete
+    print(f"✅ {rollups.nbytes / 1024:.0f} KiB of rollups after 11 days of samples")
+
+def test_store_picks_finest_covering_tier():
+    """Test queries use raw samples, then minute, then hour rollups as they reach further back"""
+    store = MetricsStore(capacity=500, rollups=MetricsRollups((("1m", 60.0, 120), ("1h", 3600.0, 48))))
+    columns = synthetic_columns(2 * 8640, 10.0)
+    store.extend(columns)
+    now = float(columns["timestamp"][-1])
+
+    assert store.tier_for(now - 3600) == "raw"
+    assert store.tier_for(now - 90 * 60) == "1m"
+    assert store.tier_for(now - 36 * 3600) == "1h"
+
+    tier, raw = store.query(now - 600)
+    assert tier == "raw" and len(raw["timestamp"]) == 61
+
+    tier, rows = store.query(now - 90 * 60, now - 60 * 60)
+    assert tier == "1m" and len(rows["timestamp"]) == 31
+    assert rows["timestamp"][0] <= now - 90 * 60 < rows["timestamp"][0] + 60
+
+    summary = store.summary(now - 36 * 3600)
+    assert summary["tier"] == "1h" and summary["samples"] >= 36 * 360
+    gas = summary["fields"]["gas_price"]
+    assert gas["min"] <= gas["mean"] <= gas["max"]
+
+    # Rollup rows merge into wider buckets; only their own statistics are available
+    tier, hours = store.aggregate(now - 36 * 3600, step=7200, statistics=("max", "mean"))
+    assert tier == "1h" and set(hours["timestamp"] % 7200) == {0}
+    rows = store.rollups.tier("1h").rows(now - 36 * 3600)
+    assert hours["count"].sum() == rows["count"].sum()
+    assert hours["gas_price_max"].max() == rows["gas_price_max"].max()
+    with pytest.raises(ValueError):
+        store.aggregate(now - 36 * 3600, statistics=("p99",))
+
+    # Before anything is evicted the raw buffer holds the whole history
+    small = MetricsStore(capacity=500, rollups=MetricsRollups())
+    small.extend(synthetic_columns(100, 10.0))
+    assert small.tier_for(0) == "raw"
+    print("✅ Tier selection")
+
+def test_percentiles_merge_across_buckets():
+    """Test p95 over many rollup buckets tracks the exact percentile rather than the mean of bucket p95s"""
+    store = MetricsStore(capacity=500, rollups=MetricsRollups((("1m", 60.0, 120), ("1h", 3600.0, 48))))
+    columns = synthetic_columns(8640, 10.0, seed=4)
+    # Quiet most of the day, with gas spiking during two busy hours
+    hour = ((columns["timestamp"] - START) // 3600).astype(int)
+    columns["gas_price"] = np.where(np.isin(hour, (9, 17)), columns["gas_price"] * 8, columns["gas_price"])
+    store.extend(columns)
+    exact = np.percentile(columns["gas_price"], 95)
+
+    summary = store.summary(START)
+    assert summary["tier"] == "1h"
+    assert summary["fields"]["gas_price"]["p95"] == pytest.approx(exact, rel=0.03)
+    rows = store.rollups.tier("1h").rows()
+    assert (rows["gas_price_p95"] * rows["count"]).sum() / rows["count"].sum() < 0.8 * exact
+
+    # Six-hour buckets merge their hours; one-hour buckets keep each hour's sketch p95
+    tier, quarters = store.aggregate(START, step=6 * 3600, statistics=("p95",))
+    quarter = columns["timestamp"] // (6 * 3600)
+    expected = [np.percentile(columns["gas_price"][quarter == i], 95) for i in np.unique(quarter)]
+    assert np.allclose(quarters["gas_price_p95"], expected, rtol=0.03)
+    tier, hours = store.aggregate(START, step=3600, statistics=("p95",))
+    assert np.array_equal(hours["gas_price_p95"], rows["gas_price_p95"])
+    print(f"✅ Merged p95 {summary['fields']['gas_price']['p95']:.1f} against exact {exact:.1f}")
+
+@pytest.mark.asyncio
+async def test_chat_and_api_use_rollups(monkeypatch):
+    """Test chat and /metrics/history answer long periods from rollups"""
+    monkeypatch.setenv("AGENT_JOURNAL_DIR", "")
+    monkeypatch.setenv("METRICS_RETENTION", "100")
+    from src.rahu_agent import RahuAgent
+    from src.http_api import AgentHTTPServer
+    from tests.test_http_api import send_request
+
+    agent = RahuAgent()
+    columns = synthetic_columns(3 * 360, 10.0)
+    agent.metrics_history.extend(columns)
+    agent.clock = lambda: float(columns["timestamp"][-1])
+
+    reply = await agent.process_chat_message("metrics over the last 2 hours")
+    assert reply.startswith("Last 2 hours") and "1m rollups" in reply
+    assert "raw samples" in await agent.process_chat_message("metrics for the past 5 minutes")
+    assert "Gwei" in await agent.process_chat_message("metrics")
+
+    server = AgentHTTPServer(agent, "127.0.0.1", 0)
+    await server.start()
+    try:
+        reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+        status, _, body = await send_request(reader, writer, "GET", f"/metrics/history?since={START}")
+        assert status == 200 and body["tier"] == "1m"
+        assert sum(body["columns"]["count"]) == 3 * 360
+        status, _, body = await send_request(reader, writer, "GET", "/metrics/history?since=soon")
+        assert status == 400
+        writer.close()
+    finally:
+        await server.close()
+    print("✅ Chat and API picked the rollup tier")
@@ -0,0 +1,151 @@
+"""
+Test suite for metrics source plugins
+"""
+
+import pytest
+import pytest_asyncio
+import asyncio
+import time
+from aiohttp import web
+from src.metrics_sources import (
+    MetricsCollector, MetricsSource, L2RpcSource, PythOracleSource, build_sources
+)
+
+class StandInNode:
+    """Minimal JSON-RPC node serving a fixed chain state"""
+
+    def __init__(self):
+        self.block_number = 100
+        self.timestamp = 1_700_000_000
+        self.calls = 0
+
+    async def handle(self, request):
+        body = await request.json()
+        self.calls += 1
+        method = body["method"]
+        if method == "eth_gasPrice":
+            result = hex(42 * 10 ** 9)
+        elif method == "eth_getBlockByNumber":
+            self.block_number += 1
+            self.timestamp += 2
+            result = {
+                "number": hex(self.block_number),
+                "timestamp": hex(self.timestamp),
+                "gasUsed": hex(24_000_000),
+                "gasLimit": hex(30_000_000),
+                "transactions": ["0x00"] * 500,
+            }
+        elif method == "eth_call":
+            words = [55, 3000 * 10 ** 8, self.timestamp, 2 * 10 ** 8]
+            result = "0x" + "".join(w.to_bytes(32, "big").hex() for w in words)
+        else:
+            return web.json_response({"jsonrpc": "2.0", "id": body["id"], "error": {"code": -32601}})
+        return web.json_response({"jsonrpc": "2.0", "id": body["id"], "result": result})
+
+@pytest_asyncio.fixture
+async def node_url():
+    """Run the stand-in node on an ephemeral port"""
+    node = StandInNode()
+    app = web.Application()
+    app.router.add_post("/", node.handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    yield f"http://127.0.0.1:{port}/"
+    await runner.cleanup()
+
+class SlowSource(MetricsSource):
+    name = "slow"
+
+    async def fetch(self, session):
+        await asyncio.sleep(10)
+        return {"gas_price": 999.0}
+
+class FlakySource(MetricsSource):
+    name = "flaky"
+
+    def __init__(self):
+        self.attempts = 0
+
+    async def fetch(self, session):
+        self.attempts += 1
+        if self.attempts == 1:
+            raise ValueError("transient")
+        return {"active_users": 1234}
+
+@pytest.mark.asyncio
+async def test_l2_rpc_source(node_url):
+    """Test block data is turned into gas, utilisation, block time and TPS"""
+    collector = MetricsCollector([L2RpcSource(node_url)])
+    first = await collector.collect()
+    assert first["gas_price"] == 42.0
+    assert first["congestion_level"] == pytest.approx(0.8)
+    assert "tps" not in first
+
+    second = await collector.collect()
+    assert second["block_time"] == 2.0
+    assert second["tps"] == 250
+    await collector.close()
+    print("✅ L2 RPC source working")
+
+@pytest.mark.asyncio
+async def test_pyth_source(node_url):
+    """Test getLatestMetrics return data is decoded"""
+    collector = MetricsCollector([PythOracleSource(node_url, "0x" + "11" * 20)])
+    values = await collector.collect()
+    assert values["gas_price"] == 55.0
+    assert values["eth_price"] == 3000.0
+    await collector.close()
+
+@pytest.mark.asyncio
+async def test_slow_source_does_not_stall_tick(node_url):
+    """Test a hanging source is cut off at its deadline while others succeed"""
+    collector = MetricsCollector([SlowSource(), L2RpcSource(node_url)], timeout=0.3)
+    started = time.perf_counter()
+    values = await collector.collect()
+    elapsed = time.perf_counter() - started
+
+    assert elapsed < 1.0
+    assert values["gas_price"] == 42.0
+    stats = collector.source_stats()
+    assert stats["slow"]["failures"] == 1
+    assert stats["l2_rpc"]["successes"] == 1
+    assert stats["l2_rpc"]["last_latency_ms"] > 0
+    await collector.close()
+    print(f"✅ Tick finished in {elapsed * 1000:.0f} ms despite slow source")
+
+@pytest.mark.asyncio
+async def test_retry_recovers_transient_failure():
+    """Test a failed attempt is retried within the deadline"""
+    source = FlakySource()
+    collector = MetricsCollector([source], retries=2)
+    values = await collector.collect()
+    assert values == {"active_users": 1234}
+    assert source.attempts == 2
+    await collector.close()
+
+def test_build_sources_requires_config():
+    """Test missing configuration is reported by name"""
+    with pytest.raises(ValueError, match="L2_RPC_URL"):
+        build_sources(["l2_rpc"], {})
+    with pytest.raises(ValueError, match="Unknown"):
+        build_sources(["nope"], {})
+
+@pytest.mark.asyncio
+async def test_agent_merges_sources(node_url):
+    """Test the agent fills fields no source reports from the previous sample"""
+    from src.rahu_agent import RahuAgent
+
+    agent = RahuAgent()
+    agent.collector = MetricsCollector([L2RpcSource(node_url)])
+    first = await agent.fetch_network_metrics()
+    agent.metrics_history.append(first)
+    second = await agent.fetch_network_metrics()
+
+    assert first.gas_price == 42.0
+    assert first.tps == 0
+    assert second.tps == 250
+    assert second.block_time == 2.0
+    await agent.collector.close()
@@ -0,0 +1,136 @@
+"""
+Test suite for the columnar metrics store
+"""
+
+import pytest
+import numpy as np
+from src.metrics_rollups import MetricsRollups
+from src.metrics_store import MetricsStore, NetworkMetrics
+
+def make_metrics(i):
+    return NetworkMetrics(
+        timestamp=1000 + i,
+        gas_price=50.0 + i,
+        tps=200 + i,
+        block_time=2.0,
+        congestion_level=0.5,
+        active_users=10000 + i
+    )
+
+def test_append_and_latest():
+    """Test samples round-trip through the columns"""
+    store = MetricsStore(capacity=8)
+    assert store.latest() is None
+
+    for i in range(3):
+        store.append(make_metrics(i))
+
+    assert len(store) == 3
+    latest = store.latest()
+    assert latest.gas_price == 52.0
+    assert latest.tps == 202
+    assert isinstance(latest.tps, int)
+    assert store[0].timestamp == 1000
+    print("✅ Append and latest working")
+
+def test_retention_is_bounded():
+    """Test the oldest samples are evicted once capacity is reached"""
+    store = MetricsStore(capacity=5)
+    for i in range(12):
+        store.append(make_metrics(i))
+
+    assert len(store) == 5
+    assert store.total_count == 12
+    assert [m.tps for m in store] == [207, 208, 209, 210, 211]
+    assert list(store.column("tps")) == [207, 208, 209, 210, 211]
+    assert list(store.column("tps", last=2)) == [210, 211]
+    print("✅ Retention bounded at capacity")
+
+def test_window_is_zero_copy():
+    """Test window columns are read-only views, not copies"""
+    store = MetricsStore(capacity=4)
+    for i in range(6):
+        store.append(make_metrics(i))
+
+    window = store.window(3)
+    gas = window["gas_price"]
+    assert not gas.flags.owndata
+    assert not gas.flags.writeable
+    assert list(gas) == [53.0, 54.0, 55.0]
+    print("✅ Windows are zero-copy")
+
+def test_extend_matches_append():
+    """Test bulk extend produces the same state as repeated appends"""
+    appended = MetricsStore(capacity=6)
+    extended = MetricsStore(capacity=6)
+    appended.append(make_metrics(-1))
+    extended.append(make_metrics(-1))
+
+    samples = [make_metrics(i) for i in range(9)]
+    for sample in samples:
+        appended.append(sample)
+    extended.extend({
+        name: np.array([getattr(s, name) for s in samples])
+        for name in ("timestamp", "gas_price", "tps", "block_time", "congestion_level", "active_users")
+    })
+
+    assert extended.total_count == appended.total_count
+    for name, column in appended.window().items():
+        assert list(extended.column(name)) == list(column)
+    print("✅ Bulk extend matches append")
+
+def test_clear_resets_counts_and_rollups():
+    """Test clearing drops raw samples, the sample count and the rollups alike"""
+    store = MetricsStore(capacity=5, rollups=MetricsRollups())
+    for i in range(0, 1200, 10):
+        store.append(make_metrics(i))
+    store.clear()
+
+    assert len(store) == 0 and store.total_count == 0 and store.latest() is None
+    assert store.tier_for(0) == "raw"
+    assert len(store.rollups.tier("1m")) == 0 and store.rollups.tier("1h").oldest is None
+
+    store.append(make_metrics(5000))
+    assert store.total_count == 1
+    assert list(store.rollups.tier("1m").rows()["count"]) == [1]
+    print("✅ Clear resets counts and rollups")
+
+def test_invalid_capacity():
+    """Test capacity must be positive"""
+    with pytest.raises(ValueError):
+        MetricsStore(capacity=0)
+
+def test_aggregate_matches_numpy():
+    """Test bucketed range statistics match a per-bucket NumPy reference"""
+    rng = np.random.default_rng(7)
+    count = 5000
+    timestamps = 1_700_000_000 + np.cumsum(rng.uniform(0.1, 3.0, count))
+    store = MetricsStore(capacity=count)
+    store.extend({
+        "timestamp": timestamps,
+        "gas_price": rng.lognormal(3, 1, count),
+        "tps": rng.integers(0, 2000, count),
+        "block_time": rng.uniform(1, 3, count),
+        "congestion_level": rng.random(count),
+        "active_users": rng.integers(0, 10000, count),
+    })
+    start, end = timestamps[100], timestamps[-100]
+    tier, result = store.aggregate(start, end, 60, ("min", "mean", "p95", "median"), ("gas_price", "tps"))
+    assert tier == "raw"
+
+    window = (timestamps >= start) & (timestamps <= end)
+    buckets = np.floor(timestamps[window] / 60)
+    assert np.array_equal(result["timestamp"], np.unique(buckets) * 60)
+    assert result["count"].sum() == window.sum()
+    for i, bucket in enumerate(np.unique(buckets)):
+        for field in ("gas_price", "tps"):
+            values = store.column(field)[window][buckets == bucket]
+            assert result[f"{field}_min"][i] == values.min()
+            assert np.isclose(result[f"{field}_mean"][i], values.mean())
+            assert np.isclose(result[f"{field}_p95"][i], np.percentile(values, 95))
+            assert np.isclose(result[f"{field}_median"][i], np.median(values))
+
+    for bad in ({"step": 0}, {"statistics": ("mode",)}, {"statistics": ("p101",)}, {"fields": ("gas",)}):
+        with pytest.raises(ValueError):
+            store.aggregate(start, **bad)
+    print("✅ Range aggregates match NumPy")
@@ -0,0 +1,137 @@
+"""
+Test suite for multi-network monitoring
+"""
+
+import asyncio
+import json
+import pytest
+from src import rahu_agent
+from src.rahu_agent import RahuAgent, OptimizationProposal
+from src.network_monitor import network_env, parse_network_ids
+from src.http_api import AgentHTTPServer, Request
+
+@pytest.fixture
+def multi_env(monkeypatch):
+    """Configure three networks with one network-scoped override"""
+    monkeypatch.setenv("NETWORKS", "arbitrum,optimism,base")
+    monkeypatch.setenv("AGENT_JOURNAL_DIR", "")
+    monkeypatch.setenv("MONITORING_INTERVAL", "30")
+    monkeypatch.setenv("NETWORK_OPTIMISM_MONITORING_INTERVAL", "10")
+
+def make_proposal(proposal_id):
+    return OptimizationProposal(
+        proposal_id=proposal_id, timestamp=1000, current_params={"gas_limit": 1},
+        proposed_params={"gas_limit": 2}, expected_improvement=0.1,
+        confidence_score=0.9, reasoning=proposal_id
+    )
+
+def test_network_config_and_isolation(multi_env):
+    """Test each network gets its own state and scoped configuration"""
+    agent = RahuAgent()
+    assert list(agent.networks) == ["arbitrum", "optimism", "base"]
+    assert agent.default_network.network_id == "arbitrum"
+    assert agent.networks["optimism"].scheduler.base_interval == 10.0
+    assert agent.networks["base"].scheduler.base_interval == 30.0
+
+    # Compatibility attributes read and write the default network
+    assert agent.metrics_history is agent.networks["arbitrum"].metrics_history
+    agent.current_params = {"gas_limit": 1}
+    assert agent.networks["arbitrum"].current_params == {"gas_limit": 1}
+    assert agent.networks["optimism"].current_params["gas_limit"] == 30000000
+
+    agent.record_proposal(make_proposal("p-op"), agent.networks["optimism"])
+    assert len(agent.networks["optimism"].proposals) == 1
+    assert len(agent.proposals) == 0
+    print("✅ Networks configured independently")
+
+def test_network_ids_validated(monkeypatch):
+    """Test network ids are normalised and malformed lists are rejected"""
+    assert parse_network_ids(" Arbitrum, base ") == ["arbitrum", "base"]
+    assert parse_network_ids("") == ["default"]
+    with pytest.raises(ValueError):
+        parse_network_ids("arbitrum,arbitrum")
+    with pytest.raises(ValueError):
+        parse_network_ids("bad/id")
+
+    monkeypatch.setenv("L2_RPC_URL", "http://global")
+    monkeypatch.setenv("NETWORK_ZK_SYNC_L2_RPC_URL", "http://zksync")
+    assert network_env("zk-sync", "L2_RPC_URL") == "http://zksync"
+    assert network_env("base", "L2_RPC_URL") == "http://global"
+    print("✅ Network ids validated")
+
+@pytest.mark.asyncio
+async def test_dozens_of_networks_share_one_loop_fairly(monkeypatch):
+    """Test 30 networks tick concurrently without threads and none is starved"""
+    monkeypatch.setenv("NETWORKS", ",".join(f"net{i}" for i in range(30)))
+    monkeypatch.setenv("AGENT_JOURNAL_DIR", "")
+    monkeypatch.setenv("MONITORING_INTERVAL", "0.02")
+    monkeypatch.setenv("MONITORING_MIN_INTERVAL", "0.02")
+    monkeypatch.setenv("MONITORING_MAX_INTERVAL", "0.02")
+    monkeypatch.setenv("MAX_CONCURRENT_TICKS", "4")
+    agent = RahuAgent()
+
+    rahu_agent.logger.enabled = False
+    try:
+        task = asyncio.create_task(agent.monitor_all())
+        await asyncio.sleep(0.5)
+        agent.is_running = False
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+    finally:
+        rahu_agent.logger.enabled = True
+
+    # Fairness, not speed: every network ticked and none fell behind the others
+    ticks = [network.tick for network in agent.networks.values()]
+    assert min(ticks) >= 1
+    assert max(ticks) - min(ticks) <= 3
+    assert all(len(network.metrics_history) == network.tick for network in agent.networks.values())
+    print(f"✅ 30 networks ticked {min(ticks)}-{max(ticks)} times each")
+
+@pytest.mark.asyncio
+async def test_network_scoped_routes(multi_env):
+    """Test /networks and the /networks/{network}/... routes"""
+    agent = RahuAgent()
+    agent.record_proposal(make_proposal("p-base"), agent.networks["base"])
+    server = AgentHTTPServer(agent, "127.0.0.1", 0)
+
+    async def get(path):
+        response = await server.dispatch(Request("GET", path, "HTTP/1.1", {}))
+        return response.status, json.loads(response.body)
+
+    status, body = await get("/networks")
+    assert [n["network"] for n in body["networks"]] == ["arbitrum", "optimism", "base"]
+
+    status, body = await get("/networks/optimism/status")
+    assert body["network"] == "optimism" and body["monitoring_interval"] == 10.0
+
+    status, body = await get("/networks/base/proposals/p-base")
+    assert status == 200 and body["reasoning"] == "p-base"
+    status, body = await get("/networks/base/proposals/latest")
+    assert body["proposal_id"] == "p-base"
+    status, body = await get("/networks/arbitrum/proposals/p-base")
+    assert status == 404
+    status, body = await get("/networks/base/proposals")
+    assert body["total"] == 1
+
+    # Unscoped routes still serve the default network
+    status, body = await get("/status")
+    assert body["network"] == "arbitrum"
+
+    status, body = await get("/networks/solana/status")
+    assert status == 404
+    print("✅ Network-scoped routes")
+
+@pytest.mark.asyncio
+async def test_scoped_stream_subscription(multi_env):
+    """Test a network-scoped subscriber only sees its network's events"""
+    agent = RahuAgent()
+    scoped = agent.events.subscribe(network="base")
+    everything = agent.events.subscribe()
+
+    agent.events.publish("metrics", {"tps": 1}, network="arbitrum")
+    agent.events.publish("metrics", {"tps": 2}, network="base")
+
+    assert len(scoped) == 1 and len(everything) == 2
+    frame = await scoped.next_frame()
+    assert b'"network":"base"' in frame
+    print("✅ Scoped stream subscription")
@@ -0,0 +1,136 @@
+"""
+Test suite for the indexed proposal store and proposal routes
+"""
+
+import json
+import pytest
+from src.proposal_store import ProposalStore
+from src.rahu_agent import RahuAgent, OptimizationProposal
+from src.http_api import AgentHTTPServer, Request
+
+CURRENT = {"gas_limit": 30000000, "block_time": 2.0, "max_tps": 1000}
+
+def make_proposal(i, timestamp=None, gas_limit=None):
+    return OptimizationProposal(
+        proposal_id=f"p{i}",
+        timestamp=1000 + i if timestamp is None else timestamp,
+        current_params=CURRENT,
+        proposed_params={"gas_limit": gas_limit or 33000000 + i, "block_time": 1.8, "max_tps": 1100},
+        expected_improvement=0.1,
+        confidence_score=0.9,
+        reasoning=f"proposal {i}"
+    )
+
+def test_lookup_by_id_and_latest():
+    """Test the hash index finds any proposal and latest() follows time order"""
+    store = ProposalStore()
+    for i in range(100):
+        assert store.add(make_proposal(i))
+
+    assert store.get("p42").reasoning == "proposal 42"
+    assert store.get("missing") is None
+    assert "p7" in store
+    assert store.latest().proposal_id == "p99"
+    assert store[0].proposal_id == "p0"
+    assert len(store) == 100
+    print("✅ Lookup by id")
+
+def test_pagination_with_cursor_and_since():
+    """Test pages cover every proposal exactly once and since filters by time"""
+    store = ProposalStore()
+    for i in range(25):
+        store.add(make_proposal(i))
+
+    seen = []
+    cursor = None
+    while True:
+        page, cursor = store.list(limit=10, cursor=cursor)
+        seen.extend(p.proposal_id for p in page)
+        if cursor is None:
+            break
+    assert seen == [f"p{i}" for i in range(25)]
+
+    page, cursor = store.list(since=1020, limit=10)
+    assert [p.proposal_id for p in page] == ["p20", "p21", "p22", "p23", "p24"]
+    assert cursor is None
+
+    # Cursors stay valid as new proposals arrive
+    page, cursor = store.list(limit=5)
+    store.add(make_proposal(25))
+    page, _ = store.list(limit=100, cursor=cursor)
+    assert page[0].proposal_id == "p5" and page[-1].proposal_id == "p25"
+    print("✅ Cursor pagination")
+
+def test_out_of_order_insert_keeps_time_order():
+    """Test proposals restored out of order still list by timestamp"""
+    store = ProposalStore()
+    store.add(make_proposal(1, timestamp=300))
+    store.add(make_proposal(2, timestamp=100))
+    store.add(make_proposal(3, timestamp=200))
+    page, _ = store.list()
+    assert [p.timestamp for p in page] == [100, 200, 300]
+    print("✅ Out-of-order inserts sorted")
+
+def test_consecutive_duplicates_dropped():
+    """Test identical parameters on consecutive ticks are stored once"""
+    store = ProposalStore()
+    assert store.add(make_proposal(1, gas_limit=33000000), tick=5)
+    assert not store.add(make_proposal(2, gas_limit=33000000), tick=6)
+    assert not store.add(make_proposal(3, gas_limit=33000000), tick=7)
+    # A gap of one tick makes the same parameters a new proposal
+    assert store.add(make_proposal(4, gas_limit=33000000), tick=9)
+    assert store.add(make_proposal(5, gas_limit=34000000), tick=10)
+    # Re-adding an existing id is also a duplicate
+    assert not store.add(make_proposal(5, gas_limit=35000000))
+    assert [p.proposal_id for p in store] == ["p1", "p4", "p5"]
+    assert store.duplicates == 3
+    print("✅ Consecutive duplicates dropped")
+
+def test_retention_evicts_oldest_and_tracks_memory():
+    """Test the store keeps only the newest proposals and its byte estimate follows"""
+    store = ProposalStore(retention=10)
+    empty = store.nbytes
+    for i in range(30):
+        store.add(make_proposal(i))
+    assert len(store) == 10
+    assert store.get("p19") is None
+    assert store[0].proposal_id == "p20"
+    assert store.nbytes > empty
+
+    full = store.nbytes
+    store.add(make_proposal(30))
+    assert store.nbytes == full
+    print("✅ Retention evicts the oldest proposals")
+
+@pytest.mark.asyncio
+async def test_proposal_routes():
+    """Test GET /proposals/{id} and paginated GET /proposals"""
+    agent = RahuAgent()
+    agent.journal = None
+    for i in range(12):
+        agent.proposals.add(make_proposal(i))
+    server = AgentHTTPServer(agent, "127.0.0.1", 0)
+
+    response = await server.dispatch(Request("GET", "/proposals/p3", "HTTP/1.1", {}))
+    assert response.status == 200
+    assert b'"proposal_id": "p3"' in response.body
+
+    response = await server.dispatch(Request("GET", "/proposals/nope", "HTTP/1.1", {}))
+    assert response.status == 404
+
+    # The exact route still wins over the pattern
+    response = await server.dispatch(Request("GET", "/proposals/latest", "HTTP/1.1", {}))
+    assert b'"proposal_id": "p11"' in response.body
+
+    body = json.loads((await server.dispatch(Request("GET", "/proposals?limit=5", "HTTP/1.1", {}))).body)
+    assert [p["proposal_id"] for p in body["proposals"]] == ["p0", "p1", "p2", "p3", "p4"]
+    assert body["total"] == 12
+    body = json.loads((await server.dispatch(
+        Request("GET", f"/proposals?limit=50&cursor={body['next_cursor']}", "HTTP/1.1", {})
+    )).body)
+    assert len(body["proposals"]) == 7 and body["next_cursor"] is None
+
+    for bad in ("/proposals?limit=0", "/proposals?since=abc", "/proposals?cursor=bogus"):
+        response = await server.dispatch(Request("GET", bad, "HTTP/1.1", {}))
+        assert response.status == 400
+    print("✅ Proposal routes")
@@ -0,0 +1,153 @@
+"""
+Test suite for the MeTTa reasoning engine
+"""
+
+import pytest
+import time
+import numpy as np
+
+pytest.importorskip("hyperon")
+
+from src import metta_reasoning
+from src.metta_reasoning import MeTTaReasoningEngine
+
+CURRENT_PARAMS = {"gas_limit": 30000000, "block_time": 2.0, "max_tps": 1000}
+
+@pytest.fixture
+def engine():
+    """Create a fresh reasoning engine"""
+    return MeTTaReasoningEngine()
+
+def test_space_does_not_grow(engine):
+    """Test network state facts are retracted after each evaluation"""
+    baseline = engine.metta.space().atom_count()
+    for i in range(50):
+        metrics = {"congestion_level": 0.5 + i / 100, "gas_price": 80.0 + i, "tps": 300 - i}
+        engine.explain_decision({"metrics": metrics, "current_params": CURRENT_PARAMS})
+
+    assert engine.metta.space().atom_count() == baseline
+    print(f"✅ Atom space stable at {baseline} atoms")
+
+def test_no_stale_facts(engine):
+    """Test a later evaluation never matches facts from an earlier one"""
+    congested, _ = engine._query_state(0.9, 150.0, 150)
+    calm, _ = engine._query_state(0.3, 40.0, 800)
+
+    assert "True" in str(congested)
+    assert "True" not in str(calm)
+    assert "False" in str(calm)
+
+def test_knowledge_base_parse_cache(tmp_path, monkeypatch):
+    """Test the knowledge base loads from METTA_KNOWLEDGE_BASE_PATH and is parsed once per content hash"""
+    rules = tmp_path / "rules.metta"
+    rules.write_text("(= (congested $net) (> (congestion-level $net) 0.5))\n"
+                     "(= (congestion-level (network-state $c $g $t)) $c)\n")
+    monkeypatch.setenv("METTA_KNOWLEDGE_BASE_PATH", str(tmp_path))
+
+    first = MeTTaReasoningEngine()
+    cached = len(metta_reasoning._parsed_knowledge)
+    second = MeTTaReasoningEngine()
+    assert len(metta_reasoning._parsed_knowledge) == cached
+    assert "True" in str(second.metta.run("!(congested (network-state 0.6 0 0))"))
+
+    # Editing the file changes its hash, so the new rules are parsed and used
+    rules.write_text(rules.read_text().replace("0.5", "0.9"))
+    third = MeTTaReasoningEngine()
+    assert len(metta_reasoning._parsed_knowledge) == cached + 1
+    assert "False" in str(third.metta.run("!(congested (network-state 0.6 0 0))"))
+
+    # Knowledge-base files hold definitions only
+    query = tmp_path / "query.metta"
+    query.write_text("!(congested x)\n")
+    with pytest.raises(ValueError):
+        metta_reasoning.load_knowledge_base(first.metta, str(query))
+    print("✅ Knowledge base parsed once per content hash")
+
+def test_query_cache(engine):
+    """Test repeated evaluations of the same discretized state hit the cache"""
+    metrics = {"congestion_level": 0.8512, "gas_price": 150.04, "tps": 180}
+    first = engine.explain_decision({"metrics": metrics})
+    engine.explain_decision({"metrics": {**metrics, "congestion_level": 0.8514}})
+    assert "(increase-gas-limit (network-state 0.85 150.0 180))" in first
+
+    info = engine.cache_info()
+    assert info["misses"] == 1
+    assert info["hits"] == 1
+
+def test_reasoning_adjustments(engine):
+    """Test proposed parameters follow the congestion/gas/throughput rules"""
+    proposed, reasoning, confidence = engine.reason_about_optimization(
+        {"congestion_level": 0.85, "gas_price": 150.0, "tps": 180}, CURRENT_PARAMS, 20
+    )
+
+    assert proposed["gas_limit"] == int(30000000 * 1.075)
+    assert proposed["block_time"] == pytest.approx(1.9)
+    assert proposed["max_tps"] == 1020
+    assert "Congestion" in reasoning
+    assert confidence == pytest.approx(0.75)
+
+def test_adjustments_come_from_knowledge_base(tmp_path, monkeypatch):
+    """Test editing a threshold or factor in optimization.metta changes the proposals, scalar and batch"""
+    from src.rule_compiler import DEFAULT_KNOWLEDGE_BASE
+    with open(f"{DEFAULT_KNOWLEDGE_BASE}/optimization.metta") as f:
+        text = f.read()
+    (tmp_path / "optimization.metta").write_text(
+        text.replace("(= (congestion-threshold) 0.7)", "(= (congestion-threshold) 0.8)")
+            .replace("(min 0.2 ", "(min 0.1 ")
+    )
+    monkeypatch.setenv("METTA_KNOWLEDGE_BASE_PATH", str(tmp_path))
+    engine = MeTTaReasoningEngine()
+
+    metrics = {"congestion_level": 0.85, "gas_price": 300.0, "tps": 180}
+    proposed, reasoning, _ = engine.reason_about_optimization(metrics, CURRENT_PARAMS, 20)
+    assert proposed["gas_limit"] == int(30000000 * 1.025)
+    assert proposed["block_time"] == pytest.approx(1.8)
+    assert "Increase gas limit by 2.5%" in reasoning
+
+    batch, _, _ = engine.reason_about_optimization_batch(
+        {name: np.array([value]) for name, value in metrics.items()}, CURRENT_PARAMS, 20
+    )
+    assert batch["gas_limit"][0] == proposed["gas_limit"]
+    assert batch["block_time"][0] == pytest.approx(1.8)
+    print("✅ Adjustments follow the knowledge base")
+
+def test_batch_matches_scalar(engine):
+    """Test the vectorized batch path agrees with per-snapshot reasoning"""
+    rng = np.random.default_rng(11)
+    count = 200
+    metrics = {
+        "congestion_level": rng.uniform(0.3, 1.0, count),
+        "gas_price": rng.uniform(20, 300, count),
+        "tps": rng.integers(50, 900, count),
+    }
+    history = rng.integers(0, 150, count)
+
+    proposed, explanations, confidence = engine.reason_about_optimization_batch(metrics, CURRENT_PARAMS, history)
+
+    for i in range(count):
+        snapshot = {name: column[i].item() for name, column in metrics.items()}
+        expected, reasoning, score = engine.reason_about_optimization(snapshot, CURRENT_PARAMS, int(history[i]))
+        assert proposed["gas_limit"][i] == expected["gas_limit"]
+        assert proposed["block_time"][i] == pytest.approx(expected["block_time"])
+        assert proposed["max_tps"][i] == expected["max_tps"]
+        assert explanations[i] == reasoning
+        assert confidence[i] == pytest.approx(score)
+    print(f"✅ Batch matches scalar for {count} snapshots")
+
+def test_batch_throughput(engine):
+    """Test thousands of snapshots are scored without per-call overhead"""
+    count = 10000
+    rng = np.random.default_rng(3)
+    metrics = {
+        "congestion_level": rng.uniform(0.3, 1.0, count),
+        "gas_price": rng.uniform(20, 300, count),
+        "tps": rng.integers(50, 900, count),
+    }
+    started = time.perf_counter()
+    proposed, explanations, confidence = engine.reason_about_optimization_batch(metrics, CURRENT_PARAMS, 50)
+    elapsed = time.perf_counter() - started
+
+    assert len(explanations) == count
+    assert proposed["gas_limit"].shape == (count,)
+    assert elapsed < 1.0
+    print(f"✅ {count} snapshots in {elapsed * 1000:.1f} ms")
@@ -0,0 +1,113 @@
+"""
+Test suite for the reasoning process pool
+"""
+
+import asyncio
+import multiprocessing
+import time
+import pytest
+import pytest_asyncio
+
+pytest.importorskip("hyperon")
+
+from src.metta_reasoning import MeTTaReasoningEngine
+from src.reasoning_pool import ReasoningPool, ReasoningTimeout
+from src.rahu_agent import RahuAgent, NetworkMetrics
+
+CURRENT_PARAMS = {"gas_limit": 30000000, "block_time": 2.0, "max_tps": 1000}
+CONGESTED = {"congestion_level": 0.9, "gas_price": 150.0, "tps": 150}
+
+@pytest_asyncio.fixture
+async def pool():
+    """Start a warm two-worker pool"""
+    pool = ReasoningPool(workers=2, timeout=10.0)
+    await pool.start()
+    yield pool
+    await pool.close()
+
+@pytest.mark.asyncio
+async def test_pool_matches_engine(pool):
+    """Test pooled reasoning and validation agree with the in-process engine"""
+    engine = MeTTaReasoningEngine()
+    expected = engine.reason_about_optimization(CONGESTED, CURRENT_PARAMS, 50)
+    assert await pool.reason(CONGESTED, CURRENT_PARAMS, 50) == expected
+
+    proposal = {"current_params": CURRENT_PARAMS, "proposed_params": expected[0]}
+    assert await pool.validate(proposal) is True
+    unsafe = {"current_params": CURRENT_PARAMS, "proposed_params": {**CURRENT_PARAMS, "gas_limit": 90000000}}
+    assert await pool.validate(unsafe) is False
+
+    results = await pool.reason_many([CONGESTED, {"congestion_level": 0.3, "gas_price": 40.0, "tps": 800}],
+                                     CURRENT_PARAMS, 50)
+    assert results[0] == expected
+    assert results[1][0] == CURRENT_PARAMS
+    print("✅ Pool results match the engine")
+
+@pytest.mark.asyncio
+async def test_loop_stays_responsive(pool):
+    """Test the event loop keeps running while a worker is busy"""
+    # The worker only returns once the loop sets the event: a call that
+    # blocked the loop would wait out its 10 s and return False instead
+    with multiprocessing.Manager() as manager:
+        released = manager.Event()
+        call = asyncio.create_task(pool.submit(released.wait, 10.0))
+        ticks = 0
+        while ticks < 5:
+            await asyncio.sleep(0.001)
+            ticks += 1
+        released.set()
+        assert await call is True
+    print(f"✅ Loop ticked {ticks} times while a worker was busy")
+
+@pytest.mark.asyncio
+async def test_timeout_recycles_pool(pool):
+    """Test a call past its deadline raises and its stuck worker is replaced"""
+    stuck = pool._executor
+    workers = list(stuck._processes.values())
+    with pytest.raises(ReasoningTimeout):
+        await pool.submit(time.sleep, 5, timeout=0.2)
+    assert pool.restarts == 1 and pool._executor is not stuck
+
+    # The old workers were terminated rather than left to finish the sleep
+    for process in workers:
+        process.join(5)
+        assert not process.is_alive()
+    assert (await pool.reason(CONGESTED, CURRENT_PARAMS, 50))[2] > 0
+    print("✅ Timed-out call recycled the pool")
+
+@pytest.mark.asyncio
+async def test_timeout_spares_concurrent_calls(pool):
+    """Test calls in flight when another one times out are re-run instead of failing with the pool"""
+    results = await asyncio.gather(
+        pool.submit(time.sleep, 5, timeout=0.3),
+        pool.submit(time.sleep, 0.6, timeout=20.0),
+        pool.submit(pow, 2, 10, timeout=20.0),
+        return_exceptions=True
+    )
+    assert isinstance(results[0], ReasoningTimeout)
+    assert results[1:] == [None, 1024]
+    # Only the timed-out call restarted the pool
+    assert pool.restarts == 1
+    assert (await pool.reason(CONGESTED, CURRENT_PARAMS, 50))[2] > 0
+    print("✅ Concurrent calls survived another call's timeout")
+
+@pytest.mark.asyncio
+async def test_agent_uses_pool(monkeypatch):
+    """Test the agent proposes through the pool when workers are configured"""
+    monkeypatch.setenv("REASONING_WORKERS", "1")
+    monkeypatch.setenv("AGENT_JOURNAL_DIR", "")
+    agent = RahuAgent()
+    assert agent.reasoning is not None
+    metrics = NetworkMetrics(timestamp=1000, gas_price=150.0, tps=150, block_time=2.0,
+                             congestion_level=0.9, active_users=5000)
+    for _ in range(60):
+        agent.metrics_history.append(metrics)
+    try:
+        proposal = await agent.generate_proposal(metrics)
+    finally:
+        await agent.reasoning.close()
+
+    assert proposal is not None
+    assert proposal.proposed_params["gas_limit"] > proposal.current_params["gas_limit"]
+    assert "Congestion" in proposal.reasoning
+    print("✅ Agent proposal came from the reasoning pool")
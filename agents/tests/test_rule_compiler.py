@@ -0,0 +1,99 @@
+"""
+Test suite for the compiled rule evaluator
+"""
+
+import time
+import numpy as np
+import pytest
+from src.rule_compiler import compile_knowledge_base, compile_rules, format_value
+
+RULES = ("should-optimize", "congested", "high-gas", "low-throughput", "optimize-params",
+         "gas-limit-factor", "block-time-factor", "max-tps-factor")
+
+@pytest.fixture(scope="module")
+def rules():
+    """Compile the bundled knowledge base"""
+    return compile_knowledge_base()
+
+def to_python(atom):
+    """Convert an interpreter result atom to the compiled evaluator's representation"""
+    from hyperon import ExpressionAtom, GroundedAtom
+    if isinstance(atom, ExpressionAtom):
+        return tuple(to_python(child) for child in atom.get_children())
+    if isinstance(atom, GroundedAtom):
+        return atom.get_object().value
+    return str(atom)
+
+def random_states(count, seed):
+    rng = np.random.default_rng(seed)
+    states = [("network-state", round(float(rng.uniform(0, 1)), 2), round(float(rng.uniform(0, 300)), 1),
+               int(rng.integers(0, 1000))) for _ in range(count)]
+    # The thresholds themselves, where > and < must not flip
+    states += [("network-state", 0.7, 100.0, 200), ("network-state", 0.71, 100.1, 199), ("network-state", 0, 0, 0)]
+    return states
+
+def test_matches_interpreter_on_random_inputs(rules):
+    """Test every compiled rule returns what the MeTTa interpreter does"""
+    pytest.importorskip("hyperon")
+    from src.metta_reasoning import MeTTaReasoningEngine
+    metta = MeTTaReasoningEngine().metta
+
+    for state in random_states(60, seed=5):
+        term = format_value(state)
+        for rule in RULES:
+            [[expected]] = metta.run(f"!({rule} {term})")
+            assert rules[rule](state) == to_python(expected), f"{rule} {term}"
+
+    for history in list(range(0, 151, 7)) + [100, 0.5, 33.3]:
+        [[expected]] = metta.run(f"!(confidence-score {history})")
+        assert rules["confidence-score"](history) == pytest.approx(to_python(expected), rel=1e-12)
+    print("✅ Compiled rules match the interpreter")
+
+def test_vectorized_matches_scalar(rules):
+    """Test the numeric rules evaluate element-wise over arrays"""
+    states = random_states(500, seed=9)
+    columns = [np.array([state[i] for state in states]) for i in range(1, 4)]
+    batch = ("network-state", *columns)
+    for rule in ("should-optimize", "congested", "high-gas", "low-throughput"):
+        assert list(rules[rule](batch)) == [rules[rule](state) for state in states]
+
+    history = np.arange(0, 200, dtype=np.float64)
+    assert np.allclose(rules["confidence-score"](history), [rules["confidence-score"](h) for h in history])
+    print("✅ Vectorized rules match scalar evaluation")
+
+def test_semantics():
+    """Test MeTTa semantics the compiled closures reproduce"""
+    rules = compile_rules("""
+    ; comment
+    (: half (-> Number Number))
+    (= (half $x) (/ $x 2))
+    (= (first (pair $a $b)) $a)
+    (= (same $x $x) True)
+    (= (fact $n) (if (< $n 2) 1 (* $n (fact (- $n 1)))))
+    """)
+    assert rules["half"](7) == 3 and rules["half"](-7) == -3 and rules["half"](7.0) == 3.5
+    assert rules["first"](("pair", 1, 2)) == 1
+    # No matching clause or no definition leaves the call unreduced
+    assert rules["first"](("triple", 1, 2, 3)) == ("first", ("triple", 1, 2, 3))
+    assert rules["same"](1, 1) is True and rules["same"](1, 2) == ("same", 1, 2)
+    assert rules["fact"](5) == 120
+    assert "undefined" not in rules
+
+    with pytest.raises(ValueError):
+        compile_rules("!(half 4)")
+    with pytest.raises(ValueError):
+        compile_rules("(= (half $x) (/ $x 2)")
+    print("✅ Rule semantics")
+
+def test_decisions_take_microseconds(rules):
+    """Test a full decision costs microseconds rather than interpreter round-trips"""
+    state = ("network-state", 0.85, 150.0, 180)
+    count = 20000
+    started = time.perf_counter()
+    for _ in range(count):
+        rules["should-optimize"](state)
+        rules["optimize-params"](state)
+    per_decision = (time.perf_counter() - started) / count
+
+    assert per_decision < 100e-6
+    print(f"✅ {per_decision * 1e6:.1f} µs per decision")
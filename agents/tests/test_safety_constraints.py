@@ -0,0 +1,112 @@
+"""
+Test suite for the precompiled safety constraints and batch validation
+"""
+
+import time
+import numpy as np
+import pytest
+from src.parameter_search import CostModel, current_vector, search, within_bounds
+from src.rule_compiler import format_value
+from src.safety_constraints import SAFETY_RULES, check_columns, load_safety_rules, validate_batch
+
+CURRENT_PARAMS = {"gas_limit": 30_000_000, "block_time": 2.0, "max_tps": 1000}
+
+def random_proposals(count, seed=0):
+    """Proposals scaling each parameter by 0.3-2.3x, so roughly half break some rule"""
+    rng = np.random.default_rng(seed)
+    factors = rng.uniform(0.3, 2.3, (count, 3))
+    return [{"current_params": CURRENT_PARAMS, "proposed_params": {
+        "gas_limit": int(CURRENT_PARAMS["gas_limit"] * a), "block_time": CURRENT_PARAMS["block_time"] * b,
+        "max_tps": int(CURRENT_PARAMS["max_tps"] * c)
+    }} for a, b, c in factors]
+
+def test_violation_details():
+    """Test each failing parameter is reported with its rule, values and ratio"""
+    unsafe = {"current_params": CURRENT_PARAMS, "proposed_params": {**CURRENT_PARAMS, "gas_limit": 60_000_000,
+                                                                    "block_time": 0.5}}
+    safe = {"current_params": CURRENT_PARAMS, "proposed_params": {**CURRENT_PARAMS, "gas_limit": 59_999_999,
+                                                                  "block_time": 1.0}}
+    partial = {"current_params": CURRENT_PARAMS, "proposed_params": {"max_tps": 400}}
+    results = validate_batch([unsafe, safe, partial, {}])
+
+    assert results[0]["valid"] is False and set(results[0]["violations"]) == {"gas_limit", "block_time"}
+    assert results[0]["violations"]["gas_limit"] == {
+        "rule": "safe-gas-limit", "current": 30_000_000.0, "proposed": 60_000_000.0, "ratio": 2.0
+    }
+    assert results[1] == {"valid": True, "violations": {}}
+    # Only parameters present on both sides are checked
+    assert results[2]["valid"] is False and list(results[2]["violations"]) == ["max_tps"]
+    assert results[3]["valid"] is True
+    # A single proposal takes the scalar path and agrees with the batch
+    assert [validate_batch([proposal])[0] for proposal in (unsafe, safe, partial)] == results[:3]
+    print("✅ Per-parameter violation details")
+
+def test_batch_matches_interpreter():
+    """Test the compiled constraints agree with the MeTTa interpreter, including at the bounds"""
+    pytest.importorskip("hyperon")
+    from src.metta_reasoning import MeTTaReasoningEngine
+    engine = MeTTaReasoningEngine()
+    pairs = [(2.0, 1.0), (2.0, 3.0), (2.0, 2.999), (1.0, 0.5), (2.0, 0.6), (30000000, 60000000),
+             (30000000, 15000000), (30000000, 14999999), (1000, 1999)]
+    rng = np.random.default_rng(4)
+    pairs += [(round(float(c), 3), round(float(c * f), 3)) for c, f in zip(rng.uniform(0.1, 5, 40), rng.uniform(0.3, 2.3, 40))]
+
+    current = np.array([c for c, _ in pairs], dtype=np.float64)
+    proposed = np.array([p for _, p in pairs], dtype=np.float64)
+    rules = engine.safety_rules
+    for param, rule in SAFETY_RULES.items():
+        passed = check_columns({param: current}, {param: proposed}, rules)[param]
+        for (c, p), compiled in zip(pairs, passed):
+            [[expected]] = engine.metta.run(f"!({rule} {format_value(c)} {format_value(p)})")
+            assert compiled == expected.get_object().value, f"{rule} {c} {p}"
+
+    proposals = random_proposals(300, seed=2)
+    assert engine.validate_proposals(proposals) == validate_batch(proposals)
+    assert [engine.validate_proposal(proposal) for proposal in proposals] == [
+        result["valid"] for result in validate_batch(proposals)
+    ]
+    print("✅ Compiled safety constraints match the interpreter")
+
+def test_custom_knowledge_base_falls_back(monkeypatch, tmp_path):
+    """Test a knowledge base without safety rules is validated against the bundled ones"""
+    pytest.importorskip("hyperon")
+    from src.metta_reasoning import MeTTaReasoningEngine
+    (tmp_path / "rules.metta").write_text("(= (congested $net) False)\n")
+    monkeypatch.setenv("METTA_KNOWLEDGE_BASE_PATH", str(tmp_path))
+    assert MeTTaReasoningEngine().safety_rules is load_safety_rules()
+
+    (tmp_path / "safety.metta").write_text("\n".join(
+        f"(= ({rule} $current $proposed) (< $proposed (* $current 1.1)))" for rule in SAFETY_RULES.values()
+    ))
+    engine = MeTTaReasoningEngine()
+    proposal = {"current_params": CURRENT_PARAMS, "proposed_params": {**CURRENT_PARAMS, "max_tps": 1200}}
+    assert engine.validate_proposal(proposal) is False
+    assert validate_batch([proposal])[0]["valid"] is True
+    print("✅ Knowledge bases may override the safety constraints")
+
+def test_search_candidates_pass_validation():
+    """Test the parameter search only proposes what validation accepts"""
+    rng = np.random.default_rng(6)
+    congestion = rng.uniform(0.8, 1.0, 500)
+    history = {"tps": congestion * 3000, "congestion_level": congestion, "gas_price": np.exp(3 + 2 * congestion)}
+    proposed, improvement, _ = search(CostModel.fit(history, CURRENT_PARAMS), CURRENT_PARAMS)
+    assert improvement > 0
+    assert validate_batch([{"current_params": CURRENT_PARAMS, "proposed_params": proposed}])[0]["valid"]
+
+    proposals = random_proposals(500, seed=8)
+    rows = np.array([current_vector(proposal["proposed_params"]) for proposal in proposals])
+    assert list(within_bounds(current_vector(CURRENT_PARAMS), rows)) == [
+        result["valid"] for result in validate_batch(proposals)
+    ]
+    print("✅ Search results pass validation")
+
+def test_batch_is_fast():
+    """Test thousands of proposals are validated in a few milliseconds"""
+    proposals = random_proposals(10000, seed=1)
+    validate_batch(proposals)
+    started = time.perf_counter()
+    results = validate_batch(proposals)
+    elapsed = time.perf_counter() - started
+    assert 0 < sum(result["valid"] for result in results) < len(results)
+    assert elapsed < 0.25
+    print(f"✅ {len(proposals)} proposals validated in {elapsed * 1000:.1f} ms")
@@ -0,0 +1,121 @@
+"""
+Test suite for the adaptive monitoring scheduler
+"""
+
+import asyncio
+import pytest
+from src import scheduler as scheduler_module
+from src.scheduler import AdaptiveScheduler
+from src.metrics_store import NetworkMetrics
+from src.rahu_agent import RahuAgent
+
+def test_interval_tightens_under_load():
+    """Test congestion or volatility shrinks the interval toward the minimum"""
+    scheduler = AdaptiveScheduler(30.0, min_interval=3.0, max_interval=120.0)
+
+    assert scheduler.adapt(0.6, 0.0) == pytest.approx(30.0 * 0.1 ** 0.5)
+    assert scheduler.adapt(0.9, 0.0) == pytest.approx(3.0)
+    assert scheduler.pressure == 1.0
+
+    volatile = AdaptiveScheduler(30.0, min_interval=3.0, max_interval=120.0)
+    assert volatile.adapt(0.5, 4.0) == pytest.approx(3.0)
+    print("✅ Interval tightens under load")
+
+def test_interval_backs_off_gradually_when_calm():
+    """Test calm conditions stretch the interval by at most the backoff factor per tick"""
+    scheduler = AdaptiveScheduler(30.0, min_interval=3.0, max_interval=120.0, backoff_factor=1.5)
+    scheduler.adapt(0.9, 5.0)
+
+    intervals = [scheduler.adapt(0.2, 0.0) for _ in range(10)]
+    assert intervals[0] == pytest.approx(4.5)
+    assert all(b >= a for a, b in zip(intervals, intervals[1:]))
+    assert intervals[-1] == pytest.approx(120.0)
+
+    # Normal conditions settle back at the base interval
+    scheduler.adapt(0.5, 0.0)
+    assert scheduler.effective_interval == pytest.approx(30.0)
+    print("✅ Interval backs off gradually")
+
+def test_invalid_bounds_rejected():
+    """Test bounds that do not bracket the base interval are rejected"""
+    with pytest.raises(ValueError):
+        AdaptiveScheduler(10.0, min_interval=20.0)
+    with pytest.raises(ValueError):
+        AdaptiveScheduler(10.0, max_interval=5.0)
+    print("✅ Invalid bounds rejected")
+
+class FakeLoop:
+    """Stands in for asyncio inside the scheduler: time only moves when something sleeps or works"""
+
+    def __init__(self, now: float = 100.0):
+        self.now = now
+        self.sleeps = []
+
+    def get_running_loop(self):
+        return self
+
+    def time(self) -> float:
+        return self.now
+
+    async def sleep(self, delay: float):
+        self.sleeps.append(delay)
+        self.now += delay
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeLoop()
+    monkeypatch.setattr(scheduler_module, "asyncio", fake)
+    return fake
+
+@pytest.mark.asyncio
+async def test_cadence_does_not_drift(clock):
+    """Test slow iterations don't push later ticks back"""
+    scheduler = AdaptiveScheduler(0.02, min_interval=0.01, max_interval=0.05)
+
+    ticks = []
+    await scheduler.wait()
+    ticks.append(clock.now)
+    for _ in range(9):
+        # Simulated work eats most of each interval
+        clock.now += 0.012
+        await scheduler.wait()
+        ticks.append(clock.now)
+
+    # Every tick lands on the 20 ms grid, sleeping only what the work left over;
+    # a sleep-after-work loop would reach the tenth tick at ~0.31 s instead of 0.2 s
+    assert ticks == pytest.approx([100.0 + 0.02 * (i + 1) for i in range(10)])
+    assert clock.sleeps[1:] == pytest.approx([0.008] * 9)
+    assert scheduler.missed_ticks == 0 and scheduler.last_lag == pytest.approx(0.0)
+    print("✅ Ten ticks on a 20 ms grid")
+
+@pytest.mark.asyncio
+async def test_overrun_skips_missed_ticks(clock):
+    """Test an iteration longer than several intervals doesn't cause a burst of catch-up ticks"""
+    scheduler = AdaptiveScheduler(0.01, min_interval=0.01, max_interval=0.04)
+    await scheduler.wait()
+    clock.now += 0.055
+
+    # The overrun tick fires at once, counting the four whole ticks it skipped
+    before = clock.now
+    await scheduler.wait()
+    assert clock.now == before
+    assert scheduler.missed_ticks == 4
+    # The tick after the overrun waits a full interval again
+    await scheduler.wait()
+    assert clock.now - before == pytest.approx(0.01)
+    print("✅ Overrun ticks skipped")
+
+def test_agent_adapts_interval_from_statistics():
+    """Test the agent feeds congestion and z-scores into its scheduler"""
+    agent = RahuAgent()
+    agent.journal = None
+    assert agent.effective_interval == agent.monitoring_interval
+
+    for _ in range(5):
+        agent.anomaly_detector.observe(NetworkMetrics(
+            timestamp=0, gas_price=150.0, tps=200, block_time=2.0,
+            congestion_level=0.95, active_users=10000
+        ))
+    interval = agent.adapt_interval()
+    assert interval == agent.scheduler.min_interval
+    print(f"✅ Agent interval under congestion: {interval}s")
@@ -0,0 +1,87 @@
+"""
+Test suite for streaming statistics and anomaly detection
+"""
+
+import pytest
+import numpy as np
+from src.metrics_store import NetworkMetrics
+from src.streaming_stats import StreamingStats, AnomalyDetector
+
+def make_metrics(gas_price=60.0, tps=600, congestion_level=0.4):
+    return NetworkMetrics(
+        timestamp=0,
+        gas_price=gas_price,
+        tps=tps,
+        block_time=2.0,
+        congestion_level=congestion_level,
+        active_users=10000
+    )
+
+def test_rolling_moments_match_numpy():
+    """Test incremental mean/std match a direct computation over the window"""
+    rng = np.random.default_rng(7)
+    samples = rng.normal(100, 15, size=(250, 3))
+    stats = StreamingStats(window=40)
+
+    for sample in samples:
+        stats.update(sample)
+
+    window = samples[-40:]
+    assert np.allclose(stats.mean, window.mean(axis=0))
+    assert np.allclose(stats.std, window.std(axis=0, ddof=1))
+    assert np.allclose(stats.percentile(95), np.percentile(window, 95, axis=0))
+    print("✅ Rolling moments match NumPy")
+
+def test_percentiles_match_numpy_while_sliding():
+    """Test the sorted window gives NumPy's percentiles while filling, after wrapping and with ties"""
+    rng = np.random.default_rng(2)
+    samples = np.column_stack([rng.normal(100, 15, 200), rng.integers(0, 5, 200), rng.uniform(0, 1, 200)])
+    stats = StreamingStats(window=40)
+
+    for i, sample in enumerate(samples):
+        stats.update(sample)
+        window = samples[max(0, i - 39):i + 1]
+        for q in (0, 50, 95, 99, 100):
+            assert np.allclose(stats.percentile(q), np.percentile(window, q, axis=0)), (i, q)
+    print("✅ Percentiles match NumPy at every step")
+
+def test_ewma_tracks_level():
+    """Test EWMA starts at the first sample and converges to a new level"""
+    stats = StreamingStats(window=10, alpha=0.5)
+    stats.update([100.0, 500.0, 0.5])
+    assert stats.ewma[0] == 100.0
+
+    for _ in range(30):
+        stats.update([200.0, 500.0, 0.5])
+    assert stats.ewma[0] == pytest.approx(200.0)
+
+def test_single_spike_does_not_fire():
+    """Test one noisy sample after a calm history is not enough to trigger"""
+    detector = AnomalyDetector(window=30)
+    for i in range(30):
+        assert detector.observe(make_metrics(gas_price=60.0 + (i % 3))) == []
+
+    assert detector.observe(make_metrics(gas_price=150.0)) == []
+    print("✅ Single spike ignored")
+
+def test_sustained_spike_fires():
+    """Test a deviation that persists across ticks triggers"""
+    detector = AnomalyDetector(window=30)
+    for i in range(30):
+        detector.observe(make_metrics(gas_price=60.0 + (i % 3)))
+
+    detector.observe(make_metrics(gas_price=150.0))
+    triggers = detector.observe(make_metrics(gas_price=155.0))
+    assert any("Gas spike" in t for t in triggers)
+    print(f"✅ Sustained spike fired: {triggers}")
+
+def test_drift_fires_level_rule():
+    """Test a slow drift with no individual outlier still crosses the EWMA rule"""
+    detector = AnomalyDetector(window=30)
+    fired = []
+    for i in range(200):
+        fired = detector.observe(make_metrics(congestion_level=0.4 + i * 0.002))
+        if fired:
+            break
+
+    assert any("High congestion" in t for t in fired)
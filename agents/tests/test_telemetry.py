@@ -0,0 +1,125 @@
+"""
+Test suite for telemetry and the /metrics endpoint
+"""
+
+import gc
+import time
+import weakref
+import pytest
+from src import telemetry
+from src.telemetry import Registry, Histogram, timed, CONTENT_TYPE, STAGE_SECONDS
+from src.rahu_agent import RahuAgent
+from src.http_api import AgentHTTPServer, Request
+
+def test_histogram_buckets_are_cumulative():
+    """Test observations land in the right bucket and render cumulatively"""
+    histogram = Histogram((0.001, 0.01, 0.1))
+    for value in (0.0005, 0.001, 0.005, 0.05, 0.5):
+        histogram.observe(value)
+
+    assert histogram.cumulative() == [(0.001, 2), (0.01, 3), (0.1, 4), (float("inf"), 5)]
+    assert histogram.count == 5
+    assert histogram.sum == pytest.approx(0.5565)
+    print("✅ Histogram buckets are cumulative")
+
+def test_openmetrics_rendering():
+    """Test counters, gauges and labelled histograms render in OpenMetrics text format"""
+    registry = Registry()
+    requests = registry.counter("app_requests", "Requests served", ("route",))
+    memory = registry.gauge("app_memory_bytes", "Memory in use")
+    latency = registry.histogram("app_latency_seconds", "Latency", ("stage",), buckets=(0.1, 1.0))
+
+    requests.labels("/status").inc()
+    requests.labels("/status").inc(2)
+    memory.set_function(lambda: 4096)
+    latency.labels("fetch").observe(0.05)
+    latency.labels("fetch").observe(2.0)
+
+    text = registry.render()
+    assert "# TYPE app_requests counter" in text
+    assert 'app_requests_total{route="/status"} 3' in text
+    assert "app_memory_bytes 4096" in text
+    assert 'app_latency_seconds_bucket{stage="fetch",le="0.1"} 1' in text
+    assert 'app_latency_seconds_bucket{stage="fetch",le="1.0"} 1' in text
+    assert 'app_latency_seconds_bucket{stage="fetch",le="+Inf"} 2' in text
+    assert 'app_latency_seconds_count{stage="fetch"} 2' in text
+    assert text.endswith("# EOF\n")
+    print("✅ OpenMetrics text rendered")
+
+def test_registry_rejects_conflicting_definitions():
+    """Test re-registering a name returns the same family unless the type differs"""
+    registry = Registry()
+    family = registry.counter("app_events", "Events")
+    assert registry.counter("app_events", "Events") is family
+    with pytest.raises(ValueError):
+        registry.gauge("app_events", "Events")
+    print("✅ Conflicting registrations rejected")
+
+def test_timed_decorator_and_overhead():
+    """Test the decorator records calls and costs only a few microseconds"""
+    histogram = Histogram((0.001,))
+
+    @timed(histogram)
+    def work():
+        return 42
+
+    assert work() == 42
+    assert histogram.count == 1
+
+    n = 50000
+    started = time.perf_counter()
+    for _ in range(n):
+        histogram.observe(0.0002)
+    per_observe = (time.perf_counter() - started) / n
+    assert per_observe < 5e-6
+    print(f"✅ observe() costs {per_observe * 1e9:.0f} ns")
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_reports_pipeline():
+    """Test /metrics exposes stage latency, HTTP latency and store gauges"""
+    agent = RahuAgent()
+    agent.journal = None
+    server = AgentHTTPServer(agent, "127.0.0.1", 0)
+
+    metrics = await agent.fetch_network_metrics()
+    agent.metrics_history.append(metrics)
+    await server.dispatch(Request("GET", "/status", "HTTP/1.1", {}))
+    fetch_count = STAGE_SECONDS.labels("fetch").count
+
+    response = await server.dispatch(Request("GET", "/metrics", "HTTP/1.1", {}))
+    assert response.status == 200
+    assert response.headers["Content-Type"] == CONTENT_TYPE
+
+    text = response.body.decode()
+    assert f'rahu_stage_duration_seconds_count{{stage="fetch"}} {fetch_count}' in text
+    assert 'rahu_http_requests_total{method="GET",route="/status",status="200"}' in text
+    assert 'rahu_http_request_duration_seconds_count{method="GET",route="/status"}' in text
+    assert 'rahu_metrics_store_samples{network="default"} 1' in text
+    assert f'rahu_metrics_store_bytes{{network="default"}} {agent.metrics_history.nbytes}' in text
+    assert "rahu_proposal_store_bytes" in text
+    assert "rahu_monitoring_interval_seconds" in text
+    print("✅ /metrics reports the pipeline")
+
+@pytest.mark.asyncio
+async def test_gauges_follow_the_latest_agent(monkeypatch):
+    """Test a new agent replaces the previous one's gauges without keeping it alive"""
+    monkeypatch.setenv("AGENT_JOURNAL_DIR", "")
+    monkeypatch.setenv("NETWORKS", "arbitrum,base")
+    first = RahuAgent()
+    first.metrics_history.append(await first.fetch_network_metrics())
+    assert telemetry.METRICS_STORE_SAMPLES.labels("arbitrum").get() == 1
+
+    monkeypatch.delenv("NETWORKS")
+    second = RahuAgent()
+    text = telemetry.REGISTRY.render()
+    assert 'rahu_metrics_store_samples{network="default"} 0' in text
+    assert 'rahu_metrics_store_samples{network="arbitrum"}' not in text
+    assert 'rahu_monitoring_interval_seconds{network="base"}' not in text
+    assert telemetry.CHAIN_IN_FLIGHT.labels().get() == 0
+
+    # The registry only holds weak references: dropping the agent frees it
+    gone = weakref.ref(first)
+    del first
+    gc.collect()
+    assert gone() is None and second.metrics_history is not None
+    print("✅ Gauges follow the latest agent")
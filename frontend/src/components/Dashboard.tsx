@@ -2,6 +2,7 @@ import { Activity, Zap, Shield, Database } from "lucide-react";
 import { useState, useEffect } from "react";
 import { useContract } from "../hooks/useContract";
 import { RAHU_L2_ABI, AI_GOVERNANCE_ABI } from "../utils/web3";
+import { getMetricsRange } from "../utils/api";
 
 export default function Dashboard() {
   const rahuL2Address = import.meta.env.VITE_RAHU_L2_ADDRESS;
@@ -16,6 +17,7 @@ export default function Dashboard() {
     gasPrice: 42.8, // Realistic Sepolia gas price
     optimizations: 3, // Demo: showing 3 AI-generated proposals
     dataPosted: "1.2 GB",
+    gasChange: "-8.2%",
   });
 
   const [isRealData, setIsRealData] = useState(false);
@@ -40,11 +42,34 @@ export default function Dashboard() {
     let tps = 1000;
     let gasPrice = 42.5;
     let optimizations = 3;
+    let gasChange = "-8.2%";
     
     try {
       // Add small random variation to make it feel alive
       gasPrice = 38 + Math.random() * 10; // 38-48 Gwei range
       tps = 997 + Math.floor(Math.random() * 7); // 997-1003 TPS range (realistic fluctuation)
+
+      // Prefer the agent's recorded gas. Buckets are aligned to multiples of the
+      // step and empty ones are left out, so ask from the start of the previous
+      // 10-minute bucket: the current (partial) bucket's mean is compared with
+      // the previous bucket's, and only when both exist and the previous is non-zero
+      try {
+        const step = 600;
+        const now = Date.now() / 1000;
+        const current = Math.floor(now / step) * step;
+        const buckets = await getMetricsRange(current - step, now, step, ["mean"], ["gas_price"]);
+        if (buckets.length > 0) {
+          const latest = buckets[buckets.length - 1];
+          gasPrice = latest.gas_price_mean;
+          const previous = buckets.length > 1 ? buckets[buckets.length - 2] : undefined;
+          if (previous && latest.timestamp - previous.timestamp === step && previous.gas_price_mean !== 0) {
+            const change = ((latest.gas_price_mean - previous.gas_price_mean) / previous.gas_price_mean) * 100;
+            gasChange = `${change >= 0 ? "+" : ""}${change.toFixed(1)}%`;
+          }
+        }
+      } catch (err) {
+        console.log("⚠️ Agent history unavailable, using simulated gas");
+      }
       
       // Try to fetch real TPS from contract
       if (rahuL2 && !rahuL2Error) {
@@ -82,6 +107,7 @@ export default function Dashboard() {
       gasPrice: Math.round(gasPrice * 10) / 10,
       optimizations,
       dataPosted: "1.2 GB",
+      gasChange,
     };
     
     console.log("📊 Stats updated:", newStats);
@@ -99,7 +125,7 @@ export default function Dashboard() {
     {
       label: "Gas Price",
       value: `${stats.gasPrice} Gwei`,
-      change: "-8.2%",
+      change: stats.gasChange,
       icon: Zap,
       color: "text-yellow-400",
     },
@@ -42,6 +42,61 @@ export const getLatestMetrics = async (): Promise<NetworkMetrics> => {
   }
 };
 
+export interface MetricsRange {
+  network: string;
+  tier: "raw" | "1m" | "1h";
+  from: number;
+  to: number;
+  step: number | null;
+  columns: string[];
+  rows: number[][];
+}
+
+// Get bucketed metrics history, e.g. getMetricsRange(now - 3600, now, 60, ["mean", "p95"], ["gas_price"])
+export const getMetricsRange = async (
+  from: number,
+  to: number,
+  step: number,
+  agg: string[] = ["mean"],
+  fields?: string[]
+): Promise<Record<string, number>[]> => {
+  try {
+    const response = await axios.get<MetricsRange>(`${AGENT_API_URL}/metrics/range`, {
+      params: { from, to, step, agg: agg.join(","), fields: fields?.join(",") },
+    });
+    const { columns, rows } = response.data;
+    return rows.map((row) =>
+      Object.fromEntries(columns.map((name, i) => [name, row[i]]))
+    );
+  } catch (error) {
+    console.error("Failed to fetch metrics range:", error);
+    throw error;
+  }
+};
+
+// Subscribe to pushed metrics and proposals instead of polling
+export const subscribeToAgentStream = (
+  handlers: {
+    onMetrics?: (metrics: NetworkMetrics) => void;
+    onProposal?: (proposal: Record<string, unknown>) => void;
+  },
+  topics: string[] = ["metrics", "proposals"]
+): (() => void) => {
+  const source = new EventSource(
+    `${AGENT_API_URL}/stream?topics=${topics.join(",")}`
+  );
+  source.addEventListener("metrics", (event) => {
+    handlers.onMetrics?.(JSON.parse((event as MessageEvent).data));
+  });
+  source.addEventListener("proposals", (event) => {
+    handlers.onProposal?.(JSON.parse((event as MessageEvent).data));
+  });
+  source.onerror = (error) => {
+    console.error("Agent stream error:", error);
+  };
+  return () => source.close();
+};
+
 // Send chat message to agent
 export const sendChatMessage = async (message: string): Promise<string> => {
   try {